@@ -47,6 +47,8 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 MIDDLEWARE.remove("debug_toolbar.middleware.DebugToolbarMiddleware")
 
+ASYNC_UPLOADS = True
+
 STORAGES = {
     "default": {
         "BACKEND": "cloudinary_storage.storage.MediaCloudinaryStorage",
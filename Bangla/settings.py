@@ -178,6 +178,22 @@ DATABASES = {
     )
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# The web workers and the management commands drop each other's cached feeds, so production needs a shared cache.
+# Without REDISCLOUD_URL every process gets its own in-memory cache, which only suits a single process.
+
+REDISCLOUD_URL = config("REDISCLOUD_URL", default="")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDISCLOUD_URL,
+    } if REDISCLOUD_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -229,6 +245,30 @@ MEDIA_URL = "media/"
 
 MEDIA_ROOT = BASE_DIR / "static/media"
 
+# Longest side in pixels of the resized copies stored next to every uploaded ad and matrimonial image
+IMAGE_VARIANT_SIZES = {
+    "thumbnail": 160,
+    "card": 480,
+    "full": 1280,
+}
+
+IMAGE_VARIANT_QUALITY = {
+    "webp": 80,
+    "jpeg": 82,
+}
+
+# Uploaded images are staged here until they are pushed to the storage backend. The upload workers and the
+# process_staged_uploads command open the staged files, so with several hosts this must be a shared volume.
+UPLOAD_STAGING_ROOT = config("UPLOAD_STAGING_ROOT", default=str(BASE_DIR / "uploads_staging"))
+
+# Seconds after which an upload claimed by a worker that never finished it may be claimed again
+UPLOAD_CLAIM_TIMEOUT = 60 * 10
+
+# Push staged uploads from a pool of UPLOAD_WORKERS background threads instead of inside the request
+ASYNC_UPLOADS = False
+
+UPLOAD_WORKERS = 4
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -251,6 +291,91 @@ EMAIL_PORT = 465
 
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# ADS CONFIG
+# Number of newest ads returned per category on the home feed, and the most a client may ask for
+ADS_HOME_FEED_ADS_PER_CATEGORY = 10
+
+ADS_HOME_FEED_MAX_ADS_PER_CATEGORY = 50
+
+# Seconds a home feed snapshot is kept; snapshots are also dropped whenever an ad, image or category changes
+ADS_HOME_FEED_CACHE_TIMEOUT = 60 * 60
+
+# Seconds a user's set of favourite ad ids is cached; FavouriteAd signals drop it on every change
+ADS_FAVOURITES_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Most ads a search can return, best matches first
+ADS_SEARCH_MAX_RESULTS = 500
+
+# Shortest last query term matched as a prefix, and the most indexed terms such a prefix expands to
+ADS_SEARCH_MIN_PREFIX_LENGTH = 3
+
+ADS_SEARCH_MAX_PREFIX_TERMS = 50
+
+# Default lower bounds of the price bands counted by the search facets
+ADS_SEARCH_PRICE_BUCKETS = [0, 50, 100, 500, 1000, 5000]
+
+# Seconds between two writes of the buffered ad views; 0 leaves flushing to explicit ViewTracker.flush() calls
+ADS_VIEW_FLUSH_INTERVAL = 10
+
+# Most ads whose view counts are written by a single UPDATE
+ADS_VIEW_FLUSH_BATCH_SIZE = 500
+
+# Most distinct ads buffered between two flushes; views of further ads are dropped and counted as such
+ADS_VIEW_BUFFER_MAX_ADS = 10000
+
+# Most ads approved or denied by a single UPDATE of a bulk moderation
+ADS_MODERATION_BATCH_SIZE = 500
+
+# Reject new ads whose name and description are near copies of another ad by the same seller, using MinHash
+# signatures; run rebuild_ad_signatures after turning it on
+ADS_NEAR_DUPLICATE_DETECTION = False
+
+# Estimated Jaccard similarity of the name and description shingles above which an ad counts as a near copy
+ADS_NEAR_DUPLICATE_THRESHOLD = 0.8
+
+# Featured ads shown on the home feed at a time, minutes each rotation slot lasts and hours of slots the
+# schedule_featured_rotation command plans ahead
+ADS_FEATURED_SLOT_SIZE = 6
+
+ADS_FEATURED_SLOT_MINUTES = 15
+
+ADS_FEATURED_SCHEDULE_HOURS = 24
+
+# Similar ads precomputed per ad by build_similar_ads, and how many ads are compared against the catalogue at once
+ADS_SIMILAR_ADS_COUNT = 10
+
+ADS_SIMILAR_ADS_BATCH_SIZE = 500
+
+# Rows read per query while streaming the ads export
+ADS_EXPORT_CHUNK_SIZE = 2000
+
+# Rows validated and inserted together by the bulk ad import
+ADS_IMPORT_CHUNK_SIZE = 500
+
+# Statuses (denied and paused) of the ads the archive_ads job moves to the archive once they have not been updated
+# for ADS_ARCHIVE_AFTER_DAYS, ADS_ARCHIVE_BATCH_SIZE ads per transaction
+ADS_ARCHIVE_STATUSES = ["D", "PA"]
+
+ADS_ARCHIVE_AFTER_DAYS = 90
+
+ADS_ARCHIVE_BATCH_SIZE = 200
+
+# Hours a deleted ad is kept before reap_deleted_ads purges its rows and files, how many ads it purges per
+# transaction and how many storage deletes it runs at once
+ADS_SOFT_DELETE_GRACE_HOURS = 24
+
+ADS_REAPER_BATCH_SIZE = 100
+
+ADS_REAPER_STORAGE_WORKERS = 8
+
+# Bins of the per-category price histogram, percentiles reported with it and seconds its payload is cached; the
+# cached payload is dropped whenever the stats change
+ADS_PRICE_HISTOGRAM_BINS = 20
+
+ADS_PRICE_QUANTILES = [10, 25, 50, 75, 90]
+
+ADS_PRICE_STATS_CACHE_TIMEOUT = 60 * 60 * 24
+
 # JAZZMIN CONFIG
 JAZZMIN_SETTINGS = {
     "site_brand": "BANGLA ADMIN",
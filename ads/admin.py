@@ -2,15 +2,18 @@ from urllib.parse import urlencode
 
 from django.contrib import admin
 from django.contrib.admin import TabularInline
-from django.db.models import Count
 from django.urls import reverse
 from django.utils.html import format_html
 
-from ads.models import Ad, AdCategory, AdImage, AdSubCategory
+from ads.archive import restore_ads
+from ads.choices import MODERATION_APPROVE, MODERATION_DENY
+from ads.models import Ad, AdCategory, AdImage, AdSubCategory, ArchivedAd, ModerationLog
+from ads.moderation import moderate_ads
 
 
 # Register your models here.
 
+
 class AdImageAdmin(TabularInline):
     model = AdImage
     extra = 2
@@ -26,6 +29,17 @@ class AdAdmin(admin.ModelAdmin):
     list_per_page = 20
     ordering = ('name', 'category', 'ad_creator')
     search_fields = ('title', 'category__title')
+    actions = ('approve_ads', 'deny_ads')
+
+    @admin.action(description="Approve selected ads")
+    def approve_ads(self, request, queryset):
+        moderation_log = moderate_ads(queryset, MODERATION_APPROVE, moderator=request.user)
+        self.message_user(request, f"Approved {moderation_log.ads_count} ads.")
+
+    @admin.action(description="Deny selected ads")
+    def deny_ads(self, request, queryset):
+        moderation_log = moderate_ads(queryset, MODERATION_DENY, moderator=request.user)
+        self.message_user(request, f"Denied {moderation_log.ads_count} ads.")
 
 
 class AdSubCategoryAdmin(TabularInline):
@@ -55,9 +69,27 @@ class AdCategoryAdmin(admin.ModelAdmin):
     def sub_categories_count(self, obj: AdCategory):
         return obj.sub_categories_count
 
-    def get_queryset(self, request):
-        queryset = super().get_queryset(request).annotate(
-                ads_count=Count("ads"),
-                sub_categories_count=Count("sub_categories")
-        )
-        return queryset
+
+@admin.register(ModerationLog)
+class ModerationLogAdmin(admin.ModelAdmin):
+    list_display = ('action', 'ads_count', 'moderator', 'created')
+    list_filter = ('action',)
+    list_per_page = 20
+    readonly_fields = ('moderator', 'action', 'ad_ids', 'ads_count', 'note')
+
+
+@admin.register(ArchivedAd)
+class ArchivedAdAdmin(admin.ModelAdmin):
+    list_display = ('name', 'ad_creator', 'category', 'status', 'archived_at')
+    list_filter = ('status',)
+    list_per_page = 20
+    search_fields = ('name',)
+    readonly_fields = ('ad_creator', 'name', 'description', 'price', 'location', 'category', 'featured',
+                       'is_approved', 'status', 'featured_weight', 'view_count', 'images', 'favourites', 'created',
+                       'updated', 'archived_at')
+    actions = ('restore_ads',)
+
+    @admin.action(description="Restore selected ads")
+    def restore_ads(self, request, queryset):
+        self.message_user(request, f"Restored {restore_ads(queryset)} ads.")
+
@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+from ads import cards, favourites
+from ads.counters import increment_ad_counter
+from ads.models import Ad, AdCard, AdImage, ArchivedAd, FavouriteAd
+from common.uploads import remove_staged_file
+
+# Ad columns copied to the archive and back; counters and name_hash are derived again on restore
+ARCHIVED_FIELDS = (
+    "ad_creator_id", "name", "description", "price", "location", "category_id", "featured", "is_approved", "status",
+    "featured_weight", "view_count", "created", "updated",
+)
+
+
+def get_archivable_ads(days=None):
+    """Ads whose status is one of ADS_ARCHIVE_STATUSES and that were last updated more than `days` ago."""
+    if days is None:
+        days = settings.ADS_ARCHIVE_AFTER_DAYS
+    return Ad.objects.filter(
+            status__in=settings.ADS_ARCHIVE_STATUSES, updated__lt=timezone.now() - timedelta(days=days)
+    )
+
+
+def build_archived_ad(ad):
+    return ArchivedAd(
+            id=ad.id,
+            **{field: getattr(ad, field) for field in ARCHIVED_FIELDS},
+            images=[
+                {"id": str(image.id), "image": image.image.name, "variants": image.variants}
+                for image in ad.images.all() if image.image
+            ],
+            favourites=[
+                {"id": str(favourite.id), "customer_id": favourite.customer_id and str(favourite.customer_id)}
+                for favourite in ad.favourite_ads.all()
+            ],
+    )
+
+
+@transaction.atomic
+def archive_batch(ad_ids):
+    """
+    Copy a batch of ads with their images and favourites to the archive and delete them.
+
+    The delete goes through the ORM so the Ad, AdImage and FavouriteAd signals keep the category counters and the
+    cached favourites and home feed up to date. Image files stay in storage for a restore. Images still staged
+    never reached storage, so they are not archived and their staged files are removed once the batch commits.
+    """
+    ads = Ad.objects.filter(pk__in=ad_ids).prefetch_related("images", "favourite_ads")
+    ArchivedAd.objects.bulk_create(build_archived_ad(ad) for ad in ads)
+    staged_files = list(
+            AdImage.objects.filter(ad_id__in=ad_ids).exclude(staged_file="").values_list("staged_file", flat=True)
+    )
+    Ad.objects.filter(pk__in=ad_ids).delete()
+    transaction.on_commit(lambda: remove_staged_files(staged_files))
+
+
+def remove_staged_files(paths):
+    for path in paths:
+        remove_staged_file(path)
+
+
+def archive_ads(days=None, batch_size=None):
+    """Move every archivable ad to the archive, ADS_ARCHIVE_BATCH_SIZE ads per transaction, and return the count."""
+    if batch_size is None:
+        batch_size = settings.ADS_ARCHIVE_BATCH_SIZE
+    archivable = get_archivable_ads(days).order_by().values_list("pk", flat=True)
+    archived = 0
+    while True:
+        ad_ids = list(archivable[:batch_size])
+        if not ad_ids:
+            return archived
+        archive_batch(ad_ids)
+        archived += len(ad_ids)
+
+
+@transaction.atomic
+def restore_ad(archived_ad):
+    """Recreate an archived ad with its id, images and the favourites of customers that still exist."""
+    ad = Ad(id=archived_ad.id, **{field: getattr(archived_ad, field) for field in ARCHIVED_FIELDS})
+    # Saving runs the Ad signals, which rebuild the card, the search index and the category counter
+    ad.save()
+    # created is set on insert, so the original one is put back afterwards. updated is left at now, so a restored
+    # ad is not picked up again by the next archive run. The card is built without counters, so the restored view
+    # count is copied onto it; the favourite count follows the favourites below.
+    Ad.objects.filter(pk=ad.pk).update(created=archived_ad.created)
+    AdCard.objects.filter(ad_id=ad.pk).update(created=archived_ad.created, view_count=archived_ad.view_count)
+
+    AdImage.objects.bulk_create(
+            AdImage(id=image["id"], ad=ad, image=image["image"], variants=image["variants"])
+            for image in archived_ad.images
+    )
+    cards.refresh_ad_card_images(ad.pk)
+
+    customer_ids = {str(customer_id) for customer_id in get_user_model().objects.filter(
+            pk__in=[favourite["customer_id"] for favourite in archived_ad.favourites if favourite["customer_id"]]
+    ).values_list("pk", flat=True)}
+    restored_favourites = FavouriteAd.objects.bulk_create(
+            FavouriteAd(id=favourite["id"], ad=ad, customer_id=favourite["customer_id"])
+            for favourite in archived_ad.favourites if favourite["customer_id"] in customer_ids
+    )
+    if restored_favourites:
+        increment_ad_counter(ad.pk, "favourite_count", len(restored_favourites))
+    for favourite in restored_favourites:
+        favourites.invalidate_cached_favourites(favourite.customer_id)
+
+    archived_ad.delete()
+    return ad
+
+
+def restore_ads(queryset):
+    """Restore every archived ad of `queryset` and return how many were restored."""
+    restored = 0
+    for archived_ad in queryset.iterator():
+        restore_ad(archived_ad)
+        restored += 1
+    return restored
@@ -0,0 +1,41 @@
+from ads.models import AdCard, AdImage
+
+
+def get_card_fields(ad):
+    return {
+        "ad_creator_id": ad.ad_creator_id,
+        "name": ad.name,
+        "description": ad.description,
+        "price": ad.price,
+        "location": ad.location,
+        "location_name": ad.location.name or "",
+        "category_id": ad.category_id,
+        "category_title": ad.category.title if ad.category_id else "",
+        "featured": ad.featured,
+        "is_approved": ad.is_approved,
+        "status": ad.status,
+        "created": ad.created,
+        "updated": ad.updated,
+    }
+
+
+def get_card_images(ad_id):
+    images = [image for image in AdImage.objects.filter(ad_id=ad_id).order_by("created") if image.image]
+    return {
+        "images": [image.ad_image for image in images],
+        "images_srcset": [image.ad_image_srcset for image in images],
+    }
+
+
+def refresh_ad_card(ad):
+    """Create or rebuild the card of an ad."""
+    AdCard.objects.update_or_create(ad=ad, defaults={**get_card_fields(ad), **get_card_images(ad.id)})
+
+
+def refresh_ad_card_images(ad_id):
+    AdCard.objects.filter(ad_id=ad_id).update(**get_card_images(ad_id))
+
+
+def refresh_category_cards(category):
+    AdCard.objects.filter(category=category).update(category_title=category.title)
+
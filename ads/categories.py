@@ -0,0 +1,47 @@
+import json
+
+from django.core.cache import cache
+
+from ads.models import AdCategory
+from common.cache import bump_cache_version, get_cache_version
+from common.conditional import build_etag
+
+CATEGORY_TREE_CACHE_NAMESPACE = "ads:category_tree"
+
+
+def build_category_tree():
+    categories = AdCategory.objects.prefetch_related("sub_categories")
+    return [
+        {
+            "title": category.title,
+            "sub_category": [
+                {
+                    "title": sub_category.title
+                }
+                for sub_category in category.sub_categories.all()
+            ],
+            "image": category.image.url if category.image else None,
+        }
+        for category in categories
+    ]
+
+
+def get_category_tree():
+    """
+    Return the ETag and the snapshot of the category tree, building and caching it if it is not cached yet.
+
+    The snapshot lives as long as its version, which AdCategory and AdSubCategory signals bump on every change.
+    The ETag is hashed from the tree itself, so every worker hands out the same ETag for the same categories.
+    """
+    version = get_cache_version(CATEGORY_TREE_CACHE_NAMESPACE)
+    key = f"{CATEGORY_TREE_CACHE_NAMESPACE}:{version}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        tree = build_category_tree()
+        snapshot = (build_etag("categories", json.dumps(tree, sort_keys=True)), tree)
+        cache.set(key, snapshot, timeout=None)
+    return snapshot
+
+
+def invalidate_category_tree():
+    bump_cache_version(CATEGORY_TREE_CACHE_NAMESPACE)
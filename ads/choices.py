@@ -26,4 +26,20 @@ STATUS_CHOICES = (
     (STATUS_DENIED, "Denied"),
     (STATUS_PENDING, "Pending"),
     (STATUS_ACTIVE, "Active"),
-)
\ No newline at end of file
+)
+
+MODERATION_APPROVE = "approve"
+MODERATION_DENY = "deny"
+
+MODERATION_ACTION_CHOICES = (
+    (MODERATION_APPROVE, "Approve"),
+    (MODERATION_DENY, "Deny"),
+)
+
+FILE_FORMAT_NDJSON = "ndjson"
+FILE_FORMAT_CSV = "csv"
+
+FILE_FORMAT_CHOICES = (
+    (FILE_FORMAT_NDJSON, "NDJSON"),
+    (FILE_FORMAT_CSV, "CSV"),
+)
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from ads.models import Ad, AdCard, AdCategory, AdSubCategory
+
+
+@transaction.atomic
+def increment_ad_counters(ad_ids, field, amount=1):
+    """
+    Atomically add `amount` to a counter column of several ads and of their cards.
+
+    The arithmetic happens in the database, so concurrent increments never overwrite each other. Decrements never
+    take a counter below zero.
+    """
+    for model in (Ad, AdCard):
+        queryset = model.objects.filter(pk__in=ad_ids)
+        if amount < 0:
+            queryset = queryset.filter(**{f"{field}__gte": -amount})
+        queryset.update(**{field: F(field) + amount})
+
+
+def increment_ad_counter(ad_id, field, amount=1):
+    increment_ad_counters([ad_id], field, amount)
+
+
+def increment_category_counter(category_id, field, amount=1):
+    if category_id is None:
+        return
+    queryset = AdCategory.objects.filter(pk=category_id)
+    if amount < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -amount})
+    queryset.update(**{field: F(field) + amount})
+
+
+def count_related(model, field="category"):
+    """Number of `model` rows pointing at the outer category, as a subquery annotation."""
+    counts = model.objects.filter(**{field: OuterRef("pk")}).order_by().values(field).annotate(
+            count=Count("pk")
+    ).values("count")
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recount_categories(queryset=None):
+    """Recompute the ad and sub-category counters of categories from scratch and return how many changed."""
+    if queryset is None:
+        queryset = AdCategory.objects.all()
+    actual_ads, actual_sub_categories = count_related(Ad), count_related(AdSubCategory)
+    drifted = queryset.annotate(actual_ads=actual_ads, actual_sub_categories=actual_sub_categories).exclude(
+            ads_count=F("actual_ads"), sub_categories_count=F("actual_sub_categories")
+    )
+    return AdCategory.objects.filter(pk__in=drifted.values("pk")).update(
+            ads_count=count_related(Ad), sub_categories_count=count_related(AdSubCategory)
+    )
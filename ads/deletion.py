@@ -0,0 +1,91 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ads import prices
+from ads.counters import increment_category_counter
+from ads.feeds import invalidate_home_feed
+from ads.models import Ad, AdCard, AdImage, AdSearchDocument, AdSignature
+from common.images import get_variant_names
+from common.uploads import remove_staged_file
+
+logger = logging.getLogger(__name__)
+
+
+@transaction.atomic
+def soft_delete_ad(ad):
+    """
+    Mark an ad deleted and take it out of every listing, without touching its images or favourites.
+
+    Only the read models are removed here: the card, which cascades to the similar ads pointing at it, the search
+    document and the signature. The ad row, its images, favourites and stored files are purged by the reaper.
+    """
+    deleted_at = timezone.now()
+    updated = Ad.objects.filter(pk=ad.pk).update(deleted_at=deleted_at)
+    if not updated:
+        return
+    # A later save() of this instance must neither undo the delete nor bring back the read models
+    ad.deleted_at = deleted_at
+    AdCard.objects.filter(ad_id=ad.pk).delete()
+    AdSearchDocument.objects.filter(ad_id=ad.pk).delete()
+    AdSignature.objects.filter(ad_id=ad.pk).delete()
+    increment_category_counter(ad.category_id, "ads_count", -1)
+    prices.apply_price_change(prices.get_ad_price_entry(ad), None)
+    transaction.on_commit(invalidate_home_feed)
+
+
+def get_storage_names(image):
+    """The storage names of an ad image and of all its resized variants."""
+    return ([image.image.name] if image.image else []) + get_variant_names(image.variants)
+
+
+def delete_stored_files(storage, names):
+    """Delete files from a storage backend with at most ADS_REAPER_STORAGE_WORKERS requests in flight."""
+
+    def delete(name):
+        try:
+            storage.delete(name)
+        except Exception:
+            logger.exception("Could not delete %s from storage", name)
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=settings.ADS_REAPER_STORAGE_WORKERS,
+                            thread_name_prefix="ads-reaper") as pool:
+        return sum(pool.map(delete, names))
+
+
+def reap_batch(ad_ids):
+    """Hard-delete a batch of soft-deleted ads with their rows, then their files once the delete has committed."""
+    images = list(AdImage.objects.filter(ad_id__in=ad_ids))
+    names = [name for image in images for name in get_storage_names(image)]
+    with transaction.atomic():
+        Ad.all_objects.filter(pk__in=ad_ids).delete()
+    for image in images:
+        if image.staged_file:
+            remove_staged_file(image.staged_file)
+    return delete_stored_files(AdImage._meta.get_field("image").storage, names)
+
+
+def reap_deleted_ads(hours=None, batch_size=None):
+    """
+    Purge the ads soft-deleted more than `hours` ago, ADS_REAPER_BATCH_SIZE ads at a time.
+
+    Returns the number of ads and of stored files deleted.
+    """
+    if hours is None:
+        hours = settings.ADS_SOFT_DELETE_GRACE_HOURS
+    if batch_size is None:
+        batch_size = settings.ADS_REAPER_BATCH_SIZE
+    deleted_ads = Ad.all_objects.filter(deleted_at__lt=timezone.now() - timedelta(hours=hours)).order_by()
+    reaped_ads = deleted_files = 0
+    while True:
+        ad_ids = list(deleted_ads.values_list("pk", flat=True)[:batch_size])
+        if not ad_ids:
+            return reaped_ads, deleted_files
+        deleted_files += reap_batch(ad_ids)
+        reaped_ads += len(ad_ids)
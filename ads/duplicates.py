@@ -0,0 +1,97 @@
+import hashlib
+import random
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from ads.models import Ad, AdSignature, AdSignatureBand
+from ads.names import get_name_hash, normalize_name
+
+# MinHash/LSH parameters: BANDS * ROWS_PER_BAND permutations per signature. Two ads whose shingles have a
+# Jaccard similarity s share at least one band with probability 1 - (1 - s ** ROWS_PER_BAND) ** BANDS.
+SHINGLE_SIZE = 5
+BANDS = 8
+ROWS_PER_BAND = 4
+NUM_PERMUTATIONS = BANDS * ROWS_PER_BAND
+
+MERSENNE_PRIME = (1 << 61) - 1
+_permutation_seeds = random.Random(1729)
+PERMUTATIONS = [
+    (_permutation_seeds.randrange(1, MERSENNE_PRIME), _permutation_seeds.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+
+def find_duplicate_name(name, exclude=None):
+    """Whether another ad has the same normalized name, answered from the name_hash index."""
+    ads = Ad.objects.filter(name_hash=get_name_hash(name))
+    if exclude is not None:
+        ads = ads.exclude(pk=exclude.pk)
+    return ads.exists()
+
+
+def get_shingles(name, description):
+    text = normalize_name(f"{name} {description}")
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[position:position + SHINGLE_SIZE] for position in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def _hash_shingle(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+
+
+def get_signature(name, description):
+    """MinHash signature of the character shingles of an ad's name and description."""
+    hashes = [_hash_shingle(shingle) for shingle in get_shingles(name, description)]
+    return [min((a * value + b) % MERSENNE_PRIME for value in hashes) for a, b in PERMUTATIONS]
+
+
+def get_band_buckets(signature):
+    return [
+        hashlib.blake2b(repr(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]).encode(),
+                        digest_size=8).hexdigest()
+        for band in range(BANDS)
+    ]
+
+
+def estimate_similarity(signature, other_signature):
+    return sum(1 for value, other in zip(signature, other_signature) if value == other) / NUM_PERMUTATIONS
+
+
+@transaction.atomic
+def index_signature(ad):
+    """Store the MinHash signature of an ad and its LSH band buckets for near-duplicate lookups."""
+    signature = get_signature(ad.name, ad.description)
+    document, _ = AdSignature.objects.update_or_create(ad=ad, defaults={"signature": signature})
+    document.bands.all().delete()
+    AdSignatureBand.objects.bulk_create(
+            AdSignatureBand(signature=document, band=band, bucket=bucket)
+            for band, bucket in enumerate(get_band_buckets(signature))
+    )
+
+
+def find_near_duplicates(name, description, ad_creator=None, exclude=None, threshold=None):
+    """
+    Return the ids of ads whose name and description are near copies of the given ones.
+
+    Candidates are the ads sharing at least one LSH band bucket, found with one index probe per band; only those
+    whose estimated Jaccard similarity reaches ADS_NEAR_DUPLICATE_THRESHOLD are returned.
+    """
+    if threshold is None:
+        threshold = settings.ADS_NEAR_DUPLICATE_THRESHOLD
+    signature = get_signature(name, description)
+    band_filter = Q()
+    for band, bucket in enumerate(get_band_buckets(signature)):
+        band_filter |= Q(bands__band=band, bands__bucket=bucket)
+    candidates = AdSignature.objects.filter(band_filter)
+    if ad_creator is not None:
+        candidates = candidates.filter(ad__ad_creator=ad_creator)
+    if exclude is not None:
+        candidates = candidates.exclude(ad_id=exclude.pk)
+    return [
+        ad_id
+        for ad_id, candidate_signature in candidates.distinct().values_list("ad_id", "signature")
+        if estimate_similarity(signature, candidate_signature) >= threshold
+    ]
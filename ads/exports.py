@@ -0,0 +1,66 @@
+import csv
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from ads.choices import FILE_FORMAT_CSV, FILE_FORMAT_NDJSON, STATUS_ACTIVE
+from ads.models import AdCard
+from ads.pagination import KeysetPagination
+
+EXPORT_FIELDS = (
+    "ad_id", "name", "description", "price", "location", "location_name", "category_id", "category_title",
+    "images", "featured", "created", "updated",
+)
+
+EXPORT_ORDERING = ("-created", "-pk")
+
+
+def iterate_live_ads(chunk_size=None):
+    """
+    Yield every live ad card as a dict of EXPORT_FIELDS, newest first.
+
+    The table is read in keyset chunks of `chunk_size` rows, each streamed with iterator(), so memory stays
+    constant whatever the catalogue size, including on MySQL where a single iterator() buffers the whole result.
+    """
+    if chunk_size is None:
+        chunk_size = settings.ADS_EXPORT_CHUNK_SIZE
+    keyset = KeysetPagination(ordering=EXPORT_ORDERING)
+    queryset = AdCard.objects.filter(is_approved=True, status=STATUS_ACTIVE).order_by(*EXPORT_ORDERING)
+    last_values = None
+    while True:
+        chunk = queryset if last_values is None else queryset.filter(keyset.get_seek_filter(last_values))
+        row = None
+        for row in chunk.values(*EXPORT_FIELDS, "pk")[:chunk_size].iterator(chunk_size=chunk_size):
+            yield {field: row[field] for field in EXPORT_FIELDS}
+        if row is None:
+            return
+        last_values = [row["created"], row["pk"]]
+
+
+def render_ndjson(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(row) + "\n"
+
+
+class _Echo:
+    """A file-like object whose write() hands the line back, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(
+                json.dumps(row[field]) if field == "images" else row[field] for field in EXPORT_FIELDS
+        )
+
+
+EXPORT_FORMATS = {
+    FILE_FORMAT_NDJSON: ("application/x-ndjson", render_ndjson),
+    FILE_FORMAT_CSV: ("text/csv", render_csv),
+}
@@ -0,0 +1,105 @@
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db.models import Case, Count, IntegerField, Value, When
+from django_countries import countries
+
+from ads.choices import STATUS_CHOICES
+from ads.models import Ad
+
+MAX_PRICE_BUCKETS = 20
+
+
+def fits_price_field(price):
+    """Whether `price` can be stored in Ad.price, so it also renders as a finite JSON number."""
+    field = Ad._meta.get_field("price")
+    return (
+            price.is_finite()
+            and abs(price) < Decimal(10) ** (field.max_digits - field.decimal_places)
+            and -price.as_tuple().exponent <= field.decimal_places
+    )
+
+
+def parse_price_buckets(value):
+    """
+    Turn a comma separated list of prices such as "100,1000" into sorted bucket boundaries starting at 0.
+
+    Falls back to ADS_SEARCH_PRICE_BUCKETS when the value is missing or invalid, including boundaries that would not
+    fit in Ad.price.
+    """
+    boundaries = [Decimal(boundary) for boundary in settings.ADS_SEARCH_PRICE_BUCKETS]
+    if value:
+        try:
+            requested = [Decimal(boundary) for boundary in value.split(",") if boundary.strip()]
+        except InvalidOperation:
+            requested = []
+        if requested and len(requested) <= MAX_PRICE_BUCKETS and all(fits_price_field(price) for price in requested):
+            boundaries = requested
+    return sorted({Decimal(0), *(boundary for boundary in boundaries if boundary > 0)})
+
+
+def price_band_expression(boundaries):
+    whens = [
+        When(price__lt=upper, then=Value(position))
+        for position, upper in enumerate(boundaries[1:])
+    ]
+    return Case(*whens, default=Value(len(boundaries) - 1), output_field=IntegerField())
+
+
+def get_facets(queryset, boundaries):
+    """
+    Count the ads of `queryset` per category, country, status, featured flag and price band.
+
+    Every facet is rolled up from a single GROUP BY over the combination of the faceted columns, so the cost is
+    one query whatever the number of facets.
+    """
+    rows = queryset.order_by().values(
+            "category_id", "category__title", "location", "status", "featured",
+            price_band=price_band_expression(boundaries),
+    ).annotate(count=Count("id"))
+
+    categories, category_titles = Counter(), {}
+    locations, statuses, featured, price_bands = Counter(), Counter(), Counter(), Counter()
+    for row in rows:
+        count = row["count"]
+        categories[row["category_id"]] += count
+        category_titles[row["category_id"]] = row["category__title"]
+        locations[row["location"]] += count
+        statuses[row["status"]] += count
+        featured[row["featured"]] += count
+        price_bands[row["price_band"]] += count
+
+    status_labels = dict(STATUS_CHOICES)
+    upper_boundaries = boundaries[1:] + [None]
+    return {
+        "category": [
+            {"id": category_id, "title": category_titles[category_id], "count": count}
+            for category_id, count in categories.most_common()
+        ],
+        "location": [
+            {"code": code, "name": countries.name(code), "count": count}
+            for code, count in locations.most_common()
+        ],
+        "status": [
+            {"status": ad_status, "name": status_labels.get(ad_status), "count": count}
+            for ad_status, count in statuses.most_common()
+        ],
+        "featured": [
+            {"featured": is_featured, "count": count}
+            for is_featured, count in featured.most_common()
+        ],
+        "price": [
+            {"min": lower, "max": upper, "count": price_bands[position]}
+            for position, (lower, upper) in enumerate(zip(boundaries, upper_boundaries))
+        ],
+    }
+
+
+def get_status_counts(queryset):
+    """Count the ads of `queryset` per status, keyed by lower-cased status name, with one GROUP BY."""
+    counts = dict(queryset.order_by().values_list("status").annotate(count=Count("pk")))
+    status_counts = {name.lower(): counts.get(ad_status, 0) for ad_status, name in STATUS_CHOICES}
+    status_counts["total"] = sum(counts.values())
+    return status_counts
+
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from ads.models import FavouriteAd
+
+
+def _cache_key(user_id):
+    return f"ads:favourites:{user_id}"
+
+
+def get_favourite_ad_ids(user):
+    """Return the ids, as strings, of the ads a user has favourited, from the cache when possible."""
+    if not user.is_authenticated:
+        return set()
+    key = _cache_key(user.id)
+    favourite_ad_ids = cache.get(key)
+    if favourite_ad_ids is None:
+        favourite_ad_ids = {
+            str(ad_id) for ad_id in FavouriteAd.objects.filter(customer=user).values_list("ad_id", flat=True)
+        }
+        cache.set(key, favourite_ad_ids, settings.ADS_FAVOURITES_CACHE_TIMEOUT)
+    return favourite_ad_ids
+
+
+def invalidate_cached_favourites(user_id):
+    """
+    Drop the cached favourites of a user once the current transaction commits; the next read rebuilds them.
+
+    The set is dropped rather than patched in place, since two concurrent get/modify/set rounds would lose one of
+    the changes.
+    """
+    key = _cache_key(user_id)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def mark_favourites(ads, favourite_ad_ids):
+    """Return copies of serialized ads with their is_favourited flag set."""
+    return [{**ad, "is_favourited": str(ad["id"]) in favourite_ad_ids} for ad in ads]
@@ -0,0 +1,101 @@
+from uuid import UUID
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from ads.choices import STATUS_ACTIVE
+from ads.models import AdCard, AdCategory
+from ads.rotation import get_current_slot_ad_ids, get_slot_number
+from ads.serializers import AdCardSerializer, AdCategorySerializer
+from common.cache import bump_cache_version, versioned_cache_key
+
+HOME_FEED_CACHE_NAMESPACE = "ads:home_feed"
+
+
+def live_ad_cards():
+    return AdCard.objects.filter(is_approved=True, status=STATUS_ACTIVE)
+
+
+def top_ad_ids_per_category(limit):
+    """
+    Return the ids of the newest `limit` live ads of every category in a single windowed query.
+
+    Django cannot filter on a window expression yet, so the ranked queryset is wrapped in an outer SELECT.
+    """
+    ranked = live_ad_cards().order_by().annotate(
+            category_position=Window(
+                    expression=RowNumber(),
+                    partition_by=[F("category_id")],
+                    order_by=[F("created").desc(), F("ad_id").desc()],
+            )
+    ).values("ad_id", "category_position")
+    sql, params = ranked.query.sql_with_params()
+    position = connection.ops.quote_name("category_position")
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT ad_id FROM ({sql}) ranked_ads WHERE {position} <= %s", (*params, limit))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def get_featured_ads():
+    """
+    The featured ads of the current rotation window, in slot order.
+
+    Without a schedule covering the window, the newest featured ads fill the block instead, so its size stays
+    ADS_FEATURED_SLOT_SIZE whatever the featured inventory.
+    """
+    featured_ads = live_ad_cards().filter(featured=True)
+    slot_ad_ids = get_current_slot_ad_ids()
+    if slot_ad_ids is None:
+        return list(featured_ads[:settings.ADS_FEATURED_SLOT_SIZE])
+    ads = featured_ads.in_bulk(slot_ad_ids)
+    return [ads[ad_id] for ad_id in map(UUID, slot_ad_ids) if ad_id in ads]
+
+
+def build_home_feed(ads_per_category):
+    categories = list(AdCategory.objects.all())
+    ads_count_by_category = dict(
+            live_ad_cards().order_by().values_list("category").annotate(num_ads=Count("ad_id"))
+    )
+    top_ads = live_ad_cards().filter(ad_id__in=top_ad_ids_per_category(ads_per_category))
+    ads_by_category = {}
+    for ad in top_ads:
+        ads_by_category.setdefault(ad.category_id, []).append(ad)
+
+    featured_ads = get_featured_ads()
+
+    return {
+        "ad_categories": AdCategorySerializer(categories, many=True).data,
+        "featured_ads": {
+            "ads": AdCardSerializer(featured_ads, many=True).data,
+            "count_featured_ads": live_ad_cards().filter(featured=True).count(),
+        },
+        "all_ads_by_category": [
+            {
+                "category": category.id,
+                "title": category.title,
+                "num_ads": ads_count_by_category.get(category.id, 0),
+                "ads": AdCardSerializer(ads_by_category.get(category.id, []), many=True).data,
+            }
+            for category in categories
+        ],
+    }
+
+
+def get_home_feed(ads_per_category=None):
+    """Return the home feed snapshot for `ads_per_category`, building and caching it if it is not cached yet."""
+    if ads_per_category is None:
+        ads_per_category = settings.ADS_HOME_FEED_ADS_PER_CATEGORY
+    # The featured block changes with every rotation window, so each window gets its own snapshot
+    key = versioned_cache_key(HOME_FEED_CACHE_NAMESPACE, ads_per_category, get_slot_number())
+    feed = cache.get(key)
+    if feed is None:
+        feed = build_home_feed(ads_per_category)
+        cache.set(key, feed, settings.ADS_HOME_FEED_CACHE_TIMEOUT)
+    return feed
+
+
+def invalidate_home_feed():
+    bump_cache_version(HOME_FEED_CACHE_NAMESPACE)
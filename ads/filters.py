@@ -1,6 +1,75 @@
+from functools import lru_cache
+
+from django.db.models import Case, IntegerField, When
+from django.utils.translation import get_language
+from django_countries import countries
 from django_filters import filters
 from django_filters.rest_framework import FilterSet
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from ads import search
+
+
+@lru_cache(maxsize=None)
+def get_country_lookup(language):
+    """Map the casefolded alpha-2 code, alpha-3 code and name of every country to its alpha-2 code."""
+    lookup = {}
+    for code, name in countries:
+        lookup[name.casefold()] = code
+        lookup[countries.alpha3(code).casefold()] = code
+        lookup[code.casefold()] = code
+    return lookup
+
+
+def resolve_countries(value):
+    """Turn a comma separated list of country codes or names into the alpha-2 codes stored on ads."""
+    lookup = get_country_lookup(get_language())
+    codes = (lookup.get(part.strip().casefold()) for part in value.split(","))
+    return list(dict.fromkeys(code for code in codes if code))
 
 
 class AdFilter(FilterSet):
-    location = filters.CharFilter(lookup_expr='icontains')
+    location = filters.CharFilter(method='filter_location',
+                                  help_text="Comma separated country codes or names, e.g. BD,Nigeria")
+    category = filters.UUIDFilter(field_name='category_id')
+    featured = filters.BooleanFilter()
+    min_price = filters.NumberFilter(field_name='price', lookup_expr='gte')
+    max_price = filters.NumberFilter(field_name='price', lookup_expr='lte')
+
+    @staticmethod
+    def filter_location(queryset, name, value):
+        # Exact matches on the stored codes, so the location indexes can be used; unknown countries match nothing
+        codes = resolve_countries(value)
+        if len(codes) == 1:
+            return queryset.filter(location=codes[0])
+        return queryset.filter(location__in=codes)
+
+
+class AdSearchIndexFilter(BaseFilterBackend):
+    """Full-text search over the ad search index, ordering the results by relevance."""
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "").strip()
+        if not query:
+            return queryset
+        ad_ids = search.search(query)
+        if not ad_ids:
+            return queryset.none()
+        relevance = Case(
+                *[When(id=ad_id, then=position) for position, ad_id in enumerate(ad_ids)],
+                output_field=IntegerField(),
+        )
+        return queryset.filter(id__in=ad_ids).order_by(relevance)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.search_param,
+                "required": False,
+                "in": "query",
+                "description": "A search term.",
+                "schema": {"type": "string"},
+            },
+        ]
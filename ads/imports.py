@@ -0,0 +1,188 @@
+import codecs
+import csv
+import json
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from ads import cards, duplicates
+from ads.choices import FILE_FORMAT_CSV, FILE_FORMAT_NDJSON
+from ads.counters import increment_category_counter
+from ads.feeds import invalidate_home_feed
+from ads.models import Ad, AdCard, AdCategory
+from ads.names import get_name_hash
+from ads.serializers import ImportAdRowSerializer
+
+
+class UnreadableFileError(Exception):
+    """An import file that cannot be read past `row_number`, because it is not UTF-8 or not well-formed CSV."""
+
+    def __init__(self, row_number, message):
+        super().__init__(message)
+        self.row_number = row_number
+
+
+def parse_ndjson(binary_lines):
+    """
+    Yield the row number and the decoded object of every non-blank line.
+
+    Lines are decoded one by one, so a line that is not valid UTF-8 or JSON only rejects that row.
+    """
+    for row_number, line in enumerate(binary_lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError:
+            yield row_number, None
+
+
+def parse_csv(binary_lines):
+    rows = enumerate(csv.DictReader(codecs.iterdecode(binary_lines, "utf-8-sig")), start=1)
+    row_number = 0
+    while True:
+        try:
+            row_number, row = next(rows)
+        except StopIteration:
+            return
+        except UnicodeDecodeError:
+            raise UnreadableFileError(row_number + 1, "The file is not valid UTF-8 from this row on.")
+        except csv.Error as error:
+            raise UnreadableFileError(row_number + 1, f"The file is not valid CSV from this row on: {error}")
+        yield row_number, row
+
+
+IMPORT_FORMATS = {
+    FILE_FORMAT_NDJSON: parse_ndjson,
+    FILE_FORMAT_CSV: parse_csv,
+}
+
+
+def read_rows(binary_lines, file_format):
+    """
+    Parse the rows of an uploaded file or any iterable of byte lines without reading it whole.
+
+    Raises UnreadableFileError from the row at which the file cannot be read any further.
+    """
+    return IMPORT_FORMATS[file_format](binary_lines)
+
+
+def get_category_map():
+    """Every category by its id and by its case-folded title, loaded with a single query."""
+    category_map = {}
+    for category in AdCategory.objects.all():
+        category_map[str(category.id)] = category
+        category_map[category.title.casefold()] = category
+    return category_map
+
+
+class AdImporter:
+    """
+    Create the ads of an import for one seller, `chunk_size` rows at a time.
+
+    Each chunk is validated in memory, checked for duplicate names with one name_hash lookup and inserted with
+    bulk_create along with the cards. bulk_create sends no signals, so the side effects of Ad.save() and the Ad
+    signals that matter for new, pending ads are applied here per chunk instead.
+    """
+
+    def __init__(self, ad_creator, chunk_size=None):
+        self.ad_creator = ad_creator
+        self.chunk_size = chunk_size or settings.ADS_IMPORT_CHUNK_SIZE
+        self.category_map = get_category_map()
+        self.seen_name_hashes = set()
+        self.threshold = settings.ADS_NEAR_DUPLICATE_THRESHOLD
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, row_number, errors):
+        self.errors.append({"row": row_number, "errors": errors})
+
+    def build_ad(self, row_number, data):
+        if not isinstance(data, dict):
+            self.add_error(row_number, {"row": ["Each row must be a JSON object."]})
+            return None
+        serializer = ImportAdRowSerializer(data=data)
+        if not serializer.is_valid():
+            self.add_error(row_number, serializer.errors)
+            return None
+        validated_data = serializer.validated_data
+        category = self.category_map.get(validated_data.pop("category").strip().casefold())
+        if category is None:
+            self.add_error(row_number, {"category": ["Category does not exist."]})
+            return None
+        return Ad(ad_creator=self.ad_creator, category=category,
+                  name_hash=get_name_hash(validated_data["name"]), **validated_data)
+
+    def is_near_duplicate_in_chunk(self, signature, buckets, chunk_buckets):
+        """Whether an ad is a near copy of an ad accepted earlier in the chunk, which is not indexed yet."""
+        return any(
+            duplicates.estimate_similarity(signature, other_signature) >= self.threshold
+            for band, bucket in enumerate(buckets) for other_signature in chunk_buckets[band, bucket]
+        )
+
+    def filter_duplicates(self, rows):
+        existing = set(Ad.objects.filter(
+                name_hash__in={ad.name_hash for _, ad in rows}
+        ).values_list("name_hash", flat=True))
+        chunk_buckets = defaultdict(list)
+        unique = []
+        for row_number, ad in rows:
+            if ad.name_hash in existing or ad.name_hash in self.seen_name_hashes:
+                self.add_error(row_number, {"name": ["An ad with this name already exists."]})
+                continue
+            if settings.ADS_NEAR_DUPLICATE_DETECTION:
+                # Earlier chunks are indexed already, so only this chunk's own ads are compared in memory
+                signature = duplicates.get_signature(ad.name, ad.description)
+                buckets = duplicates.get_band_buckets(signature)
+                if self.is_near_duplicate_in_chunk(signature, buckets, chunk_buckets) or \
+                        duplicates.find_near_duplicates(ad.name, ad.description, ad_creator=self.ad_creator):
+                    self.add_error(row_number, {"name": ["You already posted a very similar ad."]})
+                    continue
+                for band, bucket in enumerate(buckets):
+                    chunk_buckets[band, bucket].append(signature)
+            self.seen_name_hashes.add(ad.name_hash)
+            unique.append(ad)
+        return unique
+
+    @transaction.atomic
+    def insert(self, ads):
+        Ad.objects.bulk_create(ads)
+        AdCard.objects.bulk_create(
+                AdCard(ad=ad, images=[], images_srcset=[], **cards.get_card_fields(ad)) for ad in ads
+        )
+        if settings.ADS_NEAR_DUPLICATE_DETECTION:
+            for ad in ads:
+                duplicates.index_signature(ad)
+        # New ads are pending, so they are not indexed for search until they are approved
+        for category_id, count in Counter(ad.category_id for ad in ads).items():
+            increment_category_counter(category_id, "ads_count", count)
+
+    def import_chunk(self, rows):
+        built = [(row_number, self.build_ad(row_number, data)) for row_number, data in rows]
+        ads = self.filter_duplicates([(row_number, ad) for row_number, ad in built if ad is not None])
+        if ads:
+            self.insert(ads)
+            self.created += len(ads)
+
+    def run(self, rows):
+        """Import `rows` of (row number, data) and return the number of ads created and the rejected rows."""
+        chunk = []
+        try:
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_size:
+                    self.import_chunk(chunk)
+                    chunk = []
+        except UnreadableFileError as error:
+            # The rows read so far are still imported
+            self.add_error(error.row_number, {"file": [str(error)]})
+        if chunk:
+            self.import_chunk(chunk)
+        if self.created:
+            invalidate_home_feed()
+        return {"created": self.created, "errors": sorted(self.errors, key=lambda error: error["row"])}
+
+
+def import_ads(binary_lines, file_format, ad_creator, chunk_size=None):
+    return AdImporter(ad_creator, chunk_size=chunk_size).run(read_rows(binary_lines, file_format))
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ads.archive import archive_ads, get_archivable_ads, restore_ads
+from ads.models import ArchivedAd
+
+
+class Command(BaseCommand):
+    help = ('Moves denied and paused ads that have not been updated for a while, with their images and favourites, '
+            'to the archive, or restores archived ads.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.ADS_ARCHIVE_AFTER_DAYS,
+                            help='Archive ads last updated more than this many days ago.')
+        parser.add_argument('--batch-size', type=int, default=settings.ADS_ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only count the ads that would be archived.')
+        parser.add_argument('--restore', nargs='+', metavar='AD_ID', help='Ids of archived ads to restore.')
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            restored = restore_ads(ArchivedAd.objects.filter(pk__in=options['restore']))
+            self.stdout.write(self.style.SUCCESS(f'Restored {restored} ads.'))
+            return
+        if options['dry_run']:
+            self.stdout.write(f'{get_archivable_ads(options["days"]).count()} ads would be archived.')
+            return
+        archived = archive_ads(days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} ads.'))
@@ -0,0 +1,71 @@
+import time
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.test import RequestFactory
+
+from ads.counters import recount_categories
+from ads.models import Ad, AdCategory, AdSubCategory
+
+
+class Command(BaseCommand):
+    help = ('Times the AdCategory admin changelist query against growing numbers of synthetic ads. '
+            'Everything is created inside a transaction that is rolled back at the end.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ads', type=int, nargs='+', default=[1000, 10000, 100000])
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--sub-categories', type=int, default=10, help='Sub-categories per category.')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--compare', action='store_true',
+                            help='Also time counting ads and sub-categories with joins at query time.')
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get('/admin/ads/adcategory/')
+        request.user = get_user_model()(is_staff=True, is_superuser=True)
+        model_admin = admin.site._registry[AdCategory]
+
+        with transaction.atomic():
+            categories = AdCategory.objects.bulk_create(
+                    AdCategory(title=f'Benchmark category {number}') for number in range(options['categories'])
+            )
+            AdSubCategory.objects.bulk_create(
+                    AdSubCategory(category=category, title=f'Benchmark sub-category {number}')
+                    for category in categories for number in range(options['sub_categories'])
+            )
+            created = 0
+            for total in sorted(options['ads']):
+                Ad.objects.bulk_create(
+                        (
+                            Ad(name=f'Benchmark ad {number}', description='Benchmark', price=1,
+                               category=categories[number % len(categories)])
+                            for number in range(created, total)
+                        ),
+                        batch_size=5000,
+                )
+                created = total
+                # bulk_create sends no signals, so bring the maintained counters up to date before timing
+                recount_categories()
+                changelist = self.time(lambda: list(model_admin.get_queryset(request)[:model_admin.list_per_page]),
+                                       options['repeat'])
+                line = f'{total:>9} ads: changelist {changelist * 1000:8.1f} ms'
+                if options['compare']:
+                    joined = self.time(lambda: list(AdCategory.objects.annotate(
+                            joined_ads_count=Count('ads'), joined_sub_categories_count=Count('sub_categories')
+                    ).order_by('title')[:model_admin.list_per_page]), options['repeat'])
+                    line += f', joined counts {joined * 1000:8.1f} ms'
+                self.stdout.write(line)
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def time(query, repeat):
+        """Best wall time of `repeat` runs, in seconds."""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            query()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ads.similarity import build_similar_ads
+
+
+class Command(BaseCommand):
+    help = 'Precomputes the similar ads shown on ad detail pages from TF-IDF vectors of the live ads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only compute neighbours for ads that have none yet and the ads close to them.')
+
+    def handle(self, *args, **options):
+        refreshed = build_similar_ads(incremental=options['incremental'])
+        self.stdout.write(self.style.SUCCESS(f'Stored similar ads of {refreshed} ads.'))
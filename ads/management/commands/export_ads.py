@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ads.exports import EXPORT_FORMATS, iterate_live_ads
+
+
+class Command(BaseCommand):
+    help = 'Streams every live ad as NDJSON or CSV to a file or stdout for partner feeds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--file', help='Path to write the export to, stdout by default.')
+        parser.add_argument('--chunk-size', type=int, default=settings.ADS_EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        _, render = EXPORT_FORMATS[options['output']]
+        lines = render(iterate_live_ads(chunk_size=options['chunk_size']))
+        if not options['file']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['file'], 'w', encoding='utf-8', newline='') as export_file:
+            export_file.writelines(lines)
+        self.stdout.write(self.style.SUCCESS(f'Exported live ads to {options["file"]}.'))
@@ -0,0 +1,35 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from ads.imports import IMPORT_FORMATS, import_ads
+
+
+class Command(BaseCommand):
+    help = 'Creates ads for a seller from an NDJSON or CSV file, reporting the rows that could not be imported.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON or CSV file with one ad per row.')
+        parser.add_argument('--seller', required=True, help='Email of the user the ads are created for.')
+        parser.add_argument('--file-format', choices=list(IMPORT_FORMATS),
+                            help='Format of the file, guessed from its extension by default.')
+        parser.add_argument('--chunk-size', type=int, default=settings.ADS_IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            seller = get_user_model().objects.get(email=options['seller'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f'No user with email {options["seller"]}.')
+        file_format = options['file_format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError('Could not guess the file format, pass --file-format.')
+
+        with open(options['path'], 'rb') as import_file:
+            result = import_ads(import_file, file_format, seller, chunk_size=options['chunk_size'])
+        for error in result['errors']:
+            self.stderr.write(f'Row {error["row"]}: {error["errors"]}')
+        self.stdout.write(self.style.SUCCESS(
+                f'Imported {result["created"]} ads, skipped {len(result["errors"])} rows.'
+        ))
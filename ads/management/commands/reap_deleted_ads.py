@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ads.deletion import reap_deleted_ads
+
+
+class Command(BaseCommand):
+    help = 'Purges the rows and stored image files of ads deleted by their sellers, in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.ADS_SOFT_DELETE_GRACE_HOURS,
+                            help='Only purge ads deleted more than this many hours ago.')
+        parser.add_argument('--batch-size', type=int, default=settings.ADS_REAPER_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        reaped_ads, deleted_files = reap_deleted_ads(hours=options['hours'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Purged {reaped_ads} deleted ads and {deleted_files} stored files.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from ads import search
+from ads.choices import STATUS_ACTIVE
+from ads.models import Ad, AdSearchDocument
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the ad search index from scratch.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        AdSearchDocument.objects.all().delete()
+        ads = Ad.objects.select_related('category').filter(is_approved=True, status=STATUS_ACTIVE).order_by()
+        indexed = 0
+        for ad in ads.iterator(chunk_size=options['chunk_size']):
+            search.index_ad(ad)
+            indexed += 1
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} ads.'))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from ads import duplicates
+from ads.models import Ad, AdSignature
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the MinHash signatures used to detect near-duplicate ads.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        AdSignature.objects.all().delete()
+        indexed = 0
+        for ad in Ad.objects.order_by().only('pk', 'name', 'description').iterator(chunk_size=options['chunk_size']):
+            duplicates.index_signature(ad)
+            indexed += 1
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} ads.'))
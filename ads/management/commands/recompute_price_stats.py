@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from ads.prices import recompute_price_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the price range, percentiles and histogram of the live ads of every category.'
+
+    def handle(self, *args, **options):
+        computed = recompute_price_stats()
+        self.stdout.write(self.style.SUCCESS(f'Recomputed the price stats of {computed} categories.'))
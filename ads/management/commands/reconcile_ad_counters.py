@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from ads.counters import recount_categories
+from ads.models import Ad, AdCard, FavouriteAd
+
+
+class Command(BaseCommand):
+    help = ('Repairs ad favourite counters that drifted from the FavouriteAd table, syncs the ad cards and '
+            'recounts the ads and sub-categories of each category.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        actual_favourites = FavouriteAd.objects.filter(ad=OuterRef('pk')).order_by().values('ad').annotate(
+                total=Count('pk')
+        ).values('total')
+        drifted_ads = Ad.objects.order_by().annotate(
+                actual_favourite_count=Coalesce(Subquery(actual_favourites, output_field=IntegerField()), 0)
+        ).exclude(favourite_count=F('actual_favourite_count'))
+
+        repaired = []
+        for ad in drifted_ads.only('pk', 'favourite_count').iterator(chunk_size=batch_size):
+            ad.favourite_count = ad.actual_favourite_count
+            repaired.append(ad)
+        Ad.objects.bulk_update(repaired, ['favourite_count'], batch_size=batch_size)
+
+        ad_counters = Ad.objects.filter(pk=OuterRef('pk'))
+        stale_cards = AdCard.objects.annotate(
+                ad_favourite_count=Subquery(ad_counters.values('favourite_count')),
+                ad_view_count=Subquery(ad_counters.values('view_count')),
+        ).filter(~Q(favourite_count=F('ad_favourite_count')) | ~Q(view_count=F('ad_view_count')))
+        synced = []
+        for card in stale_cards.only('pk', 'favourite_count', 'view_count').iterator(chunk_size=batch_size):
+            card.favourite_count = card.ad_favourite_count
+            card.view_count = card.ad_view_count
+            synced.append(card)
+        AdCard.objects.bulk_update(synced, ['favourite_count', 'view_count'], batch_size=batch_size)
+
+        recounted = recount_categories()
+
+        self.stdout.write(self.style.SUCCESS(
+                f'Repaired {len(repaired)} ad counters, synced {len(synced)} ad cards '
+                f'and recounted {recounted} categories.'
+        ))
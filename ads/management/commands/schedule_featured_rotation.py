@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from ads.feeds import invalidate_home_feed
+from ads.rotation import schedule_featured_rotation
+
+
+class Command(BaseCommand):
+    help = ('Precomputes which featured ads the home feed shows in each rotation window. '
+            'Run it periodically, more often than ADS_FEATURED_SCHEDULE_HOURS, so the schedule never runs out.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=None, help='Hours of windows to plan ahead.')
+
+    def handle(self, *args, **options):
+        slots = schedule_featured_rotation(options['hours'])
+        invalidate_home_feed()
+        self.stdout.write(self.style.SUCCESS(f'Scheduled {slots} featured rotation slots.'))
@@ -0,0 +1,90 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0017_alter_adcategory_image"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdSearchDocument",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+                (
+                    "length",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Weighted number of terms indexed for the ad.",
+                    ),
+                ),
+                (
+                    "ad",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_document",
+                        to="ads.ad",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created",),
+                "abstract": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="AdSearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+                ("term", models.CharField(max_length=64)),
+                (
+                    "frequency",
+                    models.PositiveIntegerField(
+                        help_text="Weighted number of times the term occurs in the ad."
+                    ),
+                ),
+                (
+                    "document",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="terms",
+                        to="ads.adsearchdocument",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="adsearchterm",
+            index=models.Index(fields=["term"], name="ads_search_term_idx"),
+        ),
+        migrations.AlterUniqueTogether(
+            name="adsearchterm",
+            unique_together={("document", "term")},
+        ),
+    ]
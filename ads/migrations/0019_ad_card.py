@@ -0,0 +1,115 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django_countries.fields
+from django_countries import countries
+
+
+def create_ad_cards(apps, schema_editor):
+    Ad = apps.get_model("ads", "Ad")
+    AdCard = apps.get_model("ads", "AdCard")
+    AdImage = apps.get_model("ads", "AdImage")
+
+    image_urls = {}
+    for ad_image in AdImage.objects.order_by("created").iterator():
+        if ad_image.image:
+            image_urls.setdefault(ad_image.ad_id, []).append(ad_image.image.url)
+
+    ad_cards = (
+        AdCard(
+            ad_id=ad.id,
+            ad_creator_id=ad.ad_creator_id,
+            name=ad.name,
+            description=ad.description,
+            price=ad.price,
+            location=ad.location,
+            location_name=countries.name(ad.location) or "",
+            category_id=ad.category_id,
+            category_title=ad.category.title if ad.category_id else "",
+            images=image_urls.get(ad.id, []),
+            featured=ad.featured,
+            is_approved=ad.is_approved,
+            status=ad.status,
+            created=ad.created,
+            updated=ad.updated,
+        )
+        for ad in Ad.objects.select_related("category").iterator()
+    )
+    AdCard.objects.bulk_create(ad_cards, batch_size=500)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("ads", "0018_ad_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdCard",
+            fields=[
+                (
+                    "ad",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="card",
+                        serialize=False,
+                        to="ads.ad",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("description", models.TextField()),
+                ("price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("location", django_countries.fields.CountryField(max_length=2)),
+                ("location_name", models.CharField(blank=True, max_length=255)),
+                ("category_title", models.CharField(blank=True, max_length=255)),
+                (
+                    "images",
+                    models.JSONField(default=list, help_text="URLs of the ad images."),
+                ),
+                ("featured", models.BooleanField(default=False)),
+                ("is_approved", models.BooleanField(default=False)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PA", "Paused"),
+                            ("D", "Denied"),
+                            ("P", "Pending"),
+                            ("A", "Active"),
+                        ],
+                        default="P",
+                        max_length=2,
+                        null=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(help_text="When the ad was created.")),
+                ("updated", models.DateTimeField(null=True)),
+                (
+                    "ad_creator",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="ads.adcategory",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created",),
+            },
+        ),
+        migrations.RunPython(create_ad_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:16
+
+from django.db import migrations, models
+
+
+def backfill_images_srcset(apps, schema_editor):
+    # Existing images have no variants yet, so each srcset only holds the original, which keeps it in line with
+    # the images list until build_image_variants has run
+    AdCard = apps.get_model("ads", "AdCard")
+    for card in AdCard.objects.only("images").iterator(chunk_size=500):
+        if card.images:
+            AdCard.objects.filter(pk=card.pk).update(images_srcset=[{"original": url} for url in card.images])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0019_ad_card"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="adcard",
+            name="images_srcset",
+            field=models.JSONField(
+                default=list, help_text="URLs of the resized copies of the ad images."
+            ),
+        ),
+        migrations.AddField(
+            model_name="adimage",
+            name="variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Storage names of the resized copies.",
+            ),
+        ),
+        migrations.RunPython(backfill_images_srcset, migrations.RunPython.noop),
+    ]
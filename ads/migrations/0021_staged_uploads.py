@@ -0,0 +1,34 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0020_image_variants"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="adimage",
+            name="staged_file",
+            field=models.CharField(
+                blank=True,
+                help_text="Local path of the file while it waits to be uploaded.",
+                max_length=255,
+            ),
+        ),
+        migrations.AddField(
+            model_name="adimage",
+            name="upload_status",
+            field=models.CharField(
+                choices=[
+                    ("processing", "Processing"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="ready",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:20
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_favourite_counts(apps, schema_editor):
+    Ad = apps.get_model("ads", "Ad")
+    AdCard = apps.get_model("ads", "AdCard")
+    FavouriteAd = apps.get_model("ads", "FavouriteAd")
+
+    def favourite_count(ad_field):
+        favourites = (
+            FavouriteAd.objects.filter(ad=OuterRef(ad_field))
+            .order_by()
+            .values("ad")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return Coalesce(Subquery(favourites, output_field=IntegerField()), 0)
+
+    Ad.objects.update(favourite_count=favourite_count("pk"))
+    AdCard.objects.update(favourite_count=favourite_count("ad_id"))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0021_staged_uploads"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="favourite_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="ad",
+            name="view_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="adcard",
+            name="favourite_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="adcard",
+            name="view_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name="adcard",
+            index=models.Index(
+                fields=["is_approved", "status", "-favourite_count", "-created"],
+                name="ads_card_popular_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_favourite_counts, migrations.RunPython.noop),
+    ]
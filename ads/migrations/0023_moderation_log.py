@@ -0,0 +1,62 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:25
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("ads", "0022_ad_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ModerationLog",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[("approve", "Approve"), ("deny", "Deny")],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "ad_ids",
+                    models.JSONField(
+                        default=list,
+                        help_text="Ids of the ads the action was applied to.",
+                    ),
+                ),
+                ("ads_count", models.PositiveIntegerField(default=0)),
+                ("note", models.TextField(blank=True)),
+                (
+                    "moderator",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="ad_moderations",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created",),
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:27
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_category_counters(apps, schema_editor):
+    Ad = apps.get_model("ads", "Ad")
+    AdCategory = apps.get_model("ads", "AdCategory")
+    AdSubCategory = apps.get_model("ads", "AdSubCategory")
+
+    def count_related(model):
+        counts = (
+            model.objects.filter(category=OuterRef("pk"))
+            .order_by()
+            .values("category")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    AdCategory.objects.update(
+        ads_count=count_related(Ad), sub_categories_count=count_related(AdSubCategory)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0023_moderation_log"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="adcategory",
+            name="ads_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="adcategory",
+            name="sub_categories_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_category_counters, migrations.RunPython.noop),
+    ]
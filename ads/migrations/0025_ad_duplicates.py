@@ -0,0 +1,115 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+import hashlib
+import re
+import uuid
+
+
+def backfill_name_hashes(apps, schema_editor):
+    Ad = apps.get_model("ads", "Ad")
+    word_pattern = re.compile(r"\w+")
+    ads = []
+    for ad in Ad.objects.only("pk", "name").iterator(chunk_size=1000):
+        normalized = " ".join(word_pattern.findall(str(ad.name or "").casefold()))
+        ad.name_hash = hashlib.sha1(normalized.encode()).hexdigest()
+        ads.append(ad)
+    Ad.objects.bulk_update(ads, ["name_hash"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0024_category_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AdSignature",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+                (
+                    "signature",
+                    models.JSONField(
+                        default=list,
+                        help_text="MinHash signature of the ad's name and description.",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-created",),
+                "abstract": False,
+            },
+        ),
+        migrations.AddField(
+            model_name="ad",
+            name="name_hash",
+            field=models.CharField(
+                db_index=True,
+                default="",
+                editable=False,
+                help_text="Hash of the normalized name, used to find duplicate ads.",
+                max_length=40,
+            ),
+        ),
+        migrations.CreateModel(
+            name="AdSignatureBand",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                        unique=True,
+                    ),
+                ),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                ("updated", models.DateTimeField(auto_now=True, null=True)),
+                ("band", models.PositiveSmallIntegerField()),
+                (
+                    "bucket",
+                    models.CharField(
+                        help_text="Hash of the signature rows that fall in the band.",
+                        max_length=16,
+                    ),
+                ),
+                (
+                    "signature",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="bands",
+                        to="ads.adsignature",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="adsignature",
+            name="ad",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="signature",
+                to="ads.ad",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="adsignatureband",
+            index=models.Index(
+                fields=["band", "bucket"], name="ads_signature_band_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_name_hashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0025_ad_duplicates"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="adcard",
+            name="ads_card_popular_idx",
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                condition=models.Q(("is_approved", True), ("status", "A")),
+                fields=["category", "-created"],
+                name="ads_ad_live_category_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                condition=models.Q(("is_approved", True), ("status", "A")),
+                fields=["location", "-created"],
+                name="ads_ad_live_location_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_approved", True), ("status", "A"), ("featured", True)
+                ),
+                fields=["-created"],
+                name="ads_ad_live_featured_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(fields=["status", "-created"], name="ads_ad_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="adcard",
+            index=models.Index(
+                condition=models.Q(("is_approved", True), ("status", "A")),
+                fields=["-created", "-ad"],
+                name="ads_card_live_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="adcard",
+            index=models.Index(
+                condition=models.Q(("is_approved", True), ("status", "A")),
+                fields=["category", "-created", "-ad"],
+                name="ads_card_live_category_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="adcard",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_approved", True), ("status", "A"), ("featured", True)
+                ),
+                fields=["-created"],
+                name="ads_card_live_featured_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="adcard",
+            index=models.Index(
+                condition=models.Q(("is_approved", True), ("status", "A")),
+                fields=["-favourite_count", "-created", "-ad"],
+                name="ads_card_popular_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="adcard",
+            index=models.Index(
+                fields=["ad_creator", "-created"], name="ads_card_creator_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0026_listing_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeaturedRotationSlot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("starts_at", models.DateTimeField(unique=True)),
+                ("ends_at", models.DateTimeField()),
+                (
+                    "ad_ids",
+                    models.JSONField(
+                        default=list,
+                        help_text="Ids of the featured ads of the window, in display order.",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("starts_at",),
+            },
+        ),
+        migrations.AddField(
+            model_name="ad",
+            name="featured_weight",
+            field=models.PositiveSmallIntegerField(
+                default=1,
+                help_text="Relative share of the featured rotation slots the ad gets while featured.",
+            ),
+        ),
+    ]
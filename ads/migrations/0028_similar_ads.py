@@ -0,0 +1,56 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:37
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0027_featured_rotation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SimilarAd",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "score",
+                    models.FloatField(
+                        help_text="Cosine similarity of the two ads, between 0 and 1."
+                    ),
+                ),
+                (
+                    "ad",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_ads",
+                        to="ads.ad",
+                    ),
+                ),
+                (
+                    "similar",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="ads.adcard",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-score",),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="similarad",
+            index=models.Index(fields=["ad", "-score"], name="ads_similar_ad_idx"),
+        ),
+    ]
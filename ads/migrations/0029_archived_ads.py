@@ -0,0 +1,88 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:42
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django_countries.fields
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("ads", "0028_similar_ads"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedAd",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        editable=False,
+                        help_text="Id of the ad before it was archived.",
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("name", models.CharField(max_length=255)),
+                ("description", models.TextField()),
+                ("price", models.DecimalField(decimal_places=2, max_digits=10)),
+                ("location", django_countries.fields.CountryField(max_length=2)),
+                ("featured", models.BooleanField(default=False)),
+                ("is_approved", models.BooleanField(default=False)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PA", "Paused"),
+                            ("D", "Denied"),
+                            ("P", "Pending"),
+                            ("A", "Active"),
+                        ],
+                        max_length=2,
+                        null=True,
+                    ),
+                ),
+                ("featured_weight", models.PositiveSmallIntegerField(default=1)),
+                ("view_count", models.PositiveIntegerField(default=0)),
+                (
+                    "images",
+                    models.JSONField(
+                        default=list,
+                        help_text="Storage names and variants of the ad images.",
+                    ),
+                ),
+                (
+                    "favourites",
+                    models.JSONField(
+                        default=list, help_text="Customers who had favourited the ad."
+                    ),
+                ),
+                ("created", models.DateTimeField(help_text="When the ad was created.")),
+                ("updated", models.DateTimeField(null=True)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "ad_creator",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_ads",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="ads.adcategory",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-archived_at",),
+            },
+        ),
+    ]
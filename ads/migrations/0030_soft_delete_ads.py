@@ -0,0 +1,30 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0029_archived_ads"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ad",
+            name="deleted_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="When the ad was deleted; its rows and files are purged later.",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=models.Index(
+                condition=models.Q(("deleted_at__isnull", False)),
+                fields=["deleted_at"],
+                name="ads_ad_deleted_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0030_soft_delete_ads"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CategoryPriceStats",
+            fields=[
+                (
+                    "category",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="price_stats",
+                        serialize=False,
+                        to="ads.adcategory",
+                    ),
+                ),
+                ("ads_count", models.PositiveIntegerField(default=0)),
+                (
+                    "min_price",
+                    models.DecimalField(decimal_places=2, max_digits=10, null=True),
+                ),
+                (
+                    "max_price",
+                    models.DecimalField(decimal_places=2, max_digits=10, null=True),
+                ),
+                (
+                    "quantiles",
+                    models.JSONField(
+                        default=dict,
+                        help_text="Price at each percentile of ADS_PRICE_QUANTILES.",
+                    ),
+                ),
+                (
+                    "histogram_start",
+                    models.DecimalField(decimal_places=2, max_digits=10, null=True),
+                ),
+                (
+                    "histogram_width",
+                    models.DecimalField(
+                        decimal_places=2,
+                        help_text="Price range covered by each histogram bin.",
+                        max_digits=10,
+                        null=True,
+                    ),
+                ),
+                (
+                    "histogram",
+                    models.JSONField(
+                        default=list, help_text="Number of ads in each price bin."
+                    ),
+                ),
+                (
+                    "computed_at",
+                    models.DateTimeField(
+                        help_text="When the quantiles were last recomputed from every ad."
+                    ),
+                ),
+                ("updated", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name_plural": "Category price stats",
+            },
+        ),
+    ]
@@ -0,0 +1,120 @@
+# Generated by Django 4.1.7 on 2026-10-17 02:00
+
+import common.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0031_category_price_stats"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="ad",
+            name="ads_ad_live_category_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="ad",
+            name="ads_ad_live_location_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="ad",
+            name="ads_ad_live_featured_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="ad",
+            name="ads_ad_deleted_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="adcard",
+            name="ads_card_live_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="adcard",
+            name="ads_card_live_category_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="adcard",
+            name="ads_card_live_featured_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="adcard",
+            name="ads_card_popular_idx",
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=common.models.PartialIndex(
+                fields=["category", "-created"],
+                name="ads_ad_live_category_idx",
+                prefix_fields=["is_approved", "status"],
+                where=models.Q(("is_approved", True), ("status", "A")),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=common.models.PartialIndex(
+                fields=["location", "-created"],
+                name="ads_ad_live_location_idx",
+                prefix_fields=["is_approved", "status"],
+                where=models.Q(("is_approved", True), ("status", "A")),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=common.models.PartialIndex(
+                fields=["-created"],
+                name="ads_ad_live_featured_idx",
+                prefix_fields=["is_approved", "status", "featured"],
+                where=models.Q(
+                    ("is_approved", True), ("status", "A"), ("featured", True)
+                ),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ad",
+            index=common.models.PartialIndex(
+                fields=["deleted_at"],
+                name="ads_ad_deleted_idx",
+                where=models.Q(("deleted_at__isnull", False)),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="adcard",
+            index=common.models.PartialIndex(
+                fields=["-created", "-ad"],
+                name="ads_card_live_idx",
+                prefix_fields=["is_approved", "status"],
+                where=models.Q(("is_approved", True), ("status", "A")),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="adcard",
+            index=common.models.PartialIndex(
+                fields=["category", "-created", "-ad"],
+                name="ads_card_live_category_idx",
+                prefix_fields=["is_approved", "status"],
+                where=models.Q(("is_approved", True), ("status", "A")),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="adcard",
+            index=common.models.PartialIndex(
+                fields=["-created"],
+                name="ads_card_live_featured_idx",
+                prefix_fields=["is_approved", "status", "featured"],
+                where=models.Q(
+                    ("is_approved", True), ("status", "A"), ("featured", True)
+                ),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="adcard",
+            index=common.models.PartialIndex(
+                fields=["-favourite_count", "-created", "-ad"],
+                name="ads_card_popular_idx",
+                prefix_fields=["is_approved", "status"],
+                where=models.Q(("is_approved", True), ("status", "A")),
+            ),
+        ),
+    ]
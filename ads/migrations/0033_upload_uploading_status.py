@@ -0,0 +1,26 @@
+# Generated by Django 4.1.7 on 2026-10-17 02:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("ads", "0032_partial_index_fallback"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="adimage",
+            name="upload_status",
+            field=models.CharField(
+                choices=[
+                    ("processing", "Processing"),
+                    ("uploading", "Uploading"),
+                    ("ready", "Ready"),
+                    ("failed", "Failed"),
+                ],
+                default="ready",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -1,24 +1,57 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import FileExtensionValidator, MinValueValidator
 from django.db import models
+from django.db.models import Q
 from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
 
-from ads.choices import STATUS_CHOICES, STATUS_PENDING
-from common.models import BaseModel
+from ads.choices import MODERATION_ACTION_CHOICES, STATUS_ACTIVE, STATUS_CHOICES, STATUS_PENDING
+from ads.names import get_name_hash
+from common.choices import UPLOAD_READY, UPLOAD_STATUS_CHOICES
+from common.images import get_srcset
+from common.models import BaseModel, PartialIndex
 
 User = get_user_model()
 
+# Most listings only show live ads, so their indexes are partial indexes over the rows matching this condition.
+# Boolean filters are rendered as bare column tests which SQLite cannot seek on, but it can match them against
+# the condition of a partial index. Databases without partial indexes get composite indexes leading with
+# LIVE_AD_FIELDS instead.
+LIVE_AD = Q(is_approved=True, status=STATUS_ACTIVE)
+LIVE_AD_FIELDS = ["is_approved", "status"]
+
 
 # Create your models here.
 
 
-class AdCategory(BaseModel):
+class CounterFieldsMixin:
+    """
+    For models whose COUNTER_FIELDS are maintained with F() expressions by ads.counters, never from an instance.
+
+    A full save would write back whatever counter values were loaded with the instance, losing every increment
+    made since, so updates leave the counter columns out.
+    """
+    COUNTER_FIELDS = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get("force_insert") and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+class AdCategory(CounterFieldsMixin, BaseModel):
     title = models.CharField(max_length=255)
     image = models.ImageField(
             upload_to="category_images/", null=True,
             validators=[FileExtensionValidator(['jpg', 'jpeg', 'png', 'gif', 'svg'])], default=None
     )
+    ads_count = models.PositiveIntegerField(default=0, editable=False)
+    sub_categories_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ("ads_count", "sub_categories_count")
 
     class Meta:
         verbose_name_plural = "Ad Categories"
@@ -44,7 +77,14 @@ class AdSubCategory(BaseModel):
         verbose_name_plural = "Ad SubCategories"
 
 
-class Ad(BaseModel):
+class AdManager(models.Manager):
+    """Leaves out soft-deleted ads; they are only reachable through Ad.all_objects until they are reaped."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class Ad(CounterFieldsMixin, BaseModel):
     ad_creator = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name="created_ads")
     name = models.CharField(max_length=255)
     description = models.TextField()
@@ -54,24 +94,66 @@ class Ad(BaseModel):
     featured = models.BooleanField(default=False)
     is_approved = models.BooleanField(default=False)
     status = models.CharField(max_length=2, choices=STATUS_CHOICES, default=STATUS_PENDING, null=True)
+    featured_weight = models.PositiveSmallIntegerField(
+            default=1, help_text=_("Relative share of the featured rotation slots the ad gets while featured.")
+    )
+    name_hash = models.CharField(max_length=40, db_index=True, editable=False, default="",
+                                 help_text=_("Hash of the normalized name, used to find duplicate ads."))
+    favourite_count = models.PositiveIntegerField(default=0, editable=False)
+    view_count = models.PositiveIntegerField(default=0, editable=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False,
+                                      help_text=_("When the ad was deleted; its rows and files are purged later."))
+
+    objects = AdManager()
+    all_objects = models.Manager()
+
+    COUNTER_FIELDS = ("favourite_count", "view_count")
+
+    class Meta(BaseModel.Meta):
+        indexes = [
+            PartialIndex(fields=["category", "-created"], where=LIVE_AD, prefix_fields=LIVE_AD_FIELDS,
+                         name="ads_ad_live_category_idx"),
+            PartialIndex(fields=["location", "-created"], where=LIVE_AD, prefix_fields=LIVE_AD_FIELDS,
+                         name="ads_ad_live_location_idx"),
+            PartialIndex(fields=["-created"], where=LIVE_AD & Q(featured=True),
+                         prefix_fields=[*LIVE_AD_FIELDS, "featured"], name="ads_ad_live_featured_idx"),
+            # Serves both the live listing and the moderation queue of pending ads
+            models.Index(fields=["status", "-created"], name="ads_ad_status_idx"),
+            PartialIndex(fields=["deleted_at"], where=Q(deleted_at__isnull=False), name="ads_ad_deleted_idx"),
+        ]
 
     def __str__(self):
         return str(self.name)
 
+    def save(self, *args, **kwargs):
+        self.name_hash = get_name_hash(self.name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "name" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "name_hash"}
+        super().save(*args, **kwargs)
+
 
 class AdImage(BaseModel):
     ad = models.ForeignKey(Ad, on_delete=models.CASCADE, null=True, related_name="images")
     image = models.ImageField(upload_to="ad_images/", help_text=_("The image of a particular ad."), default=None)
+    variants = models.JSONField(default=dict, blank=True, help_text=_("Storage names of the resized copies."))
+    upload_status = models.CharField(max_length=10, choices=UPLOAD_STATUS_CHOICES, default=UPLOAD_READY)
+    staged_file = models.CharField(max_length=255, blank=True,
+                                   help_text=_("Local path of the file while it waits to be uploaded."))
 
     def __str__(self):
         return self.ad.name
 
     @property
     def ad_image(self):
-        if self.image is not None:
+        if self.image:
             return self.image.url
         return None
 
+    @property
+    def ad_image_srcset(self):
+        return get_srcset(self.image, self.variants)
+
 
 class FavouriteAd(BaseModel):
     customer = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name="favourite_ads")
@@ -79,3 +161,185 @@ class FavouriteAd(BaseModel):
 
     def __str__(self):
         return f"{self.customer} --- {self.ad.name}"
+
+
+class ModerationLog(BaseModel):
+    moderator = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="ad_moderations")
+    action = models.CharField(max_length=10, choices=MODERATION_ACTION_CHOICES)
+    ad_ids = models.JSONField(default=list, help_text=_("Ids of the ads the action was applied to."))
+    ads_count = models.PositiveIntegerField(default=0)
+    note = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.get_action_display()} {self.ads_count} ads"
+
+
+class AdSearchDocument(BaseModel):
+    ad = models.OneToOneField(Ad, on_delete=models.CASCADE, related_name="search_document")
+    length = models.PositiveIntegerField(default=0, help_text=_("Weighted number of terms indexed for the ad."))
+
+    def __str__(self):
+        return self.ad.name
+
+
+class AdSearchTerm(BaseModel):
+    document = models.ForeignKey(AdSearchDocument, on_delete=models.CASCADE, related_name="terms")
+    term = models.CharField(max_length=64)
+    frequency = models.PositiveIntegerField(help_text=_("Weighted number of times the term occurs in the ad."))
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["term"], name="ads_search_term_idx"),
+        ]
+        unique_together = ("document", "term")
+
+    def __str__(self):
+        return self.term
+
+
+class AdSignature(BaseModel):
+    ad = models.OneToOneField(Ad, on_delete=models.CASCADE, related_name="signature")
+    signature = models.JSONField(default=list, help_text=_("MinHash signature of the ad's name and description."))
+
+    def __str__(self):
+        return self.ad.name
+
+
+class AdSignatureBand(BaseModel):
+    signature = models.ForeignKey(AdSignature, on_delete=models.CASCADE, related_name="bands")
+    band = models.PositiveSmallIntegerField()
+    bucket = models.CharField(max_length=16, help_text=_("Hash of the signature rows that fall in the band."))
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["band", "bucket"], name="ads_signature_band_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.band}:{self.bucket}"
+
+
+class FeaturedRotationSlot(models.Model):
+    """The featured ads shown on the home feed during one rotation window, precomputed by the scheduler."""
+    starts_at = models.DateTimeField(unique=True)
+    ends_at = models.DateTimeField()
+    ad_ids = models.JSONField(default=list, help_text=_("Ids of the featured ads of the window, in display order."))
+
+    class Meta:
+        ordering = ("starts_at",)
+
+    def __str__(self):
+        return f"{self.starts_at} - {self.ends_at}"
+
+
+class AdCard(models.Model):
+    """
+    Denormalized copy of everything the ad list endpoints render for an ad, kept in sync from Ad, AdImage and
+    AdCategory signals so listings are read from this single table.
+    """
+    ad = models.OneToOneField(Ad, on_delete=models.CASCADE, primary_key=True, related_name="card")
+    ad_creator = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name="+")
+    name = models.CharField(max_length=255)
+    description = models.TextField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    location = CountryField()
+    location_name = models.CharField(max_length=255, blank=True)
+    category = models.ForeignKey(AdCategory, on_delete=models.CASCADE, null=True, related_name="+")
+    category_title = models.CharField(max_length=255, blank=True)
+    images = models.JSONField(default=list, help_text=_("URLs of the ad images."))
+    images_srcset = models.JSONField(default=list, help_text=_("URLs of the resized copies of the ad images."))
+    featured = models.BooleanField(default=False)
+    is_approved = models.BooleanField(default=False)
+    status = models.CharField(max_length=2, choices=STATUS_CHOICES, default=STATUS_PENDING, null=True)
+    favourite_count = models.PositiveIntegerField(default=0)
+    view_count = models.PositiveIntegerField(default=0)
+    created = models.DateTimeField(help_text=_("When the ad was created."))
+    updated = models.DateTimeField(null=True)
+
+    class Meta:
+        ordering = ("-created",)
+        indexes = [
+            PartialIndex(fields=["-created", "-ad"], where=LIVE_AD, prefix_fields=LIVE_AD_FIELDS,
+                         name="ads_card_live_idx"),
+            PartialIndex(fields=["category", "-created", "-ad"], where=LIVE_AD, prefix_fields=LIVE_AD_FIELDS,
+                         name="ads_card_live_category_idx"),
+            PartialIndex(fields=["-created"], where=LIVE_AD & Q(featured=True),
+                         prefix_fields=[*LIVE_AD_FIELDS, "featured"], name="ads_card_live_featured_idx"),
+            PartialIndex(fields=["-favourite_count", "-created", "-ad"], where=LIVE_AD, prefix_fields=LIVE_AD_FIELDS,
+                         name="ads_card_popular_idx"),
+            models.Index(fields=["ad_creator", "-created"], name="ads_card_creator_idx"),
+        ]
+
+    def __str__(self):
+        return str(self.name)
+
+
+class SimilarAd(models.Model):
+    """One of the precomputed nearest neighbours of an ad, by TF-IDF cosine similarity."""
+    ad = models.ForeignKey(Ad, on_delete=models.CASCADE, related_name="similar_ads")
+    similar = models.ForeignKey(AdCard, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField(help_text=_("Cosine similarity of the two ads, between 0 and 1."))
+
+    class Meta:
+        ordering = ("-score",)
+        indexes = [
+            models.Index(fields=["ad", "-score"], name="ads_similar_ad_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.ad_id} ~ {self.similar_id} ({self.score:.2f})"
+
+
+class ArchivedAd(models.Model):
+    """
+    An ad moved out of the ads table by the archive job, along with its images and favourites, keeping its id so
+    it can be restored as it was.
+    """
+    id = models.UUIDField(primary_key=True, editable=False, help_text=_("Id of the ad before it was archived."))
+    ad_creator = models.ForeignKey(User, on_delete=models.CASCADE, null=True, related_name="archived_ads")
+    name = models.CharField(max_length=255)
+    description = models.TextField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    location = CountryField()
+    category = models.ForeignKey(AdCategory, on_delete=models.SET_NULL, null=True, related_name="+")
+    featured = models.BooleanField(default=False)
+    is_approved = models.BooleanField(default=False)
+    status = models.CharField(max_length=2, choices=STATUS_CHOICES, null=True)
+    featured_weight = models.PositiveSmallIntegerField(default=1)
+    view_count = models.PositiveIntegerField(default=0)
+    images = models.JSONField(default=list, help_text=_("Storage names and variants of the ad images."))
+    favourites = models.JSONField(default=list, help_text=_("Customers who had favourited the ad."))
+    created = models.DateTimeField(help_text=_("When the ad was created."))
+    updated = models.DateTimeField(null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("-archived_at",)
+
+    def __str__(self):
+        return str(self.name)
+
+
+class CategoryPriceStats(models.Model):
+    """
+    Price distribution of the live ads of a category, recomputed by recompute_price_stats and kept roughly up to
+    date in between as ads go live or stop being live.
+    """
+    category = models.OneToOneField(AdCategory, on_delete=models.CASCADE, primary_key=True,
+                                    related_name="price_stats")
+    ads_count = models.PositiveIntegerField(default=0)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    quantiles = models.JSONField(default=dict, help_text=_("Price at each percentile of ADS_PRICE_QUANTILES."))
+    histogram_start = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    histogram_width = models.DecimalField(max_digits=10, decimal_places=2, null=True,
+                                          help_text=_("Price range covered by each histogram bin."))
+    histogram = models.JSONField(default=list, help_text=_("Number of ads in each price bin."))
+    computed_at = models.DateTimeField(help_text=_("When the quantiles were last recomputed from every ad."))
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Category price stats"
+
+    def __str__(self):
+        return f"{self.category_id}: {self.ads_count} ads"
@@ -0,0 +1,69 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from django.utils import timezone
+
+from ads import prices, search
+from ads.choices import MODERATION_APPROVE, STATUS_ACTIVE, STATUS_DENIED, STATUS_PENDING
+from ads.feeds import invalidate_home_feed
+from ads.models import Ad, AdCard, AdSearchDocument, ModerationLog
+
+
+def get_moderation_updates(action):
+    if action == MODERATION_APPROVE:
+        # Approval publishes pending and previously denied ads but leaves ads their creator paused as they are
+        return {
+            "is_approved": True,
+            "status": Case(When(status__in=[STATUS_PENDING, STATUS_DENIED], then=Value(STATUS_ACTIVE)),
+                           default=F("status")),
+        }
+    return {"is_approved": False, "status": Value(STATUS_DENIED)}
+
+
+def get_price_entries(ad_ids):
+    return {
+        ad_id: prices.get_price_entry(*state)
+        for ad_id, *state in Ad.objects.filter(pk__in=ad_ids).values_list("pk", *prices.PRICE_STATE_FIELDS)
+    }
+
+
+@transaction.atomic
+def moderate_batch(ad_ids, action):
+    """Apply a moderation action to a batch of ads with one UPDATE per table, bypassing the per-row signals."""
+    now = timezone.now()
+    previous_entries = get_price_entries(ad_ids)
+    Ad.objects.filter(pk__in=ad_ids).update(**get_moderation_updates(action), updated=now)
+    moderated_ads = Ad.objects.filter(pk=OuterRef("ad_id"))
+    AdCard.objects.filter(ad_id__in=ad_ids).update(
+            is_approved=Subquery(moderated_ads.values("is_approved")),
+            status=Subquery(moderated_ads.values("status")),
+            updated=now,
+    )
+    if action == MODERATION_APPROVE:
+        for ad in Ad.objects.filter(pk__in=ad_ids).select_related("category"):
+            search.index_ad(ad)
+    else:
+        AdSearchDocument.objects.filter(ad_id__in=ad_ids).delete()
+    current_entries = get_price_entries(ad_ids)
+    prices.apply_price_changes(
+            [previous_entries.get(ad_id) for ad_id in ad_ids], [current_entries.get(ad_id) for ad_id in ad_ids]
+    )
+
+
+def moderate_ads(queryset, action, moderator=None, note=""):
+    """
+    Approve or deny every ad of `queryset` in batches of ADS_MODERATION_BATCH_SIZE and log the moderation.
+
+    The ads, their cards and the search index are updated batch by batch; the home feed is invalidated once at
+    the end.
+    """
+    ad_ids = list(queryset.order_by().values_list("pk", flat=True))
+    batch_size = settings.ADS_MODERATION_BATCH_SIZE
+    for start in range(0, len(ad_ids), batch_size):
+        moderate_batch(ad_ids[start:start + batch_size], action)
+    if ad_ids:
+        invalidate_home_feed()
+    return ModerationLog.objects.create(
+            moderator=moderator, action=action, ad_ids=[str(ad_id) for ad_id in ad_ids], ads_count=len(ad_ids),
+            note=note,
+    )
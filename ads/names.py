@@ -0,0 +1,13 @@
+import hashlib
+import re
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def normalize_name(name):
+    """Lower-case a name and reduce it to its words, so case, spacing and punctuation do not matter."""
+    return " ".join(WORD_PATTERN.findall(str(name or "").casefold()))
+
+
+def get_name_hash(name):
+    return hashlib.sha1(normalize_name(name).encode()).hexdigest()
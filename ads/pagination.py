@@ -0,0 +1,86 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.settings import api_settings
+
+from common.exceptions import CustomValidation
+
+
+class KeysetPagination:
+    """
+    Seek-method pagination over a descending ordering that ends in a unique field, ("-created", "-pk") by default.
+
+    Instead of OFFSET, each page starts strictly after the ordering values of the last row of the previous page,
+    so every page costs the same no matter how deep the client scrolls.
+    """
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering = ("-created", "-pk")
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = ordering
+        self.next_cursor = None
+
+    @property
+    def ordering_fields(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, row):
+        values = []
+        for field in self.ordering_fields:
+            value = getattr(row, field)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else str(value))
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(self.ordering_fields):
+                raise ValueError
+            return [
+                self._get_model_field(model, field).to_python(value)
+                for field, value in zip(self.ordering_fields, values)
+            ]
+        except (binascii.Error, TypeError, ValueError, ValidationError):
+            raise CustomValidation({"message": "Invalid cursor", "status": "failed"},
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+
+    @staticmethod
+    def _get_model_field(model, field):
+        return model._meta.pk if field == "pk" else model._meta.get_field(field)
+
+    def get_seek_filter(self, values):
+        # For ("-a", "-b", "-pk") this is: a < x OR (a = x AND b < y) OR (a = x AND b = y AND pk < z)
+        seek_filter = Q()
+        for position, field in enumerate(self.ordering_fields):
+            equal_to_previous = dict(zip(self.ordering_fields[:position], values[:position]))
+            seek_filter |= Q(**equal_to_previous, **{f"{field}__lt": values[position]})
+        return seek_filter
+
+    def paginate_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get(self.cursor_query_param)
+        queryset = queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self.get_seek_filter(self.decode_cursor(cursor, queryset.model)))
+
+        # Fetch one extra row to find out whether there is a next page without running a COUNT.
+        page = list(queryset[:page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self.encode_cursor(page[-1])
+        return page
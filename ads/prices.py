@@ -0,0 +1,177 @@
+from collections import defaultdict
+from decimal import ROUND_CEILING, ROUND_HALF_UP, Decimal
+from itertools import groupby
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from ads.choices import STATUS_ACTIVE
+from ads.models import Ad, CategoryPriceStats
+
+PRICE_STATE_FIELDS = ("category_id", "price", "is_approved", "status")
+
+CENT = Decimal("0.01")
+
+
+def _to_price(value):
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def get_price_entry(category_id, price, is_approved, status):
+    """The (category id, price) an ad adds to the price stats, or None if it is not live."""
+    if category_id is None or price is None or not (is_approved and status == STATUS_ACTIVE):
+        return None
+    return category_id, _to_price(price)
+
+
+def get_ad_price_entry(ad):
+    return get_price_entry(*(getattr(ad, field) for field in PRICE_STATE_FIELDS))
+
+
+def _cache_key(category_id):
+    return f"ads:price_stats:{category_id}"
+
+
+def _invalidate_cached_stats(category_ids):
+    keys = [_cache_key(category_id) for category_id in category_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def compute_price_stats(prices):
+    """Min, max, ADS_PRICE_QUANTILES and an ADS_PRICE_HISTOGRAM_BINS bin fixed-width histogram of `prices`."""
+    prices = np.asarray(prices, dtype=np.float64)
+    bins = settings.ADS_PRICE_HISTOGRAM_BINS
+    low, high = prices.min(), prices.max()
+    start = _to_price(low)
+    # The width is rounded up so the last bin reaches the highest price. A category whose ads all have the same
+    # price still gets bins a cent wide.
+    width = max(((_to_price(high) - start) / bins).quantize(CENT, rounding=ROUND_CEILING), CENT)
+    histogram, _ = np.histogram(prices, bins=bins, range=(float(start), float(start + width * bins)))
+    quantiles = np.quantile(prices, [quantile / 100 for quantile in settings.ADS_PRICE_QUANTILES])
+    return {
+        "ads_count": len(prices),
+        "min_price": start,
+        "max_price": _to_price(high),
+        "quantiles": {
+            f"p{quantile}": str(_to_price(value)) for quantile, value in zip(settings.ADS_PRICE_QUANTILES, quantiles)
+        },
+        "histogram_start": start,
+        "histogram_width": width,
+        "histogram": histogram.tolist(),
+    }
+
+
+def recompute_price_stats(category_ids=None):
+    """
+    Rebuild the price stats of every category, or of `category_ids`, from the prices of their live ads.
+
+    The prices are streamed ordered by category so only one category is held in memory at a time. Categories
+    without live ads lose their stats. Returns the number of categories with stats.
+    """
+    live_ads = Ad.objects.filter(is_approved=True, status=STATUS_ACTIVE, category__isnull=False)
+    stale_stats = CategoryPriceStats.objects.all()
+    if category_ids is not None:
+        live_ads = live_ads.filter(category_id__in=category_ids)
+        stale_stats = stale_stats.filter(category_id__in=category_ids)
+    rows = live_ads.order_by("category_id").values_list("category_id", "price").iterator(chunk_size=5000)
+
+    now = timezone.now()
+    computed = []
+    for category_id, category_rows in groupby(rows, key=lambda row: row[0]):
+        stats = compute_price_stats([float(price) for _, price in category_rows])
+        CategoryPriceStats.objects.update_or_create(category_id=category_id, defaults={**stats, "computed_at": now})
+        computed.append(category_id)
+    removed = list(stale_stats.exclude(category_id__in=computed).values_list("category_id", flat=True))
+    CategoryPriceStats.objects.filter(category_id__in=removed).delete()
+    _invalidate_cached_stats(computed + removed)
+    return len(computed)
+
+
+def _in_histogram(stats, price):
+    return stats.histogram_start <= price <= stats.histogram_start + stats.histogram_width * len(stats.histogram)
+
+
+def _get_bin(stats, price):
+    position = int((price - stats.histogram_start) // stats.histogram_width)
+    return min(max(position, 0), len(stats.histogram) - 1)
+
+
+@transaction.atomic
+def update_price_stats(category_id, added=(), removed=()):
+    """
+    Add and remove prices from the stats of a category without reading its other ads.
+
+    The count, max and histogram follow along. The quantiles, and a min or max whose ad is removed, are only
+    refreshed by the next recompute. A category without stats yet, or gaining a price outside its histogram range,
+    is recomputed in full once the transaction commits, so the write that changed the price neither waits for the
+    scan nor holds its locks meanwhile.
+    """
+    stats = CategoryPriceStats.objects.select_for_update().filter(category_id=category_id).first()
+    if stats is None or not all(_in_histogram(stats, price) for price in added):
+        transaction.on_commit(lambda: recompute_price_stats([category_id]))
+        return
+    for price in added:
+        stats.histogram[_get_bin(stats, price)] += 1
+        stats.ads_count += 1
+        stats.min_price = min(stats.min_price, price)
+        stats.max_price = max(stats.max_price, price)
+    for price in removed:
+        position = _get_bin(stats, price)
+        stats.histogram[position] = max(stats.histogram[position] - 1, 0)
+        stats.ads_count = max(stats.ads_count - 1, 0)
+    stats.save()
+    _invalidate_cached_stats([category_id])
+
+
+def apply_price_changes(previous_entries, current_entries):
+    """Update the price stats for ads that went from `previous_entries` to `current_entries`, entry by entry."""
+    added, removed = defaultdict(list), defaultdict(list)
+    for previous, current in zip(previous_entries, current_entries):
+        if previous == current:
+            continue
+        if previous is not None:
+            removed[previous[0]].append(previous[1])
+        if current is not None:
+            added[current[0]].append(current[1])
+    for category_id in {*added, *removed}:
+        update_price_stats(category_id, added=added[category_id], removed=removed[category_id])
+
+
+def apply_price_change(previous_entry, current_entry):
+    apply_price_changes([previous_entry], [current_entry])
+
+
+def serialize_price_stats(stats):
+    return {
+        "category": stats.category_id,
+        "ads_count": stats.ads_count,
+        "min": stats.min_price,
+        "max": stats.max_price,
+        "quantiles": stats.quantiles,
+        "histogram": {
+            "start": stats.histogram_start,
+            "width": stats.histogram_width,
+            "counts": stats.histogram,
+        },
+        "computed_at": stats.computed_at,
+    }
+
+
+def get_price_stats(category):
+    """The price stats payload of a category, from the cache when possible. Stats missing so far are computed."""
+    key = _cache_key(category.id)
+    payload = cache.get(key)
+    if payload is None:
+        stats = CategoryPriceStats.objects.filter(category=category).first()
+        if stats is None and recompute_price_stats([category.id]):
+            stats = CategoryPriceStats.objects.get(category=category)
+        if stats is None:
+            payload = {"category": category.id, "ads_count": 0, "min": None, "max": None, "quantiles": {},
+                       "histogram": None, "computed_at": None}
+        else:
+            payload = serialize_price_stats(stats)
+        cache.set(key, payload, settings.ADS_PRICE_STATS_CACHE_TIMEOUT)
+    return payload
@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from ads.choices import STATUS_ACTIVE
+from ads.models import Ad, FeaturedRotationSlot
+
+
+def get_slot_duration():
+    return timedelta(minutes=settings.ADS_FEATURED_SLOT_MINUTES)
+
+
+def get_slot_number(moment=None):
+    """Number of the rotation window `moment` falls in, counting whole windows since the Unix epoch."""
+    moment = moment or timezone.now()
+    return int(moment.timestamp() // get_slot_duration().total_seconds())
+
+
+def get_slot_start(slot_number):
+    return datetime.fromtimestamp(slot_number * get_slot_duration().total_seconds(), tz=dt_timezone.utc)
+
+
+def rotate(weights, slots, slot_size, offset=0):
+    """
+    Fill `slots` windows of up to `slot_size` ads with a smooth weighted round-robin over `weights`.
+
+    Every pick adds each ad's weight to its credit and takes the unpicked ad with the most credit, which then
+    pays the total weight back. Over the schedule each ad gets a share of the places proportional to its weight,
+    spread out evenly instead of in bursts. `offset` rotates who wins ties, so successive schedules do not always
+    start with the same ads.
+    """
+    ad_ids = list(weights)
+    if ad_ids:
+        offset %= len(ad_ids)
+        ad_ids = ad_ids[offset:] + ad_ids[:offset]
+    total_weight = sum(weights.values())
+    credit = dict.fromkeys(ad_ids, 0)
+    schedule = []
+    for _ in range(slots):
+        slot = []
+        for _ in range(min(slot_size, len(ad_ids))):
+            for ad_id in ad_ids:
+                credit[ad_id] += weights[ad_id]
+            chosen = max((ad_id for ad_id in ad_ids if ad_id not in slot), key=credit.__getitem__)
+            credit[chosen] -= total_weight
+            slot.append(chosen)
+        schedule.append(slot)
+    return schedule
+
+
+@transaction.atomic
+def schedule_featured_rotation(hours=None):
+    """
+    Replace the rotation schedule with a fresh one of the live featured ads, starting at the current window.
+
+    Returns the number of slots written.
+    """
+    if hours is None:
+        hours = settings.ADS_FEATURED_SCHEDULE_HOURS
+    weights = dict(
+            Ad.objects.filter(is_approved=True, status=STATUS_ACTIVE, featured=True)
+            .order_by("created").values_list("id", "featured_weight")
+    )
+    weights = {str(ad_id): max(weight, 1) for ad_id, weight in weights.items()}
+    first_slot = get_slot_number()
+    slots = max(1, int(timedelta(hours=hours) / get_slot_duration()))
+    schedule = rotate(weights, slots, settings.ADS_FEATURED_SLOT_SIZE, offset=first_slot)
+
+    FeaturedRotationSlot.objects.all().delete()
+    FeaturedRotationSlot.objects.bulk_create(
+            FeaturedRotationSlot(
+                    starts_at=get_slot_start(first_slot + position),
+                    ends_at=get_slot_start(first_slot + position + 1),
+                    ad_ids=ad_ids,
+            )
+            for position, ad_ids in enumerate(schedule)
+    )
+    return len(schedule)
+
+
+def get_current_slot_ad_ids(moment=None):
+    """The ids of the featured ads of the current window, or None when the schedule does not cover it."""
+    moment = moment or timezone.now()
+    slot = FeaturedRotationSlot.objects.filter(starts_at__lte=moment, ends_at__gt=moment).first()
+    return None if slot is None else slot.ad_ids
@@ -0,0 +1,135 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.db.models.functions import Length
+
+from ads.choices import STATUS_ACTIVE
+from ads.models import AdSearchDocument, AdSearchTerm
+
+# BM25 tuning constants, see https://en.wikipedia.org/wiki/Okapi_BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Term frequencies are multiplied by these so a match in the name outranks one in the description
+FIELD_WEIGHTS = {
+    "name": 3,
+    "category": 2,
+    "description": 1,
+}
+
+MAX_TERM_LENGTH = 64
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or", "the",
+    "this", "to", "with",
+})
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into lower-cased terms, dropping stop words. Works on any script, including Bangla."""
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_PATTERN.findall(str(text or "").casefold())
+        if token not in STOP_WORDS
+    ]
+
+
+def is_indexable(ad):
+    return ad.is_approved and ad.status == STATUS_ACTIVE
+
+
+def get_term_frequencies(ad):
+    frequencies = Counter()
+    fields = {
+        "name": ad.name,
+        "category": ad.category.title if ad.category_id else "",
+        "description": ad.description,
+    }
+    for field, text in fields.items():
+        for term in tokenize(text):
+            frequencies[term] += FIELD_WEIGHTS[field]
+    if ad.price is not None:
+        frequencies[str(int(ad.price))] += 1
+    return frequencies
+
+
+@transaction.atomic
+def index_ad(ad):
+    """Add or refresh an ad in the search index. Ads that are not live are removed from it instead."""
+    if not is_indexable(ad):
+        remove_ad(ad.id)
+        return
+    frequencies = get_term_frequencies(ad)
+    document, _ = AdSearchDocument.objects.update_or_create(
+            ad=ad, defaults={"length": sum(frequencies.values())}
+    )
+    document.terms.all().delete()
+    AdSearchTerm.objects.bulk_create(
+            AdSearchTerm(document=document, term=term, frequency=frequency)
+            for term, frequency in frequencies.items()
+    )
+
+
+def remove_ad(ad_id):
+    AdSearchDocument.objects.filter(ad_id=ad_id).delete()
+
+
+def _prefix_upper_bound(prefix):
+    return prefix + "\uffff"
+
+
+def search(query, limit=None):
+    """
+    Return the ids of the live ads matching every term of `query`, best BM25 score first.
+
+    The last query term is also matched as a prefix so results keep up with the user while they type. A prefix
+    shorter than ADS_SEARCH_MIN_PREFIX_LENGTH is only matched as a whole term, and a longer one is expanded to at
+    most ADS_SEARCH_MAX_PREFIX_TERMS indexed terms, so a short prefix never loads the postings of half the index.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+    if limit is None:
+        limit = settings.ADS_SEARCH_MAX_RESULTS
+
+    *exact_terms, last_term = terms
+    prefix_terms = {last_term}
+    if len(last_term) >= settings.ADS_SEARCH_MIN_PREFIX_LENGTH:
+        # Read from the term index alone, shortest completions first
+        completions = AdSearchTerm.objects.filter(term__gte=last_term, term__lt=_prefix_upper_bound(last_term))
+        completions = completions.order_by(Length("term"), "term").values_list("term", flat=True).distinct()
+        prefix_terms.update(completions[:settings.ADS_SEARCH_MAX_PREFIX_TERMS])
+    postings = AdSearchTerm.objects.order_by().filter(term__in=[*exact_terms, *prefix_terms])
+    postings = list(postings.values_list("term", "document__ad_id", "frequency", "document__length"))
+    if not postings:
+        return []
+
+    stats = AdSearchDocument.objects.aggregate(total=Count("id"), average_length=Avg("length"))
+    total_documents = stats["total"]
+    average_length = stats["average_length"] or 1
+
+    document_frequencies = Counter(term for term, _, _, _ in postings)
+    scores = defaultdict(float)
+    matched_terms = defaultdict(set)
+    for term, ad_id, frequency, length in postings:
+        document_frequency = document_frequencies[term]
+        idf = math.log(1 + (total_documents - document_frequency + 0.5) / (document_frequency + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+        scores[ad_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        if term in exact_terms:
+            matched_terms[ad_id].add(term)
+        if term.startswith(last_term):
+            matched_terms[ad_id].add(last_term)
+
+    ranked = sorted(
+            (ad_id for ad_id in scores if len(matched_terms[ad_id]) == len(terms)),
+            key=lambda ad_id: scores[ad_id],
+            reverse=True,
+    )
+    return ranked[:limit]
@@ -1,10 +1,13 @@
+from django.conf import settings
 from django.core.validators import MinValueValidator
 from django_countries.serializer_fields import CountryField
-from rest_framework import serializers
+from rest_framework import serializers, status
 
-from ads.choices import STATUS_CHOICES
+from ads.choices import FILE_FORMAT_CHOICES, FILE_FORMAT_NDJSON, MODERATION_ACTION_CHOICES, STATUS_CHOICES
+from ads.duplicates import find_duplicate_name, find_near_duplicates
 from ads.models import Ad, AdCategory
 from common.exceptions import CustomValidation
+from common.uploads import get_upload_status
 
 
 class AdCategorySerializer(serializers.Serializer):
@@ -22,14 +25,43 @@ class AdSerializer(serializers.Serializer):
     category = AdCategorySerializer
     featured = serializers.BooleanField()
     images = serializers.SerializerMethodField()
+    images_srcset = serializers.SerializerMethodField()
+    upload_status = serializers.SerializerMethodField()
     is_approved = serializers.BooleanField()
+    is_favourited = serializers.SerializerMethodField()
+    favourite_count = serializers.IntegerField(read_only=True)
+    view_count = serializers.IntegerField(read_only=True)
     status = serializers.ChoiceField(choices=STATUS_CHOICES)
 
     @staticmethod
     def get_images(obj: Ad):
-        images = [image.ad_image for image in obj.images.all()]
+        images = [image.ad_image for image in obj.images.all() if image.image]
         return images
 
+    @staticmethod
+    def get_images_srcset(obj: Ad):
+        return [image.ad_image_srcset for image in obj.images.all() if image.image]
+
+    @staticmethod
+    def get_upload_status(obj: Ad):
+        return get_upload_status(obj.images.all())
+
+    def get_is_favourited(self, obj: Ad):
+        return str(obj.id) in self.context.get("favourite_ad_ids", ())
+
+
+class AdCardSerializer(serializers.Serializer):
+    id = serializers.UUIDField(source="ad_id")
+    name = serializers.CharField()
+    description = serializers.CharField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    location = CountryField()
+    featured = serializers.BooleanField()
+    images = serializers.ListField(child=serializers.CharField())
+    images_srcset = serializers.ListField(child=serializers.DictField())
+    is_approved = serializers.BooleanField()
+    status = serializers.ChoiceField(choices=STATUS_CHOICES)
+
 
 class CreateAdSerializer(serializers.Serializer):
     name = serializers.CharField()
@@ -53,16 +85,29 @@ class CreateAdSerializer(serializers.Serializer):
             fields['is_approved'].read_only = True
         return fields
 
-    @staticmethod
-    def validate_name(value):
-        if Ad.objects.filter(name=value).exists():
-            raise CustomValidation({"message": "An ad with this name already exists.", "status": "failed"})
+    def validate_name(self, value):
+        # Names are compared normalized, through the indexed name_hash column; an ad never clashes with itself
+        if find_duplicate_name(value, exclude=self.instance):
+            raise CustomValidation({"message": "An ad with this name already exists.", "status": "failed"},
+                                   status_code=status.HTTP_400_BAD_REQUEST)
         return value
 
+    def validate(self, attrs):
+        if settings.ADS_NEAR_DUPLICATE_DETECTION:
+            name = attrs.get("name", getattr(self.instance, "name", ""))
+            description = attrs.get("description", getattr(self.instance, "description", ""))
+            if find_near_duplicates(name, description, ad_creator=self.context["request"].user,
+                                    exclude=self.instance):
+                raise CustomValidation({"message": "You already posted a very similar ad.", "status": "failed"},
+                                       status_code=status.HTTP_400_BAD_REQUEST)
+        return attrs
+
     def create(self, validated_data):
         creator = self.context['request'].user
         # Extract the category and from validated_data
         category_id = validated_data.pop('category')
+        # Images are stored by the view once the ad exists
+        validated_data.pop('images', None)
 
         # Retrieve the AdCategory instance
         try:
@@ -84,3 +129,37 @@ class CreateAdSerializer(serializers.Serializer):
         instance.category = category
         instance.save()
         return instance
+
+
+class ImportAdRowSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=255)
+    description = serializers.CharField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
+    location = CountryField()
+    category = serializers.CharField(help_text="Id or title of the category.")
+
+
+class ImportAdsSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=FILE_FORMAT_CHOICES, default=FILE_FORMAT_NDJSON)
+
+
+class AdModerationSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=MODERATION_ACTION_CHOICES)
+    ad_ids = serializers.ListField(child=serializers.UUIDField(), required=False, allow_empty=False)
+    filters = serializers.DictField(required=False)
+    note = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate(self, attrs):
+        if ("ad_ids" in attrs) == ("filters" in attrs):
+            raise CustomValidation({"message": "Pass either ad_ids or filters", "status": "failed"},
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        return attrs
+
+
+class ModerationLogSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    action = serializers.CharField()
+    ads_count = serializers.IntegerField()
+    note = serializers.CharField()
+    created = serializers.DateTimeField()
@@ -0,0 +1,157 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from ads import cards, duplicates, favourites, prices, search
+from ads.categories import invalidate_category_tree
+from ads.choices import STATUS_ACTIVE
+from ads.counters import increment_ad_counter, increment_category_counter
+from ads.feeds import invalidate_home_feed
+from ads.models import Ad, AdCategory, AdImage, AdSubCategory, FavouriteAd
+from common.images import refresh_image_variants
+
+
+# Receivers run in the order they are connected: read models are refreshed first and cached snapshots built from
+# them are invalidated last.
+
+@receiver(post_save, sender=AdImage)
+def handle_ad_image_variants(sender, instance, **kwargs):
+    refresh_image_variants(instance)
+
+
+@receiver(post_save, sender=Ad)
+def handle_ad_card_update(sender, instance, **kwargs):
+    # A soft-deleted ad had its read models removed when it was marked deleted and must not get them back
+    if instance.deleted_at is None:
+        cards.refresh_ad_card(instance)
+
+
+@receiver(post_save, sender=AdImage)
+@receiver(post_delete, sender=AdImage)
+def handle_ad_card_images_update(sender, instance, **kwargs):
+    cards.refresh_ad_card_images(instance.ad_id)
+
+
+@receiver(post_save, sender=AdCategory)
+def handle_category_cards_update(sender, instance, created, **kwargs):
+    if not created:
+        cards.refresh_category_cards(instance)
+
+
+@receiver(post_save, sender=Ad)
+def handle_search_index_update(sender, instance, **kwargs):
+    if instance.deleted_at is None:
+        search.index_ad(instance)
+
+
+@receiver(post_save, sender=AdCategory)
+def handle_category_search_index_update(sender, instance, created, **kwargs):
+    if created:
+        return
+    for ad in instance.ads.select_related("category").filter(is_approved=True, status=STATUS_ACTIVE):
+        search.index_ad(ad)
+
+
+@receiver(post_save, sender=Ad)
+def handle_signature_update(sender, instance, **kwargs):
+    if settings.ADS_NEAR_DUPLICATE_DETECTION and instance.deleted_at is None:
+        duplicates.index_signature(instance)
+
+
+@receiver(post_save, sender=FavouriteAd)
+def handle_favourite_added(sender, instance, created, **kwargs):
+    if created:
+        increment_ad_counter(instance.ad_id, "favourite_count")
+        favourites.invalidate_cached_favourites(instance.customer_id)
+
+
+@receiver(post_delete, sender=FavouriteAd)
+def handle_favourite_removed(sender, instance, **kwargs):
+    increment_ad_counter(instance.ad_id, "favourite_count", -1)
+    favourites.invalidate_cached_favourites(instance.customer_id)
+
+
+# Category counter maintained for each model pointing at a category
+CATEGORY_COUNTERS = {
+    Ad: "ads_count",
+    AdSubCategory: "sub_categories_count",
+}
+
+
+# Columns read before a save so the receivers below can tell what changed
+PREVIOUS_STATE_FIELDS = {
+    Ad: (*prices.PRICE_STATE_FIELDS, "deleted_at"),
+    AdSubCategory: ("category_id",),
+}
+
+
+@receiver(pre_save, sender=Ad)
+@receiver(pre_save, sender=AdSubCategory)
+def remember_previous_state(sender, instance, **kwargs):
+    if instance._state.adding:
+        previous_state = None
+    else:
+        # The base manager also sees soft-deleted ads, which Ad.objects hides
+        previous_state = sender._base_manager.filter(pk=instance.pk).values(*PREVIOUS_STATE_FIELDS[sender]).first()
+    if previous_state and previous_state.pop("deleted_at", None) is not None:
+        # A soft-deleted ad counts nowhere any more, just like an ad that is only being created
+        previous_state = None
+    instance._previous_state = previous_state
+    instance._previous_category_id = previous_state and previous_state["category_id"]
+
+
+def _is_soft_deleted(instance):
+    return getattr(instance, "deleted_at", None) is not None
+
+
+@receiver(post_save, sender=Ad)
+@receiver(post_save, sender=AdSubCategory)
+def handle_category_counter_update(sender, instance, created, **kwargs):
+    previous_category_id = None if created else instance._previous_category_id
+    category_id = None if _is_soft_deleted(instance) else instance.category_id
+    if previous_category_id != category_id:
+        increment_category_counter(previous_category_id, CATEGORY_COUNTERS[sender], -1)
+        increment_category_counter(category_id, CATEGORY_COUNTERS[sender])
+
+
+@receiver(post_delete, sender=Ad)
+@receiver(post_delete, sender=AdSubCategory)
+def handle_category_counter_removal(sender, instance, **kwargs):
+    # A soft-deleted ad was already taken off the counter when it was marked deleted
+    if not _is_soft_deleted(instance):
+        increment_category_counter(instance.category_id, CATEGORY_COUNTERS[sender], -1)
+
+
+@receiver(post_save, sender=Ad)
+def handle_price_stats_update(sender, instance, created, **kwargs):
+    previous_state = None if created else instance._previous_state
+    previous_entry = previous_state and prices.get_price_entry(
+            *(previous_state[field] for field in prices.PRICE_STATE_FIELDS)
+    )
+    entry = None if _is_soft_deleted(instance) else prices.get_ad_price_entry(instance)
+    prices.apply_price_change(previous_entry, entry)
+
+
+@receiver(post_delete, sender=Ad)
+def handle_price_stats_removal(sender, instance, **kwargs):
+    # A soft-deleted ad was already taken out of the stats when it was marked deleted
+    if not _is_soft_deleted(instance):
+        prices.apply_price_change(prices.get_ad_price_entry(instance), None)
+
+
+@receiver(post_save, sender=Ad)
+@receiver(post_delete, sender=Ad)
+@receiver(post_save, sender=AdImage)
+@receiver(post_delete, sender=AdImage)
+@receiver(post_save, sender=AdCategory)
+@receiver(post_delete, sender=AdCategory)
+def handle_home_feed_invalidation(sender, instance, **kwargs):
+    invalidate_home_feed()
+
+
+@receiver(post_save, sender=AdCategory)
+@receiver(post_delete, sender=AdCategory)
+@receiver(post_save, sender=AdSubCategory)
+@receiver(post_delete, sender=AdSubCategory)
+def handle_category_tree_invalidation(sender, instance, **kwargs):
+    invalidate_category_tree()
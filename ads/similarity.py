@@ -0,0 +1,117 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from ads.choices import STATUS_ACTIVE
+from ads.models import Ad, SimilarAd
+from ads.search import get_term_frequencies
+
+
+def build_tfidf_matrix(ads):
+    """
+    Vectorize ads into an L2-normalized TF-IDF matrix with one row per ad.
+
+    Terms come from the search index tokenizer, weighted per field the same way, so the name counts more than the
+    description. Term frequencies are dampened logarithmically.
+    """
+    vocabulary = {}
+    rows, columns, values = [], [], []
+    for row, ad in enumerate(ads):
+        for term, frequency in get_term_frequencies(ad).items():
+            rows.append(row)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+            values.append(1 + np.log(frequency))
+    matrix = sparse.csr_matrix((values, (rows, columns)), shape=(len(ads), len(vocabulary)), dtype=np.float64)
+
+    document_frequencies = np.bincount(matrix.indices, minlength=len(vocabulary))
+    idf = np.log((1 + len(ads)) / (1 + document_frequencies)) + 1
+    matrix = matrix @ sparse.diags(idf)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+
+def get_neighbours(matrix, rows, count):
+    """
+    Yield each of `rows` with the positions and scores of its `count` most similar other rows.
+
+    The similarities of a batch of rows stay a sparse matrix, so a batch only costs memory for the ads that share
+    a term with it, however big the catalogue is. The top `count` are then picked from each row's stored entries.
+    """
+    batch_size = settings.ADS_SIMILAR_ADS_BATCH_SIZE
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        similarities = (matrix[batch] @ transposed).tocsr()
+        for position, row in enumerate(batch):
+            row_start, row_end = similarities.indptr[position], similarities.indptr[position + 1]
+            columns = similarities.indices[row_start:row_end]
+            scores = similarities.data[row_start:row_end]
+            keep = (columns != row) & (scores > 0)
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > count:
+                top = np.argpartition(-scores, count)[:count]
+                columns, scores = columns[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            yield row, list(zip(columns[order].tolist(), scores[order].tolist()))
+
+
+@transaction.atomic
+def store_neighbours(ad_ids, neighbours):
+    SimilarAd.objects.filter(ad_id__in=[ad_ids[row] for row, _ in neighbours]).delete()
+    SimilarAd.objects.bulk_create(
+            SimilarAd(ad_id=ad_ids[row], similar_id=ad_ids[column], score=float(score))
+            for row, similar in neighbours for column, score in similar
+    )
+
+
+def store_in_batches(ad_ids, neighbours):
+    """Store neighbour lists as they are computed, ADS_SIMILAR_ADS_BATCH_SIZE ads per transaction."""
+    batch_size = settings.ADS_SIMILAR_ADS_BATCH_SIZE
+    batch, stored = [], 0
+    for item in neighbours:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            store_neighbours(ad_ids, batch)
+            stored += len(batch)
+            batch = []
+    if batch:
+        store_neighbours(ad_ids, batch)
+        stored += len(batch)
+    return stored
+
+
+def build_similar_ads(incremental=False):
+    """
+    Precompute the ADS_SIMILAR_ADS_COUNT most similar live ads of every live ad.
+
+    With `incremental`, only ads that have no neighbours yet are compared against the catalogue, along with the
+    ads they turn out to be close to, since a new ad may now belong to their lists. Returns the number of ads
+    whose neighbours were stored.
+    """
+    ads = list(
+            Ad.objects.filter(is_approved=True, status=STATUS_ACTIVE).select_related("category").order_by("created")
+    )
+    if len(ads) < 2:
+        return 0
+    ad_ids = [ad.id for ad in ads]
+    matrix = build_tfidf_matrix(ads)
+    count = settings.ADS_SIMILAR_ADS_COUNT
+
+    if not incremental:
+        SimilarAd.objects.exclude(ad__is_approved=True, ad__status=STATUS_ACTIVE).delete()
+        return store_in_batches(ad_ids, get_neighbours(matrix, list(range(len(ads))), count))
+
+    computed = set(SimilarAd.objects.filter(ad_id__in=ad_ids).values_list("ad_id", flat=True).distinct())
+    rows = [row for row, ad_id in enumerate(ad_ids) if ad_id not in computed]
+    # Similarity is symmetric, so the ads close to a new ad are the ones whose lists it may enter
+    affected = set()
+
+    def collect_affected(neighbours):
+        for row, similar in neighbours:
+            affected.update(column for column, _ in similar)
+            yield row, similar
+
+    stored = store_in_batches(ad_ids, collect_affected(get_neighbours(matrix, rows, count)))
+    return stored + store_in_batches(ad_ids, get_neighbours(matrix, sorted(affected - set(rows)), count))
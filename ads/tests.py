@@ -1,3 +1,1248 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import re
+import shutil
+import tempfile
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse_lazy
+from django.utils import timezone
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+
+from ads.choices import MODERATION_APPROVE, STATUS_ACTIVE, STATUS_DENIED, STATUS_PAUSED, STATUS_PENDING
+from ads.archive import get_archivable_ads
+from ads.favourites import get_favourite_ad_ids
+from ads.models import (
+    Ad, AdCard, AdCategory, AdImage, AdSearchDocument, AdSignature, AdSubCategory, ArchivedAd, CategoryPriceStats,
+    FavouriteAd, FeaturedRotationSlot, ModerationLog, SimilarAd,
+)
+from ads.moderation import moderate_ads
+from ads.prices import compute_price_stats, recompute_price_stats
+from ads.rotation import rotate
+from ads.serializers import CreateAdSerializer
+from ads.tracking import ViewTracker, view_tracker
+from common.choices import UPLOAD_FAILED, UPLOAD_PROCESSING, UPLOAD_READY, UPLOAD_UPLOADING
+from common.images import get_variant_names
+from common.uploads import process_staged_upload
+
+
+class AdsTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.User = get_user_model()
+        cls.user = cls.User.objects.create_user(email="seller@example.com", password="string", full_name="Seller",
+                                                phone_number="+2348000000000")
+        cls.category = AdCategory.objects.create(title="Electronics")
+
+    def setUp(self):
+        cache.clear()
+        # Warm the favourites cache so query counts only cover the endpoint under test
+        get_favourite_ad_ids(self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _create_ad(self, name, category=None, **kwargs):
+        data = {
+            "ad_creator": self.user,
+            "name": name,
+            "description": f"{name} in good condition",
+            "price": 100,
+            "location": "NG",
+            "category": category or self.category,
+            "is_approved": True,
+            "status": STATUS_ACTIVE,
+        }
+        data.update(kwargs)
+        return Ad.objects.create(**data)
+
+
+class RetrieveAllApprovedActiveAdsTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        for index in range(5):
+            ad = self._create_ad(f"Phone {index}")
+            AdImage.objects.create(ad=ad, image=f"ad_images/phone_{index}.jpg")
+            # Two ads share a timestamp so the id tie-breaker is exercised.
+            AdCard.objects.filter(ad=ad).update(created=now - timedelta(minutes=min(index, 3)))
+
+    def test_pages_through_all_ads_with_cursor(self):
+        names = []
+        cursor = None
+        while True:
+            params = {"page_size": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get(reverse_lazy("all_ads"), params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            names.extend(ad["name"] for ad in response.data["data"])
+            cursor = response.data["next_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(sorted(names), [f"Phone {index}" for index in range(5)])
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse_lazy("all_ads"), {"page_size": 5})
+        self.assertEqual(len(response.data["data"]), 5)
+        self.assertEqual(len(queries), 1)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse_lazy("all_ads"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AdsCategoryViewTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_category = AdCategory.objects.create(title="Vehicles")
+        for index in range(4):
+            self._create_ad(f"Phone {index}")
+        for index in range(2):
+            self._create_ad(f"Car {index}", category=self.other_category, featured=True)
+        self._create_ad("Pending phone", is_approved=False)
+
+    def _feed_by_title(self, response):
+        return {block["title"]: block for block in response.data["data"]["all_ads_by_category"]}
+
+    def test_returns_top_ads_and_exact_counts_per_category(self):
+        response = self.client.get(reverse_lazy("ads_and_categories"), {"ads_per_category": 3})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        feed = self._feed_by_title(response)
+        self.assertEqual(feed["Electronics"]["num_ads"], 4)
+        self.assertEqual([ad["name"] for ad in feed["Electronics"]["ads"]], ["Phone 3", "Phone 2", "Phone 1"])
+        self.assertEqual(feed["Vehicles"]["num_ads"], 2)
+        self.assertEqual(response.data["data"]["featured_ads"]["count_featured_ads"], 2)
+
+    def test_query_count_does_not_depend_on_number_of_categories(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse_lazy("ads_and_categories"))
+        for index in range(3):
+            category = AdCategory.objects.create(title=f"Category {index}")
+            self._create_ad(f"Item {index}", category=category)
+        with CaptureQueriesContext(connection) as more_categories_queries:
+            self.client.get(reverse_lazy("ads_and_categories"))
+        self.assertEqual(len(queries), len(more_categories_queries))
+
+    def test_snapshot_is_served_from_cache_until_an_ad_changes(self):
+        self.client.get(reverse_lazy("ads_and_categories"))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse_lazy("ads_and_categories"))
+        self.assertEqual(len(queries), 0)
+
+        self._create_ad("Phone 4")
+        response = self.client.get(reverse_lazy("ads_and_categories"))
+        self.assertEqual(self._feed_by_title(response)["Electronics"]["num_ads"], 5)
+
+
+class AdSearchTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.phone = self._create_ad("Samsung phone", description="Barely used smartphone")
+        self.case = self._create_ad("Leather case", description="Fits any samsung phone")
+        self.car = self._create_ad("Toyota car", description="Low mileage")
+
+    def _search(self, query):
+        response = self.client.get(reverse_lazy("ads_search_and_filters"), {"search": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [ad["name"] for ad in response.data["data"]]
+
+    def test_ranks_name_matches_above_description_matches(self):
+        self.assertEqual(self._search("samsung phone"), ["Samsung phone", "Leather case"])
+
+    def test_matches_the_last_term_as_a_prefix(self):
+        self.assertEqual(self._search("toy"), ["Toyota car"])
+
+    def test_prefix_expansion_is_bounded(self):
+        self.assertEqual(self._search("to"), [])
+        self._create_ad("Toys bundle", description="Wooden")
+        self.assertEqual(set(self._search("toy")), {"Toyota car", "Toys bundle"})
+        # Only the shortest completion, "toys", is expanded
+        with override_settings(ADS_SEARCH_MAX_PREFIX_TERMS=1):
+            self.assertEqual(self._search("toy"), ["Toys bundle"])
+
+    def test_index_follows_ad_changes(self):
+        self.car.name = "Honda car"
+        self.car.save()
+        self.assertEqual(self._search("toyota"), [])
+        self.assertEqual(self._search("honda"), ["Honda car"])
+
+        self.phone.status = STATUS_PAUSED
+        self.phone.save()
+        self.assertEqual(self._search("samsung"), ["Leather case"])
+
+        self.case.delete()
+        self.assertEqual(self._search("samsung"), [])
+
+
+class AdSearchFacetsTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_category = AdCategory.objects.create(title="Vehicles")
+        self._create_ad("Cheap phone", price=20)
+        self._create_ad("Good phone", price=80, location="GB", featured=True)
+        self._create_ad("Used car", price=3000, category=self.other_category)
+
+    def test_returns_facet_counts_from_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse_lazy("ads_search_and_filters"), {"price_buckets": "50,1000"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        facets = response.data["facets"]
+        self.assertEqual({row["title"]: row["count"] for row in facets["category"]},
+                         {"Electronics": 2, "Vehicles": 1})
+        self.assertEqual({row["code"]: row["count"] for row in facets["location"]}, {"NG": 2, "GB": 1})
+        self.assertEqual({row["featured"]: row["count"] for row in facets["featured"]}, {True: 1, False: 2})
+        self.assertEqual([row["count"] for row in facets["price"]], [1, 1, 1])
+        # The ads, their images and the facets
+        self.assertEqual(len(queries), 3)
+
+    def test_facets_follow_the_filters(self):
+        response = self.client.get(reverse_lazy("ads_search_and_filters"), {"category": self.other_category.id})
+        self.assertEqual([ad["name"] for ad in response.data["data"]], ["Used car"])
+        self.assertEqual([row["title"] for row in response.data["facets"]["category"]], ["Vehicles"])
+
+    def test_price_buckets_that_do_not_fit_a_price_fall_back_to_the_defaults(self):
+        url = reverse_lazy("ads_search_and_filters")
+        default_buckets = self.client.get(url).data["facets"]["price"]
+        for price_buckets in ("1e5000", "50,100000000", "0.001"):
+            response = self.client.get(url, {"price_buckets": price_buckets})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["facets"]["price"], default_buckets)
+
+
+class AdCardTestCase(AdsTestCase):
+    def test_card_follows_ad_image_and_category_changes(self):
+        ad = self._create_ad("Phone")
+        AdImage.objects.create(ad=ad, image="ad_images/phone.jpg")
+        self.category.title = "Gadgets"
+        self.category.save()
+        ad.price = 250
+        ad.save()
+
+        card = AdCard.objects.get(ad=ad)
+        self.assertEqual(card.category_title, "Gadgets")
+        self.assertEqual(card.price, 250)
+        self.assertEqual(card.location_name, "Nigeria")
+        self.assertEqual(len(card.images), 1)
+        self.assertTrue(card.images[0].endswith("ad_images/phone.jpg"))
+
+        ad.delete()
+        self.assertFalse(AdCard.objects.exists())
+
+    def test_list_endpoints_read_a_single_table(self):
+        for index in range(3):
+            ad = self._create_ad(f"Phone {index}")
+            AdImage.objects.create(ad=ad, image=f"ad_images/phone_{index}.jpg")
+            FavouriteAd.objects.create(customer=self.user, ad=ad)
+        for url_name in ("all_ads", "all_creator_ads"):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse_lazy(url_name))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(all("ads_adimage" not in query["sql"] for query in queries.captured_queries))
+        response = self.client.get(reverse_lazy("favourite_ads_list"))
+        self.assertEqual([len(ad["images"]) for ad in response.data["data"]], [1, 1, 1])
+
+
+class AdImageVariantsTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root,
+                                                   UPLOAD_STAGING_ROOT=os.path.join(self.media_root, "staging"))
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    @staticmethod
+    def _upload(name="photo.jpg", size=(2000, 1000)):
+        exif = Image.Exif()
+        exif[0x010F] = "Camera maker"
+        buffer = BytesIO()
+        Image.new("RGB", size, "red").save(buffer, "JPEG", exif=exif)
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/jpeg")
+
+    def test_variants_are_resized_and_stripped_of_exif(self):
+        ad_image = AdImage.objects.create(ad=self._create_ad("Phone"), image=self._upload())
+        ad_image.refresh_from_db()
+        self.assertEqual(ad_image.variants["thumbnail"]["width"], 160)
+        self.assertEqual(ad_image.variants["full"]["height"], 640)
+        with ad_image.image.storage.open(ad_image.variants["card"]["jpeg"]) as variant:
+            image = Image.open(variant)
+            self.assertEqual(image.size, (480, 240))
+            self.assertEqual(len(image.getexif()), 0)
+
+        srcset = AdCard.objects.get(ad=ad_image.ad).images_srcset[0]
+        self.assertEqual(set(srcset), {"original", "thumbnail", "card", "full"})
+        self.assertTrue(srcset["thumbnail"]["webp"].endswith(".webp"))
+
+    def test_command_builds_variants_of_existing_images(self):
+        ad_image = AdImage.objects.create(ad=self._create_ad("Phone"), image=self._upload())
+        # An image stored before variants were built
+        AdImage.objects.filter(pk=ad_image.pk).update(variants={})
+        AdCard.objects.filter(ad=ad_image.ad).update(images_srcset=[{"original": ad_image.image.url}])
+
+        out = StringIO()
+        call_command("build_image_variants", stdout=out)
+        self.assertIn("Built variants for 1 ad images", out.getvalue())
+        ad_image.refresh_from_db()
+        self.assertEqual(ad_image.variants["source"], ad_image.image.name)
+        self.assertIn("thumbnail", AdCard.objects.get(ad=ad_image.ad).images_srcset[0])
+
+        call_command("build_image_variants", stdout=out)
+        self.assertIn("Built variants for 0 ad images", out.getvalue())
+
+    def test_replacing_the_image_deletes_the_old_variants(self):
+        ad_image = AdImage.objects.create(ad=self._create_ad("Phone"), image=self._upload())
+        ad_image.refresh_from_db()
+        old_names = get_variant_names(ad_image.variants)
+        self.assertEqual(len(old_names), 6)
+
+        ad_image.image = self._upload("replacement.jpg")
+        ad_image.save()
+        storage = ad_image.image.storage
+        self.assertFalse(any(storage.exists(name) for name in old_names))
+        self.assertTrue(all(storage.exists(name) for name in get_variant_names(ad_image.variants)))
+
+    def _create_ad_with_images(self):
+        data = {
+            "name": "New phone",
+            "description": "Never used",
+            "price": 300,
+            "location": "NG",
+            "category": str(self.category.id),
+            "images": [self._upload("one.jpg"), self._upload("two.jpg")],
+        }
+        response = self.client.post(reverse_lazy("create_ads"), data, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def test_create_ad_builds_variants_for_uploaded_images(self):
+        response = self._create_ad_with_images()
+        self.assertEqual(response.data["data"]["upload_status"], UPLOAD_READY)
+        self.assertTrue(all(image.variants.get("thumbnail") for image in AdImage.objects.all()))
+        self.assertEqual(len(AdCard.objects.get(name="New phone").images_srcset), 2)
+
+    @override_settings(ASYNC_UPLOADS=True)
+    def test_async_create_returns_before_the_worker_uploads_the_images(self):
+        response = self._create_ad_with_images()
+        self.assertEqual(response.data["data"]["upload_status"], UPLOAD_PROCESSING)
+        self.assertEqual(response.data["data"]["images"], [])
+        staged_images = list(AdImage.objects.all())
+        self.assertTrue(all(os.path.exists(image.staged_file) for image in staged_images))
+
+        for staged_image in staged_images:
+            process_staged_upload("ads.AdImage", staged_image.pk)
+            ad_image = AdImage.objects.get(pk=staged_image.pk)
+            self.assertEqual(ad_image.upload_status, UPLOAD_READY)
+            self.assertTrue(ad_image.image.storage.exists(ad_image.image.name))
+            self.assertFalse(os.path.exists(staged_image.staged_file))
+        self.assertEqual(len(AdCard.objects.get(name="New phone").images_srcset), 2)
+
+    @override_settings(ASYNC_UPLOADS=True)
+    def test_staged_uploads_are_claimed_once_and_failures_retried(self):
+        self._create_ad_with_images()
+        staged_image = AdImage.objects.first()
+        # Another worker already claimed the upload
+        AdImage.objects.filter(pk=staged_image.pk).update(upload_status=UPLOAD_UPLOADING, updated=timezone.now())
+        process_staged_upload("ads.AdImage", staged_image.pk)
+        self.assertEqual(AdImage.objects.get(pk=staged_image.pk).upload_status, UPLOAD_UPLOADING)
+
+        AdImage.objects.filter(pk=staged_image.pk).update(upload_status=UPLOAD_PROCESSING)
+        with mock.patch("django.db.models.fields.files.FieldFile.save", side_effect=OSError):
+            process_staged_upload("ads.AdImage", staged_image.pk)
+        self.assertEqual(AdImage.objects.get(pk=staged_image.pk).upload_status, UPLOAD_FAILED)
+        self.assertTrue(os.path.exists(staged_image.staged_file))
+
+        out = StringIO()
+        call_command("process_staged_uploads", stdout=out)
+        self.assertIn("Processed 2 staged ad images", out.getvalue())
+        self.assertEqual(set(AdImage.objects.values_list("upload_status", flat=True)), {UPLOAD_READY})
+        self.assertFalse(os.path.exists(staged_image.staged_file))
+
+
+class FavouritedFlagTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.liked = self._create_ad("Liked phone")
+        self.other = self._create_ad("Other phone")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse_lazy("add_favourite_ad", kwargs={"ad_id": self.liked.id}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_list_endpoints_flag_favourited_ads(self):
+        response = self.client.get(reverse_lazy("all_ads"))
+        self.assertEqual({ad["name"]: ad["is_favourited"] for ad in response.data["data"]},
+                         {"Liked phone": True, "Other phone": False})
+
+        response = self.client.get(reverse_lazy("ads_and_categories"))
+        ads = response.data["data"]["all_ads_by_category"][0]["ads"]
+        self.assertEqual({ad["name"]: ad["is_favourited"] for ad in ads}, {"Liked phone": True, "Other phone": False})
+
+        response = self.client.get(reverse_lazy("ads_search_and_filters"), {"search": "phone"})
+        self.assertEqual({ad["name"]: ad["is_favourited"] for ad in response.data["data"]},
+                         {"Liked phone": True, "Other phone": False})
+
+    def test_cached_favourites_are_dropped_when_they_change(self):
+        self.client.get(reverse_lazy("all_ads"))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse_lazy("all_ads"))
+        self.assertEqual(len(queries), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FavouriteAd.objects.create(customer=self.user, ad=self.other)
+        response = self.client.get(reverse_lazy("all_ads"))
+        self.assertTrue(all(ad["is_favourited"] for ad in response.data["data"]))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FavouriteAd.objects.filter(ad=self.liked).delete()
+        response = self.client.get(reverse_lazy("all_ads"))
+        self.assertEqual({ad["name"]: ad["is_favourited"] for ad in response.data["data"]},
+                         {"Liked phone": False, "Other phone": True})
+
+
+class AdCountersTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_user = self.User.objects.create_user(
+                email="other@example.com", password="password", full_name="Other User", phone_number="+8801700000001"
+        )
+        self.popular = self._create_ad("Popular phone")
+        self.newest = self._create_ad("Newest phone")
+        FavouriteAd.objects.create(customer=self.user, ad=self.popular)
+        FavouriteAd.objects.create(customer=self.other_user, ad=self.popular)
+
+    def test_favourites_update_ad_and_card_counters(self):
+        self.assertEqual(Ad.objects.get(pk=self.popular.pk).favourite_count, 2)
+        self.assertEqual(AdCard.objects.get(pk=self.popular.pk).favourite_count, 2)
+
+        FavouriteAd.objects.filter(customer=self.other_user).delete()
+        self.assertEqual(Ad.objects.get(pk=self.popular.pk).favourite_count, 1)
+        self.assertEqual(AdCard.objects.get(pk=self.popular.pk).favourite_count, 1)
+
+    def test_saving_a_stale_instance_keeps_counters(self):
+        self.popular.name = "Popular smartphone"
+        self.popular.save()
+        ad = Ad.objects.get(pk=self.popular.pk)
+        self.assertEqual((ad.name, ad.favourite_count), ("Popular smartphone", 2))
+        self.assertEqual(AdCard.objects.get(pk=self.popular.pk).favourite_count, 2)
+
+    def test_reconcile_repairs_drifted_counters(self):
+        Ad.objects.filter(pk=self.popular.pk).update(favourite_count=7)
+        AdCard.objects.filter(pk=self.newest.pk).update(favourite_count=3)
+        call_command("reconcile_ad_counters", stdout=StringIO())
+        self.assertEqual(Ad.objects.get(pk=self.popular.pk).favourite_count, 2)
+        self.assertEqual(AdCard.objects.get(pk=self.popular.pk).favourite_count, 2)
+        self.assertEqual(AdCard.objects.get(pk=self.newest.pk).favourite_count, 0)
+
+    def test_popular_ordering_pages_by_favourite_count(self):
+        response = self.client.get(reverse_lazy("all_ads"), {"ordering": "popular", "page_size": 1})
+        self.assertEqual([ad["name"] for ad in response.data["data"]], ["Popular phone"])
+        self.assertEqual(response.data["data"][0]["favourite_count"], 2)
+
+        response = self.client.get(reverse_lazy("all_ads"), {
+            "ordering": "popular", "page_size": 1, "cursor": response.data["next_cursor"],
+        })
+        self.assertEqual([ad["name"] for ad in response.data["data"]], ["Newest phone"])
+        self.assertIsNone(response.data["next_cursor"])
+
+        response = self.client.get(reverse_lazy("all_ads"), {"ordering": "cheapest"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(ADS_VIEW_FLUSH_INTERVAL=0, ADS_VIEW_FLUSH_BATCH_SIZE=2, ADS_VIEW_BUFFER_MAX_ADS=3)
+class ViewTrackerTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ads = [self._create_ad(f"Phone {number}") for number in range(4)]
+        self.tracker = ViewTracker()
+
+    def test_views_are_buffered_and_flushed_in_batches(self):
+        for ad, views in zip(self.ads, (2, 2, 1)):
+            for _ in range(views):
+                self.tracker.record(ad.id)
+        self.tracker.record(self.ads[3].id)
+        self.assertEqual(Ad.objects.get(pk=self.ads[0].pk).view_count, 0)
+        self.assertEqual(self.tracker.get_stats(), {"pending": 5, "flushed": 0, "dropped": 1})
+
+        # One UPDATE per counter table for each group of ads sharing a view count and batch
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.tracker.flush(), 5)
+        self.assertEqual(len([query for query in queries if query["sql"].startswith("UPDATE")]), 4)
+        self.assertEqual(
+                [Ad.objects.get(pk=ad.pk).view_count for ad in self.ads], [2, 2, 1, 0]
+        )
+        self.assertEqual(AdCard.objects.get(pk=self.ads[0].pk).view_count, 2)
+        self.assertEqual(self.tracker.get_stats(), {"pending": 0, "flushed": 5, "dropped": 1})
+
+    def test_views_that_fail_to_be_written_are_retried(self):
+        for ad in self.ads[:2]:
+            self.tracker.record(ad.id)
+        with mock.patch("ads.tracking.increment_ad_counters", side_effect=RuntimeError):
+            self.assertEqual(self.tracker.flush(), 0)
+        self.assertEqual(self.tracker.get_stats(), {"pending": 2, "flushed": 0, "dropped": 0})
+
+        self.assertEqual(self.tracker.flush(), 2)
+        self.assertEqual([Ad.objects.get(pk=ad.pk).view_count for ad in self.ads[:2]], [1, 1])
+
+    @override_settings(ADS_VIEW_FLUSH_INTERVAL=0)
+    def test_ad_details_records_views_of_other_users(self):
+        # Records on the global view_tracker, which must never start its background flusher during the tests
+        other_user = self.User.objects.create_user(
+                email="viewer@example.com", password="password", full_name="Viewer", phone_number="+8801700000002"
+        )
+        url = reverse_lazy("ad_details", kwargs={"ad_id": self.ads[0].id})
+        view_tracker.flush()
+        self.client.get(url)
+        self.client.force_authenticate(other_user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any(query["sql"].startswith("UPDATE") for query in queries))
+        self.assertEqual(view_tracker.get_stats()["pending"], 1)
+
+        view_tracker.flush()
+        self.assertEqual(Ad.objects.get(pk=self.ads[0].pk).view_count, 1)
+
+
+class CategoryTreeTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        AdSubCategory.objects.create(category=self.category, title="Phones")
+        self.url = reverse_lazy("categories_and_sub_categories")
+
+    def test_tree_is_cached_and_revalidated_with_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["data"], [
+            {"title": "Electronics", "sub_category": [{"title": "Phones"}], "image": None},
+        ])
+        etag = response["ETag"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response["ETag"], etag)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse(response.content)
+
+        # If-None-Match compares weakly, so a validator weakened by a compressing proxy still matches
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"other", W/{etag}')
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_category_changes_bump_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        AdSubCategory.objects.create(category=self.category, title="Laptops")
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["data"][0]["sub_category"]), 2)
+
+    def test_etag_is_derived_from_the_tree(self):
+        etag = self.client.get(self.url)["ETag"]
+        # Another worker with its own cache hands out the same ETag for the same categories
+        cache.clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+@override_settings(ADS_VIEW_FLUSH_INTERVAL=0)
+class AdDetailConditionalGetTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ad = self._create_ad("Phone")
+        self.url = reverse_lazy("ad_details", kwargs={"ad_id": self.ad.id})
+
+    def test_unchanged_ad_is_not_sent_again(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(len(queries), 2)
+
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_ad_and_image_changes_change_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.ad.name = "Smartphone"
+        self.ad.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["name"], "Smartphone")
+
+        etag = response["ETag"]
+        AdImage.objects.create(ad=self.ad)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+
+@override_settings(ADS_MODERATION_BATCH_SIZE=2)
+class AdModerationTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.moderator = self.User.objects.create_user(
+                email="moderator@example.com", password="password", full_name="Moderator",
+                phone_number="+8801700000003", is_staff=True
+        )
+        self.pending = [
+            self._create_ad(f"Pending phone {number}", is_approved=False, status=STATUS_PENDING) for number in range(3)
+        ]
+        self.paused = self._create_ad("Paused phone", is_approved=False, status=STATUS_PAUSED)
+        self.url = reverse_lazy("moderate_ads")
+        self.client.force_authenticate(self.moderator)
+
+    def test_approve_by_ids_updates_ads_cards_index_and_feed(self):
+        self.assertEqual(self.client.get(reverse_lazy("ads_and_categories")).data["data"]["featured_ads"]
+                         ["count_featured_ads"], 0)
+        ad_ids = [str(ad.id) for ad in self.pending] + [str(self.paused.id)]
+        response = self.client.post(self.url, {"action": MODERATION_APPROVE, "ad_ids": ad_ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["ads_count"], 4)
+
+        self.assertEqual(Ad.objects.filter(is_approved=True, status=STATUS_ACTIVE).count(), 3)
+        self.assertEqual(AdCard.objects.filter(is_approved=True, status=STATUS_ACTIVE).count(), 3)
+        self.assertEqual(AdCard.objects.get(pk=self.paused.pk).status, STATUS_PAUSED)
+        self.assertEqual(AdSearchDocument.objects.count(), 3)
+        self.assertEqual(ModerationLog.objects.get().moderator, self.moderator)
+        response = self.client.get(reverse_lazy("ads_and_categories"))
+        self.assertEqual(response.data["data"]["all_ads_by_category"][0]["num_ads"], 3)
+
+    def test_deny_by_filter_only_touches_pending_ads(self):
+        response = self.client.post(self.url, {"action": "deny", "filters": {"category": str(self.category.id)}},
+                                    format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(AdCard.objects.filter(status=STATUS_DENIED).values_list("pk", flat=True)),
+                         {ad.pk for ad in self.pending})
+        self.assertEqual(Ad.objects.get(pk=self.paused.pk).status, STATUS_PAUSED)
+
+    def test_approve_after_deny_publishes_the_ads(self):
+        ad_ids = [str(ad.id) for ad in self.pending]
+        self.client.post(self.url, {"action": "deny", "ad_ids": ad_ids}, format="json")
+        response = self.client.post(self.url, {"action": MODERATION_APPROVE, "ad_ids": ad_ids}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(Ad.objects.filter(is_approved=True, status=STATUS_ACTIVE).count(), 3)
+        self.assertEqual(AdCard.objects.filter(is_approved=True, status=STATUS_ACTIVE).count(), 3)
+        self.assertFalse(Ad.objects.filter(status=STATUS_DENIED).exists())
+        self.assertEqual(AdSearchDocument.objects.count(), 3)
+
+    def test_only_staff_can_moderate(self):
+        response = self.client.post(self.url, {"action": "approve"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.post(self.url, {"action": "approve", "ad_ids": [str(self.paused.id)]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CategoryCountersTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_category = AdCategory.objects.create(title="Vehicles")
+        for title in ("Phones", "Laptops", "Cameras"):
+            AdSubCategory.objects.create(category=self.category, title=title)
+        self.ads = [self._create_ad(f"Phone {number}") for number in range(2)]
+
+    def _changelist_counts(self):
+        request = RequestFactory().get("/admin/ads/adcategory/")
+        request.user = self.User(is_staff=True, is_superuser=True)
+        model_admin = admin.site._registry[AdCategory]
+        return {
+            category.title: (category.ads_count, category.sub_categories_count)
+            for category in model_admin.get_queryset(request)
+        }
+
+    def test_changelist_counts_follow_ads_and_sub_categories(self):
+        self.assertEqual(self._changelist_counts(), {"Electronics": (2, 3), "Vehicles": (0, 0)})
+
+        self.ads[0].category = self.other_category
+        self.ads[0].save()
+        self.ads[1].delete()
+        AdSubCategory.objects.filter(title="Cameras").delete()
+        self.category.title = "Gadgets"
+        self.category.save()
+        self.assertEqual(self._changelist_counts(), {"Gadgets": (0, 2), "Vehicles": (1, 0)})
+
+    def test_reconcile_recounts_categories(self):
+        AdCategory.objects.update(ads_count=9, sub_categories_count=9)
+        call_command("reconcile_ad_counters", stdout=StringIO())
+        self.assertEqual(self._changelist_counts(), {"Electronics": (2, 3), "Vehicles": (0, 0)})
+
+
+class DuplicateAdTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.description = ("Barely used iPhone 12 Pro, 128GB, blue, with box. Charger included, no scratches, "
+                            "battery health 92%.")
+        self.ad = self._create_ad("iPhone 12 Pro", description=self.description)
+        self.data = {"name": "iPhone 13", "description": "Brand new", "price": 100, "location": "NG",
+                     "category": str(self.category.id)}
+
+    def test_normalized_name_duplicates_are_rejected_through_the_index(self):
+        response = self.client.post(reverse_lazy("create_ads"), {**self.data, "name": "  IPHONE 12   pro!"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["message"], "An ad with this name already exists.")
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse_lazy("create_ads"), self.data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn('"name_hash" =', queries[0]["sql"])
+
+    def test_ad_can_keep_its_own_name_on_update(self):
+        request = APIRequestFactory().patch("/")
+        serializer = CreateAdSerializer(self.ad, data={"name": "iPhone 12 Pro"}, partial=True,
+                                        context={"request": request})
+        self.assertTrue(serializer.is_valid())
+
+    @override_settings(ADS_NEAR_DUPLICATE_DETECTION=True)
+    def test_near_duplicates_by_the_same_seller_are_rejected(self):
+        self.ad.save()
+        self.assertEqual(AdSignature.objects.count(), 1)
+        response = self.client.post(reverse_lazy("create_ads"), {
+            **self.data, "name": "iPhone 12 Pro blue", "description": self.description.replace("92%", "91%"),
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post(reverse_lazy("create_ads"), self.data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+@skipUnless(connection.vendor == "sqlite", "Reads SQLite query plans")
+@skipUnlessDBFeature("supports_partial_indexes")
+class ListQueryIndexTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_category = AdCategory.objects.create(title="Vehicles")
+        for number in range(3):
+            ad = self._create_ad(f"Phone {number}", featured=number == 0)
+            FavouriteAd.objects.create(customer=self.user, ad=ad)
+        self._create_ad("Car", category=self.other_category)
+
+    def _get_query_plans(self, url, params=None):
+        """EXPLAIN QUERY PLAN of every query of an endpoint that reads the ad or ad card tables."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        plans = []
+        for query in queries:
+            if query["sql"].startswith("SELECT") and re.search(r'FROM "ads_ad(card)?"', query["sql"]):
+                with connection.cursor() as cursor:
+                    cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                    plans.append([row[-1] for row in cursor.fetchall()])
+        self.assertTrue(plans)
+        return plans
+
+    def assertUsesIndexes(self, url, params=None, indexes=(), sorted_by_index=False):
+        plans = self._get_query_plans(url, params)
+        for plan in plans:
+            for step in plan:
+                if re.match(r"(SCAN|SEARCH) ads_ad(card)?\b", step):
+                    self.assertIn("USING", step, f"{url} {params} scans a table: {plan}")
+        used = " ".join(step for plan in plans for step in plan)
+        for index in indexes:
+            self.assertIn(f"INDEX {index}", used)
+        if sorted_by_index:
+            self.assertNotIn("TEMP B-TREE FOR ORDER BY", used)
+
+    def test_all_ads_pages_are_read_in_index_order(self):
+        self.assertUsesIndexes(reverse_lazy("all_ads"), indexes=["ads_card_live_idx"], sorted_by_index=True)
+        self.assertUsesIndexes(reverse_lazy("all_ads"), {"ordering": "popular"}, indexes=["ads_card_popular_idx"],
+                               sorted_by_index=True)
+
+    def test_home_feed_uses_live_indexes(self):
+        self.assertUsesIndexes(reverse_lazy("ads_and_categories"),
+                               indexes=["ads_card_live_category_idx", "ads_card_live_featured_idx"])
+
+    def test_filtered_ads_use_indexes(self):
+        url = reverse_lazy("ads_search_and_filters")
+        self.assertUsesIndexes(url, indexes=["ads_ad_status_idx"])
+        self.assertUsesIndexes(url, {"category": str(self.category.id)}, indexes=["ads_ad_live_category_idx"])
+        self.assertUsesIndexes(url, {"location": "NG"}, indexes=["ads_ad_live_location_idx"])
+        self.assertUsesIndexes(url, {"featured": "true"})
+        self.assertUsesIndexes(url, {"search": "phone"})
+
+    def test_creator_and_favourite_ads_use_indexes(self):
+        self.assertUsesIndexes(reverse_lazy("all_creator_ads"), indexes=["ads_card_creator_idx"],
+                               sorted_by_index=True)
+        self.assertUsesIndexes(reverse_lazy("favourite_ads_list"))
+
+
+class PartialIndexFallbackTestCase(AdsTestCase):
+    def _get_index_sql(self, model, name):
+        index = next(index for index in model._meta.indexes if index.name == name)
+        return str(index.create_sql(model, connection.schema_editor(collect_sql=True)))
+
+    def test_live_indexes_lead_with_the_condition_columns_without_partial_indexes(self):
+        with mock.patch.object(connection.features, "supports_partial_indexes", False):
+            for model, name in [(Ad, "ads_ad_live_category_idx"), (AdCard, "ads_card_popular_idx")]:
+                sql = self._get_index_sql(model, name)
+                self.assertNotIn("WHERE", sql)
+                self.assertRegex(sql, r'\("is_approved", "status", ')
+            self.assertRegex(self._get_index_sql(AdCard, "ads_card_live_featured_idx"),
+                             r'\("is_approved", "status", "featured", "created" DESC\)')
+
+    @skipUnlessDBFeature("supports_partial_indexes")
+    def test_live_indexes_are_partial_where_supported(self):
+        sql = self._get_index_sql(AdCard, "ads_card_live_idx")
+        self.assertIn("WHERE", sql)
+        self.assertRegex(sql, r'\("created" DESC, "ad_id" DESC\)')
+
+
+class CountryFilterTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self._create_ad("Lagos phone", location="NG")
+        self._create_ad("Dhaka phone", location="BD")
+        self._create_ad("Kathmandu phone", location="NP")
+        self.url = reverse_lazy("ads_search_and_filters")
+
+    def _filtered_names(self, location):
+        response = self.client.get(self.url, {"location": location})
+        return {ad["name"] for ad in response.data["data"]}
+
+    def test_countries_match_exactly_by_code_alpha3_or_name(self):
+        self.assertEqual(self._filtered_names("N"), set())
+        self.assertEqual(self._filtered_names("ng"), {"Lagos phone"})
+        self.assertEqual(self._filtered_names("BGD"), {"Dhaka phone"})
+        self.assertEqual(self._filtered_names("nepal"), {"Kathmandu phone"})
+
+    def test_several_countries_are_filtered_with_in(self):
+        self.assertEqual(self._filtered_names("NG, Bangladesh, Atlantis"), {"Lagos phone", "Dhaka phone"})
+        self.assertEqual(self._filtered_names("Atlantis"), set())
+
+
+@override_settings(ADS_FEATURED_SLOT_SIZE=2, ADS_FEATURED_SLOT_MINUTES=15)
+class FeaturedRotationTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.heavy = self._create_ad("Heavy phone", featured=True, featured_weight=2)
+        self.light = [self._create_ad(f"Light phone {number}", featured=True) for number in range(2)]
+        self._create_ad("Plain phone")
+
+    def test_rotation_shares_slots_by_weight(self):
+        schedule = rotate({"heavy": 2, "first": 1, "second": 1}, slots=8, slot_size=1)
+        self.assertEqual(Counter(ad_id for slot in schedule for ad_id in slot),
+                         {"heavy": 4, "first": 2, "second": 2})
+
+        schedule = rotate({"heavy": 2, "first": 1, "second": 1}, slots=4, slot_size=2)
+        self.assertTrue(all(len(set(slot)) == 2 for slot in schedule))
+
+    def test_home_feed_shows_the_current_slot(self):
+        call_command("schedule_featured_rotation", hours=1, stdout=StringIO())
+        self.assertEqual(FeaturedRotationSlot.objects.count(), 4)
+        current_slot = FeaturedRotationSlot.objects.get(starts_at__lte=timezone.now(), ends_at__gt=timezone.now())
+
+        response = self.client.get(reverse_lazy("ads_and_categories"))
+        featured_ads = response.data["data"]["featured_ads"]
+        self.assertEqual([str(ad["id"]) for ad in featured_ads["ads"]], current_slot.ad_ids)
+        self.assertEqual(featured_ads["count_featured_ads"], 3)
+
+    def test_newest_featured_ads_fill_the_block_without_a_schedule(self):
+        response = self.client.get(reverse_lazy("ads_and_categories"))
+        self.assertEqual([ad["name"] for ad in response.data["data"]["featured_ads"]["ads"]],
+                         ["Light phone 1", "Light phone 0"])
+
+
+@override_settings(ADS_SIMILAR_ADS_COUNT=2)
+class SimilarAdsTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cars = AdCategory.objects.create(title="Cars")
+        self.phone = self._create_ad("Samsung galaxy phone")
+        self.other_phone = self._create_ad("Samsung galaxy phone cover")
+        self.car = self._create_ad("Toyota corolla sedan", category=self.cars)
+        self.other_car = self._create_ad("Toyota corolla hatchback", category=self.cars)
+
+    def _similar_names(self, ad):
+        return [similar_ad.similar.name for similar_ad in SimilarAd.objects.filter(ad=ad).select_related("similar")]
+
+    def test_build_ranks_the_closest_ads_first(self):
+        call_command("build_similar_ads", stdout=StringIO())
+        self.assertEqual(self._similar_names(self.phone)[0], "Samsung galaxy phone cover")
+        self.assertEqual(self._similar_names(self.car)[0], "Toyota corolla hatchback")
+        self.assertTrue(all(len(self._similar_names(ad)) <= 2 for ad in Ad.objects.all()))
+
+    def test_incremental_build_adds_new_ads_to_their_neighbours(self):
+        call_command("build_similar_ads", stdout=StringIO())
+        new_car = self._create_ad("Toyota corolla sedan 2015", category=self.cars)
+        call_command("build_similar_ads", incremental=True, stdout=StringIO())
+        self.assertEqual(self._similar_names(new_car)[0], "Toyota corolla sedan")
+        self.assertEqual(self._similar_names(self.car)[0], "Toyota corolla sedan 2015")
+
+    def test_endpoint_lists_live_similar_ads_in_one_query(self):
+        call_command("build_similar_ads", stdout=StringIO())
+        Ad.objects.filter(pk=self.other_car.pk).update(status=STATUS_PAUSED)
+        AdCard.objects.filter(ad=self.other_car).update(status=STATUS_PAUSED)
+        url = reverse_lazy("similar_ads", kwargs={"ad_id": self.car.id})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("Toyota corolla hatchback", [ad["name"] for ad in response.data["data"]])
+
+        response = self.client.get(reverse_lazy("similar_ads", kwargs={"ad_id": "not-an-ad"}))
+        self.assertEqual(response.data["data"], [])
+
+
+class ExportAdsTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(5):
+            self._create_ad(f"Phone {index}")
+        self._create_ad("Paused phone", status=STATUS_PAUSED)
+
+    def test_ndjson_export_streams_live_ads_in_chunks(self):
+        with override_settings(ADS_EXPORT_CHUNK_SIZE=2), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse_lazy("export_ads"))
+            lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual([json.loads(line)["name"] for line in lines], [f"Phone {index}" for index in range(4, -1, -1)])
+        # Three chunks of at most two rows, plus the empty one that ends the export
+        self.assertEqual(len([query for query in queries if "ads_adcard" in query["sql"]]), 4)
+
+    def test_csv_export(self):
+        response = self.client.get(reverse_lazy("export_ads"), {"output": "csv"})
+        rows = list(csv.DictReader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["name"], "Phone 4")
+        self.assertEqual(json.loads(rows[0]["images"]), [])
+
+        response = self.client.get(reverse_lazy("export_ads"), {"output": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_command_exports_to_stdout(self):
+        out = StringIO()
+        call_command("export_ads", chunk_size=2, stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
+
+
+class ImportAdsTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self._create_ad("Existing phone")
+
+    def _upload(self, content, file_format="ndjson"):
+        upload = SimpleUploadedFile(f"ads.{file_format}", content.encode())
+        return self.client.post(reverse_lazy("import_ads"), {"file": upload, "file_format": file_format},
+                                format="multipart")
+
+    def test_ndjson_import_reports_rejected_rows(self):
+        rows = [
+            {"name": "Laptop", "description": "Barely used", "price": "500", "location": "NG",
+             "category": str(self.category.id)},
+            {"name": "Camera", "description": "With lens", "price": "250", "location": "BD", "category": "electronics"},
+            {"name": "EXISTING phone!", "description": "Copy", "price": "10", "location": "NG",
+             "category": "Electronics"},
+            {"name": "Sofa", "description": "Blue", "price": "80", "location": "NG", "category": "Furniture"},
+            {"name": "Camera", "description": "Same name", "price": "250", "location": "NG",
+             "category": "Electronics"},
+            {"name": "Bike", "description": "Red", "price": "-1", "location": "NG", "category": "Electronics"},
+        ]
+        content = "\n".join(json.dumps(row) for row in rows) + "\n\nnot json\n"
+        with override_settings(ADS_IMPORT_CHUNK_SIZE=2):
+            response = self._upload(content)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["data"]["created"], 2)
+        self.assertEqual([(error["row"], list(error["errors"])) for error in response.data["data"]["errors"]],
+                         [(3, ["name"]), (4, ["category"]), (5, ["name"]), (6, ["price"]), (8, ["row"])])
+        camera = Ad.objects.get(name="Camera")
+        self.assertEqual((camera.ad_creator, camera.status, camera.is_approved), (self.user, STATUS_PENDING, False))
+        self.assertTrue(camera.name_hash)
+        self.assertEqual(AdCard.objects.get(ad=camera).category_title, "Electronics")
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.ads_count, 3)
+
+    def test_csv_import_and_command(self):
+        content = "name,description,price,location,category\nLaptop,Barely used,500,NG,Electronics\n"
+        response = self._upload(content, file_format="csv")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self._upload(content, file_format="csv")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as import_file:
+            import_file.write(content.replace("Laptop", "Tablet"))
+        self.addCleanup(os.remove, import_file.name)
+        out = StringIO()
+        call_command("import_ads", import_file.name, seller=self.user.email, stdout=out, stderr=StringIO())
+        self.assertIn("Imported 1 ads", out.getvalue())
+        self.assertTrue(Ad.objects.filter(name="Tablet").exists())
+
+    def test_unreadable_rows_are_reported(self):
+        row = {"name": "Laptop", "description": "Barely used", "price": "500", "location": "NG",
+               "category": "Electronics"}
+        content = json.dumps(row).encode() + b'\n{"name": "Caf\xe9"}\n'
+        response = self.client.post(reverse_lazy("import_ads"), {
+            "file": SimpleUploadedFile("ads.ndjson", content), "file_format": "ndjson",
+        }, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([(error["row"], list(error["errors"])) for error in response.data["data"]["errors"]],
+                         [(2, ["row"])])
+
+        header = b"name,description,price,location,category\n"
+        first_row = b"Tablet,Barely used,500,NG,Electronics\n"
+        # A row that is not UTF-8, then a field longer than the csv module accepts
+        for bad_row in (b"Caf\xe9,Old,5,NG,Electronics\n", b"Big," + b"x" * 200000 + b",5,NG,Electronics\n"):
+            content = header + first_row + bad_row
+            Ad.objects.filter(name="Tablet").delete()
+            response = self.client.post(reverse_lazy("import_ads"), {
+                "file": SimpleUploadedFile("ads.csv", content), "file_format": "csv",
+            }, format="multipart")
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(response.data["data"]["created"], 1)
+            self.assertEqual([(error["row"], list(error["errors"])) for error in response.data["data"]["errors"]],
+                             [(2, ["file"])])
+
+    @override_settings(ADS_NEAR_DUPLICATE_DETECTION=True)
+    def test_near_duplicates_within_the_upload_are_rejected(self):
+        description = "Unlocked, 128 GB, with the original box, charger and a spare case"
+        rows = [
+            {"name": "Pixel 7 phone", "description": description, "price": "300", "location": "NG",
+             "category": "Electronics"},
+            {"name": "Pixel 7 phone (used)", "description": description + ".", "price": "300", "location": "NG",
+             "category": "Electronics"},
+        ]
+        response = self._upload("\n".join(json.dumps(row) for row in rows))
+        self.assertEqual(response.data["data"]["created"], 1)
+        self.assertEqual(response.data["data"]["errors"],
+                         [{"row": 2, "errors": {"name": ["You already posted a very similar ad."]}}])
+
+
+class ArchiveAdsTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.customer = self.User.objects.create_user(email="customer@example.com", password="string",
+                                                      full_name="Customer", phone_number="+2348000000001")
+        self.denied = self._create_ad("Denied phone", status=STATUS_DENIED, is_approved=False)
+        AdImage.objects.create(ad=self.denied, image="ad_images/denied.jpg")
+        staging_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, staging_directory, ignore_errors=True)
+        self.staged_file = os.path.join(staging_directory, "staged.jpg")
+        open(self.staged_file, "wb").close()
+        AdImage.objects.create(ad=self.denied, image=None, upload_status=UPLOAD_FAILED, staged_file=self.staged_file)
+        FavouriteAd.objects.create(customer=self.customer, ad=self.denied)
+        Ad.objects.filter(pk=self.denied.pk).update(view_count=7)
+        self.recently_paused = self._create_ad("Paused phone", status=STATUS_PAUSED)
+        self.live = self._create_ad("Live phone")
+        a_year_ago = timezone.now() - timedelta(days=365)
+        Ad.objects.filter(pk__in=[self.denied.pk, self.live.pk]).update(created=a_year_ago, updated=a_year_ago)
+
+    def test_archive_moves_old_denied_and_paused_ads(self):
+        out = StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("archive_ads", batch_size=1, stdout=out)
+        self.assertIn("Archived 1 ads", out.getvalue())
+        self.assertFalse(os.path.exists(self.staged_file))
+
+        self.assertEqual(set(Ad.objects.values_list("name", flat=True)), {"Paused phone", "Live phone"})
+        archived_ad = ArchivedAd.objects.get()
+        self.assertEqual((archived_ad.id, archived_ad.status), (self.denied.id, STATUS_DENIED))
+        self.assertEqual([image["image"] for image in archived_ad.images], ["ad_images/denied.jpg"])
+        self.assertEqual([favourite["customer_id"] for favourite in archived_ad.favourites], [str(self.customer.id)])
+        self.assertFalse(FavouriteAd.objects.exists())
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.ads_count, 2)
+
+    def test_restore_brings_back_images_and_favourites(self):
+        call_command("archive_ads", stdout=StringIO())
+        call_command("archive_ads", restore=[str(self.denied.id)], stdout=StringIO())
+
+        self.assertFalse(ArchivedAd.objects.exists())
+        ad = Ad.objects.get(pk=self.denied.pk)
+        self.assertEqual((ad.name_hash, ad.favourite_count), (self.denied.name_hash, 1))
+        self.assertEqual(ad.created, Ad.objects.get(pk=self.live.pk).created)
+        self.assertEqual(list(ad.images.values_list("image", flat=True)), ["ad_images/denied.jpg"])
+        self.assertTrue(FavouriteAd.objects.filter(customer=self.customer, ad=ad).exists())
+        card = AdCard.objects.get(ad=ad)
+        self.assertEqual((card.favourite_count, card.view_count, len(card.images)), (1, 7, 1))
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.ads_count, 3)
+        # The restored ad counts as just updated, so the next run leaves it alone
+        self.assertEqual(get_archivable_ads().count(), 0)
+
+
+class SellerDashboardTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(3):
+            self._create_ad(f"Active phone {index}")
+        self._create_ad("Pending phone", status=STATUS_PENDING, is_approved=False)
+        self._create_ad("Denied phone", status=STATUS_DENIED, is_approved=False)
+
+    def test_pages_with_status_counts_in_two_queries(self):
+        url = reverse_lazy("all_creator_ads")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(response.data["status_counts"],
+                         {"paused": 0, "denied": 1, "pending": 1, "active": 3, "total": 5})
+        names = [ad["name"] for ad in response.data["data"]]
+        while response.data["next_cursor"]:
+            response = self.client.get(url, {"page_size": 2, "cursor": response.data["next_cursor"]})
+            names += [ad["name"] for ad in response.data["data"]]
+        self.assertEqual(names, ["Denied phone", "Pending phone", "Active phone 2", "Active phone 1", "Active phone 0"])
+
+    def test_filters_by_status(self):
+        response = self.client.get(reverse_lazy("all_creator_ads"), {"status": STATUS_ACTIVE})
+        self.assertEqual(len(response.data["data"]), 3)
+        self.assertEqual(response.data["status_counts"]["total"], 5)
+
+        response = self.client.get(reverse_lazy("all_creator_ads"), {"status": "X"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class SoftDeleteAdsTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.ad = self._create_ad("Old phone")
+        self.ad_image = AdImage.objects.create(ad=self.ad, image=AdImageVariantsTestCase._upload())
+        self.ad_image.refresh_from_db()
+        FavouriteAd.objects.create(customer=self.user, ad=self.ad)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _stored_files(self):
+        return [name for _, _, names in os.walk(self.media_root) for name in names]
+
+    def test_delete_only_hides_the_ad(self):
+        response = self.client.delete(reverse_lazy("delete_ad", kwargs={"ad_id": self.ad.id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertFalse(Ad.objects.filter(pk=self.ad.pk).exists())
+        self.assertIsNotNone(Ad.all_objects.get(pk=self.ad.pk).deleted_at)
+        self.assertFalse(AdCard.objects.filter(ad=self.ad).exists())
+        self.assertFalse(AdSearchDocument.objects.filter(ad=self.ad).exists())
+        self.assertTrue(AdImage.objects.filter(ad=self.ad).exists())
+        self.assertEqual(len(self._stored_files()), 7)
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.ads_count, 0)
+
+        response = self.client.get(reverse_lazy("ad_details", kwargs={"ad_id": self.ad.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.delete(reverse_lazy("delete_ad", kwargs={"ad_id": self.ad.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_saving_a_soft_deleted_ad_keeps_it_out_of_listings_and_counters(self):
+        recompute_price_stats([self.category.id])
+        self.client.delete(reverse_lazy("delete_ad", kwargs={"ad_id": self.ad.id}))
+        ad = Ad.all_objects.get(pk=self.ad.pk)
+        ad.name = "Renamed phone"
+        ad.save()
+
+        self.assertFalse(AdCard.objects.filter(ad=self.ad).exists())
+        self.assertFalse(AdSearchDocument.objects.filter(ad=self.ad).exists())
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.ads_count, 0)
+        self.assertEqual(CategoryPriceStats.objects.get(category=self.category).ads_count, 0)
+
+    def test_reaper_purges_rows_and_files_after_the_grace_period(self):
+        self._create_ad("Kept phone")
+        self.client.delete(reverse_lazy("delete_ad", kwargs={"ad_id": self.ad.id}))
+        call_command("reap_deleted_ads", stdout=StringIO())
+        self.assertTrue(Ad.all_objects.filter(pk=self.ad.pk).exists())
+
+        out = StringIO()
+        call_command("reap_deleted_ads", hours=0, batch_size=1, stdout=out)
+        self.assertIn("Purged 1 deleted ads and 7 stored files", out.getvalue())
+        self.assertFalse(Ad.all_objects.filter(pk=self.ad.pk).exists())
+        self.assertFalse(AdImage.objects.exists())
+        self.assertFalse(FavouriteAd.objects.exists())
+        self.assertEqual(self._stored_files(), [])
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.ads_count, 1)
+
+
+@override_settings(ADS_PRICE_HISTOGRAM_BINS=4, ADS_PRICE_QUANTILES=[25, 50, 75])
+class CategoryPriceStatsTestCase(AdsTestCase):
+    def setUp(self):
+        super().setUp()
+        for price in (100, 200, 300, 400, 500):
+            self._create_ad(f"Phone {price}", price=price)
+        self._create_ad("Pending phone", price=10000, status=STATUS_PENDING, is_approved=False)
+        self.url = reverse_lazy("category_price_stats", kwargs={"category_id": self.category.id})
+
+    def test_stats_are_computed_and_served_from_cache(self):
+        call_command("recompute_price_stats", stdout=StringIO())
+        stats = CategoryPriceStats.objects.get(category=self.category)
+        self.assertEqual((stats.ads_count, stats.min_price, stats.max_price), (5, 100, 500))
+        self.assertEqual(stats.quantiles, {"p25": "200.00", "p50": "300.00", "p75": "400.00"})
+        self.assertEqual((stats.histogram_start, stats.histogram_width, stats.histogram), (100, 100, [1, 1, 1, 2]))
+
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.data["data"]["histogram"]["counts"], [1, 1, 1, 2])
+
+        response = self.client.get(reverse_lazy("category_price_stats", kwargs={"category_id": "unknown"}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_histogram_covers_prices_that_do_not_divide_into_the_bins(self):
+        stats = compute_price_stats([0, 5, 10.01])
+        self.assertEqual(sum(stats["histogram"]), stats["ads_count"])
+        self.assertGreaterEqual(stats["histogram_start"] + stats["histogram_width"] * 4, stats["max_price"])
+
+        self._create_ad("Odd phone", price=Decimal("500.03"))
+        recompute_price_stats()
+        # Another ad at the top price is counted right away instead of leaving a full recompute for the commit
+        self._create_ad("Odd phone 2", price=Decimal("500.03"))
+        stats = CategoryPriceStats.objects.get(category=self.category)
+        self.assertEqual(sum(stats.histogram), stats.ads_count)
+        self.assertEqual(stats.ads_count, 7)
+
+    def test_stats_follow_ads_going_live_and_removed(self):
+        self.assertEqual(self.client.get(self.url).data["data"]["ads_count"], 5)
+
+        pending = Ad.objects.get(name="Pending phone")
+        # The cached payload is dropped once the change commits
+        with self.captureOnCommitCallbacks(execute=True):
+            moderate_ads(Ad.objects.filter(pk=pending.pk), MODERATION_APPROVE)
+            # Its price is outside the histogram range, so the category is only recomputed after the commit
+            self.assertEqual(CategoryPriceStats.objects.get(category=self.category).ads_count, 5)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["data"]["ads_count"], 6)
+        # A price outside the histogram range rebuilt the stats of the category
+        self.assertEqual(response.data["data"]["max"], 10000)
+        self.assertEqual(response.data["data"]["histogram"]["counts"], [5, 0, 0, 1])
+
+        ad = Ad.objects.get(name="Phone 100")
+        ad.price = 3000
+        ad.save()
+        self.client.delete(reverse_lazy("delete_ad", kwargs={"ad_id": Ad.objects.get(name="Phone 200").pk}))
+        stats = CategoryPriceStats.objects.get(category=self.category)
+        self.assertEqual((stats.ads_count, stats.min_price, stats.histogram), (5, 100, [3, 1, 0, 1]))
+
+        recompute_price_stats()
+        stats = CategoryPriceStats.objects.get(category=self.category)
+        self.assertEqual((stats.ads_count, stats.min_price, stats.max_price), (5, 300, 10000))
 
-# Create your tests here.
@@ -0,0 +1,106 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from ads.counters import increment_ad_counters
+
+logger = logging.getLogger(__name__)
+
+
+class ViewTracker:
+    """
+    Write-behind buffer for ad views.
+
+    Views are counted in process memory and written to the database every ADS_VIEW_FLUSH_INTERVAL seconds by a
+    background thread. Ads viewed the same number of times share one UPDATE, so a flush costs a handful of queries
+    however busy the ads were. Views that fail to be written go back into the buffer for the next flush; views
+    that do not fit in the buffer are counted as dropped.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._flusher = None
+        self.flushed = 0
+        self.dropped = 0
+
+    def _buffer(self, ad_id, views):
+        # Callers hold the lock
+        if ad_id not in self._pending and len(self._pending) >= settings.ADS_VIEW_BUFFER_MAX_ADS:
+            self.dropped += views
+            return False
+        self._pending[ad_id] += views
+        return True
+
+    def record(self, ad_id):
+        with self._lock:
+            if self._buffer(ad_id, 1) and self._flusher is None and settings.ADS_VIEW_FLUSH_INTERVAL:
+                self._start_flusher()
+
+    def _start_flusher(self):
+        self._flusher = threading.Thread(target=self._run_flusher, name="ad-view-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(settings.ADS_VIEW_FLUSH_INTERVAL)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Could not flush ad views")
+            finally:
+                connection.close()
+
+    def flush(self):
+        """Write the buffered views to the database and return how many were written."""
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+        if not pending:
+            return 0
+
+        ad_ids_by_views = defaultdict(list)
+        for ad_id, views in pending.items():
+            ad_ids_by_views[views].append(ad_id)
+
+        flushed = 0
+        failed = []
+        batch_size = settings.ADS_VIEW_FLUSH_BATCH_SIZE
+        for views, ad_ids in ad_ids_by_views.items():
+            for start in range(0, len(ad_ids), batch_size):
+                batch = ad_ids[start:start + batch_size]
+                try:
+                    increment_ad_counters(batch, "view_count", views)
+                except Exception:
+                    logger.exception("Could not write %s views of %s ads", views * len(batch), len(batch))
+                    failed.extend((ad_id, views) for ad_id in batch)
+                else:
+                    flushed += views * len(batch)
+
+        with self._lock:
+            self.flushed += flushed
+            for ad_id, views in failed:
+                self._buffer(ad_id, views)
+        logger.info("Flushed %s ad views, requeued %s", flushed, sum(views for _, views in failed))
+        return flushed
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "pending": sum(self._pending.values()),
+                "flushed": self.flushed,
+                "dropped": self.dropped,
+            }
+
+
+view_tracker = ViewTracker()
+
+
+def record_ad_view(ad_id):
+    view_tracker.record(ad_id)
@@ -1,63 +1,109 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from drf_spectacular.utils import OpenApiResponse, extend_schema
+from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import status
-from rest_framework.filters import SearchFilter
 from rest_framework.generics import GenericAPIView, ListAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.throttling import UserRateThrottle
 
-from ads.choices import STATUS_ACTIVE
-from ads.filters import AdFilter
-from ads.mixins import AdsByCategoryMixin
-from ads.models import Ad, AdCategory, AdImage, FavouriteAd
-from ads.serializers import AdCategorySerializer, AdSerializer, CreateAdSerializer
+from ads.categories import get_category_tree
+from ads.choices import STATUS_ACTIVE, STATUS_CHOICES, STATUS_PENDING
+from ads.deletion import soft_delete_ad
+from ads.exports import EXPORT_FORMATS, iterate_live_ads
+from ads.facets import get_facets, get_status_counts, parse_price_buckets
+from ads.favourites import get_favourite_ad_ids, mark_favourites
+from ads.feeds import get_home_feed
+from ads.filters import AdFilter, AdSearchIndexFilter
+from ads.imports import import_ads
+from ads.models import Ad, AdCard, AdCategory, AdImage, FavouriteAd, SimilarAd
+from ads.moderation import moderate_ads
+from ads.pagination import KeysetPagination
+from ads.prices import get_price_stats
+from ads.serializers import AdCardSerializer, AdCategorySerializer, AdModerationSerializer, AdSerializer, \
+    CreateAdSerializer, ImportAdsSerializer, ModerationLogSerializer
+from ads.tracking import record_ad_view
+from common.choices import UPLOAD_PROCESSING
+from common.conditional import (
+    build_etag, get_last_modified, get_validator_headers, is_not_modified, not_modified_response,
+)
+from common.exceptions import CustomValidation
+from common.uploads import enqueue_staged_uploads, stage_upload
 
 
 # Create your views here.
 
 class RetrieveAllApprovedActiveAdsView(GenericAPIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    orderings = {
+        "newest": ("-created", "-pk"),
+        "popular": ("-favourite_count", "-created", "-pk"),
+    }
 
-    @staticmethod
     @extend_schema(
             summary="Get all ads",
             description=
             """
-            Retrieve list of all ads approved and made active by client.
+            Retrieve list of all ads approved and made active by client, newest first, or most favourited first
+            with `ordering=popular`.
+            Results are returned in pages; pass the `next_cursor` of a response as `cursor` to fetch the next page.
             """,
+            parameters=[
+                OpenApiParameter(name="ordering", description="newest (default) or popular", required=False),
+                OpenApiParameter(name="cursor", description="cursor (optional)", required=False),
+                OpenApiParameter(name="page_size", description="page size (optional)", required=False),
+            ],
             responses={
                 status.HTTP_200_OK: OpenApiResponse(
                         description="Ad successfully fetched",
                         response=AdSerializer(many=True),
                 ),
+                status.HTTP_400_BAD_REQUEST: OpenApiResponse(
+                        description="Invalid cursor or ordering",
+                ),
             }
     )
-    def get(request):
-        all_ads = Ad.objects.filter(is_approved=True, status=STATUS_ACTIVE)
+    def get(self, request):
+        all_ads = AdCard.objects.filter(is_approved=True, status=STATUS_ACTIVE)
+        ordering = request.query_params.get("ordering", "newest")
+        if ordering not in self.orderings:
+            raise CustomValidation({"message": "Invalid ordering", "status": "failed"},
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        paginator = self.pagination_class(ordering=self.orderings[ordering])
+        page = paginator.paginate_queryset(all_ads, request)
+        favourite_ad_ids = get_favourite_ad_ids(request.user)
         data = [
             {
                 "name": ad.name,
                 "description": ad.description,
                 "price": ad.price,
-                "location": ad.location,
+                "location": ad.location.code,
                 "category": {
-                    "id": ad.category.id,
-                    "title": ad.category.title
+                    "id": ad.category_id,
+                    "title": ad.category_title
                 },
-                "images": [image.ad_image for image in ad.images.all()],
+                "images": ad.images,
+                "images_srcset": ad.images_srcset,
                 "featured": ad.featured,
                 "is_approved": ad.is_approved,
+                "is_favourited": str(ad.ad_id) in favourite_ad_ids,
+                "favourite_count": ad.favourite_count,
+                "view_count": ad.view_count,
                 "status": ad.status,
             }
-            for ad in all_ads
+            for ad in page
         ]
         return Response(
-                {"message": "Ads retrieved successfully", "data": data, "status": "success"},
+                {"message": "Ads retrieved successfully", "data": data, "next_cursor": paginator.next_cursor,
+                 "status": "success"},
                 status=status.HTTP_200_OK)
 
 
-class AdsCategoryView(AdsByCategoryMixin, GenericAPIView):
+class AdsCategoryView(GenericAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = AdCategorySerializer
 
@@ -65,8 +111,12 @@ class AdsCategoryView(AdsByCategoryMixin, GenericAPIView):
             summary="Ads and Categories",
             description=
             """
-            Get all active ads and categories including featured ads.
+            Get all categories, the featured ads of the current rotation window and the newest active ads of each
+            category along with the number of active ads in it.
             """,
+            parameters=[
+                OpenApiParameter(name="ads_per_category", description="ads per category (optional)", required=False),
+            ],
             responses={
                 status.HTTP_200_OK: OpenApiResponse(
                         description="Ad successfully fetched",
@@ -75,29 +125,24 @@ class AdsCategoryView(AdsByCategoryMixin, GenericAPIView):
             }
     )
     def get(self, request):
-        ad_categories = AdCategory.objects.all()
-        serializer = AdCategorySerializer(ad_categories, many=True)
-        featured_ads = Ad.objects.select_related('category').filter(featured=True, is_approved=True,
-                                                                    status=STATUS_ACTIVE)
-        serialized_featured_ads = AdSerializer(featured_ads, many=True)
-        count_featured_ads = featured_ads.count()
-        all_ads_by_category = []
-        for category in ad_categories:
-            ads = self.get_ads_by_category(category.id)
-            num_ads = ads.count()
-            all_ads_by_category.append({
-                "category": category.id,
-                "title": category.title,
-                "num_ads": num_ads,
-                "ads": AdSerializer(ads, many=True).data
-            })
+        try:
+            ads_per_category = int(request.query_params.get("ads_per_category",
+                                                            settings.ADS_HOME_FEED_ADS_PER_CATEGORY))
+        except ValueError:
+            ads_per_category = settings.ADS_HOME_FEED_ADS_PER_CATEGORY
+        ads_per_category = max(1, min(ads_per_category, settings.ADS_HOME_FEED_MAX_ADS_PER_CATEGORY))
+        feed = get_home_feed(ads_per_category)
+        favourite_ad_ids = get_favourite_ad_ids(request.user)
         data = {
-            "ad_categories": serializer.data,
+            **feed,
             "featured_ads": {
-                "ads": serialized_featured_ads.data,
-                "count_featured_ads": count_featured_ads,
+                **feed["featured_ads"],
+                "ads": mark_favourites(feed["featured_ads"]["ads"], favourite_ad_ids),
             },
-            "all_ads_by_category": all_ads_by_category,
+            "all_ads_by_category": [
+                {**block, "ads": mark_favourites(block["ads"], favourite_ad_ids)}
+                for block in feed["all_ads_by_category"]
+            ],
         }
         return Response({"message": "Fetched successfully", "data": data, "status": "success"},
                         status=status.HTTP_200_OK)
@@ -105,38 +150,58 @@ class AdsCategoryView(AdsByCategoryMixin, GenericAPIView):
 
 class RetrieveAllCategoriesAndSubcategories(GenericAPIView):
     permission_classes = [IsAuthenticated]
-    queryset = AdCategory.objects.all()
 
     @extend_schema(
             summary="Categories and Sub-Categories",
             description=
             """
             Get all categories and sub-categories.
+            The response carries an ETag; send it back in `If-None-Match` to get an empty 304 response while the
+            categories are unchanged.
             """,
             responses={
                 status.HTTP_200_OK: OpenApiResponse(
                         description="Ad successfully fetched",
                         response=AdCategorySerializer(many=True)
                 ),
+                status.HTTP_304_NOT_MODIFIED: OpenApiResponse(
+                        description="Categories have not changed",
+                ),
             }
     )
     def get(self, request):
-        categories = self.get_queryset()
-        serialized_data = [
-            {
-                "title": category.title,
-                "sub_category": [
-                    {
-                        "title": sub_category.title
-                    }
-                    for sub_category in category.sub_categories.all()
-                ],
-                "image": category.image,
+        etag, category_tree = get_category_tree()
+        if is_not_modified(request, etag):
+            return not_modified_response(etag)
+        return Response({"message": "Fetched successfully", "data": category_tree, "status": "success"},
+                        status=status.HTTP_200_OK, headers=get_validator_headers(etag))
+
+
+class RetrieveCategoryPriceStatsView(GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+            summary="Category price distribution",
+            description=
+            """
+            Get the price distribution of the live ads of a category for price sliders: the number of ads, the
+            lowest and highest price, the price at a few percentiles and a fixed-width histogram whose first bin
+            starts at `histogram.start`. The stats are precomputed, so recently posted ads may take a while to show
+            up in the percentiles.
+            """,
+            responses={
+                status.HTTP_200_OK: OpenApiResponse(description="Price stats fetched successfully"),
+                status.HTTP_404_NOT_FOUND: OpenApiResponse(description="Category does not exist"),
             }
-            for category in categories
-        ]
-        return Response({"message": "Fetched successfully", "data": serialized_data, "status": "success"},
-                        status=status.HTTP_200_OK)
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            category = AdCategory.objects.get(id=self.kwargs.get('category_id'))
+        except (AdCategory.DoesNotExist, ValidationError):
+            return Response({"message": "Category does not exist", "status": "failed"},
+                            status=status.HTTP_404_NOT_FOUND)
+        return Response({"message": "Price stats fetched successfully", "data": get_price_stats(category),
+                         "status": "success"}, status=status.HTTP_200_OK)
 
 
 class RetrieveAdView(GenericAPIView):
@@ -146,7 +211,9 @@ class RetrieveAdView(GenericAPIView):
             summary="Ad Detail",
             description=
             """
-            Get the details of a specific Ad.
+            Get the details of a specific Ad. Views by anyone but the creator are counted in the background.
+            The response carries ETag and Last-Modified headers; send them back in `If-None-Match` or
+            `If-Modified-Since` to get an empty 304 response while the ad is unchanged.
             """,
             responses={
                 status.HTTP_200_OK: OpenApiResponse(
@@ -159,6 +226,9 @@ class RetrieveAdView(GenericAPIView):
                 status.HTTP_400_BAD_REQUEST: OpenApiResponse(
                         description="Ad ID is required",
                 ),
+                status.HTTP_304_NOT_MODIFIED: OpenApiResponse(
+                        description="Ad has not changed",
+                ),
             }
     )
     def get(self, request, *args, **kwargs):
@@ -167,10 +237,21 @@ class RetrieveAdView(GenericAPIView):
             return Response({"message": "Ad ID is required", "status": "success"},
                             status=status.HTTP_400_BAD_REQUEST)
         try:
-            ad = Ad.objects.get(id=ad_id)
+            ad = Ad.objects.select_related("ad_creator").get(id=ad_id)
         except Ad.DoesNotExist:
             return Response({"message": "Ad with this id does not exist", "status": "failed"},
                             status=status.HTTP_404_NOT_FOUND)
+        if ad.ad_creator_id != request.user.id:
+            record_ad_view(ad.id)
+
+        image_stats = ad.images.aggregate(last_updated=Max("updated"), count=Count("id"))
+        last_modified = get_last_modified(ad.created, ad.updated, image_stats["last_updated"])
+        etag = build_etag(ad.id, last_modified.isoformat(), image_stats["count"], ad.ad_creator.full_name,
+                          ad.favourite_count, ad.view_count)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        images = [image for image in ad.images.all() if image.image]
         data = {
             "id": ad.id,
             "ad_creator": ad.ad_creator.full_name,
@@ -178,28 +259,38 @@ class RetrieveAdView(GenericAPIView):
             "description": ad.description,
             "price": ad.price,
             "location": ad.location.name,
-            "images": [image.ad_image for image in ad.images.all()],
+            "images": [image.ad_image for image in images],
+            "images_srcset": [image.ad_image_srcset for image in images],
             "featured": ad.featured,
             "is_approved": ad.is_approved,
+            "favourite_count": ad.favourite_count,
+            "view_count": ad.view_count,
             "status": ad.status,
         }
-        return Response({"message": "Ad fetched successfully", "data": data}, status=status.HTTP_200_OK)
+        return Response({"message": "Ad fetched successfully", "data": data}, status=status.HTTP_200_OK,
+                        headers=get_validator_headers(etag, last_modified))
 
 
 class FilteredAdsListView(ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = AdSerializer
     filterset_class = AdFilter
-    filter_backends = [DjangoFilterBackend, SearchFilter]
-    search_fields = ['name', 'description', 'category__title', 'price']
-    queryset = Ad.objects.filter(is_approved=True, status=STATUS_ACTIVE)
+    filter_backends = [DjangoFilterBackend, AdSearchIndexFilter]
+    queryset = Ad.objects.select_related('category').prefetch_related('images').filter(is_approved=True,
+                                                                                       status=STATUS_ACTIVE)
 
     @extend_schema(
             summary="Filtered Ads List",
             description=
             """
-            This endpoint retrieves a list of filtered ads.
+            This endpoint retrieves a list of filtered ads along with facet counts of the matching ads per
+            category, country, status, featured flag and price band.
             """,
+            parameters=[
+                OpenApiParameter(name="price_buckets",
+                                 description="comma separated lower bounds of the price bands (optional)",
+                                 required=False),
+            ],
             responses={
                 status.HTTP_200_OK: OpenApiResponse(
                         description="Ads filtered successfully.",
@@ -212,9 +303,11 @@ class FilteredAdsListView(ListAPIView):
     )
     def get(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.serializer_class(queryset, many=True)
-        return Response({"message": "Ads filtered successfully", "data": serializer.data, "status": "success"},
-                        status.HTTP_200_OK)
+        serializer = self.serializer_class(queryset, many=True,
+                                           context={"favourite_ad_ids": get_favourite_ad_ids(request.user)})
+        facets = get_facets(queryset, parse_price_buckets(request.query_params.get("price_buckets")))
+        return Response({"message": "Ads filtered successfully", "data": serializer.data, "facets": facets,
+                         "status": "success"}, status.HTTP_200_OK)
 
 
 class CreateAdsView(GenericAPIView):
@@ -246,27 +339,76 @@ class CreateAdsView(GenericAPIView):
             return Response({"message": "The maximum number of allowed images is 3", "status": "failed"},
                             status=status.HTTP_400_BAD_REQUEST)
         created_ad = serializer.save()
-        serialized_data = AdSerializer(created_ad).data
-        ad_images = [AdImage(ad=created_ad, image=image) for image in images]
+        # The files are only staged locally here; upload workers push them to storage and add them to the ad
+        ad_images = [
+            AdImage(ad=created_ad, upload_status=UPLOAD_PROCESSING, staged_file=stage_upload(image))
+            for image in images
+        ]
         AdImage.objects.bulk_create(ad_images)
+        enqueue_staged_uploads(ad_images)
+        serialized_data = AdSerializer(created_ad).data
         return Response({"message": "Ad created successfully", "data": serialized_data, "status": "success"},
                         status.HTTP_201_CREATED)
 
 
+class ImportAdsView(GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    serializer_class = ImportAdsSerializer
+
+    @extend_schema(
+            summary="Import ads in bulk",
+            description=
+            """
+            This endpoint allows an authenticated user to create many ads at once from an NDJSON or CSV file with
+            name, description, price, location and category (id or title) for each ad. Like ads created one by one,
+            imported ads wait for approval. Rows that fail validation or reuse an existing ad name are skipped and
+            reported with their row number. A CSV file that stops being valid UTF-8 or CSV is imported up to that
+            row, which is reported under `file`.
+            """,
+            request={"multipart/form-data": ImportAdsSerializer},
+            responses={
+                status.HTTP_201_CREATED: OpenApiResponse(description="Ads imported, with the rejected rows"),
+                status.HTTP_400_BAD_REQUEST: OpenApiResponse(description="No ad could be imported"),
+            }
+    )
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = import_ads(serializer.validated_data["file"], serializer.validated_data["file_format"],
+                            request.user)
+        if not result["created"]:
+            return Response({"message": "No ads were imported", "data": result, "status": "failed"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": f"{result['created']} ads imported", "data": result, "status": "success"},
+                        status=status.HTTP_201_CREATED)
+
+
 class RetrieveUserAdsView(GenericAPIView):
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     @extend_schema(
             summary="Get all ads relate to user",
             description=
             """
-            Get all ads related to the authenticated user.
+            Seller dashboard: the ads of the authenticated user, newest first, along with how many of them are
+            pending, active, paused and denied. Pass `status` to only list the ads with that status.
+            Results are returned in pages; pass the `next_cursor` of a response as `cursor` to fetch the next page.
             """,
+            parameters=[
+                OpenApiParameter(name="status", description="status code (optional)", required=False,
+                                 enum=[ad_status for ad_status, _ in STATUS_CHOICES]),
+                OpenApiParameter(name="cursor", description="cursor (optional)", required=False),
+                OpenApiParameter(name="page_size", description="page size (optional)", required=False),
+            ],
             responses={
                 status.HTTP_200_OK: OpenApiResponse(
                         description="Ad successfully fetched",
                         response=AdSerializer,
                 ),
+                status.HTTP_400_BAD_REQUEST: OpenApiResponse(
+                        description="Invalid cursor or status",
+                ),
                 status.HTTP_404_NOT_FOUND: OpenApiResponse(
                         description="User has not created any ads",
                 ),
@@ -274,23 +416,40 @@ class RetrieveUserAdsView(GenericAPIView):
     )
     def get(self, request):
         creator = self.request.user
-        ads = Ad.objects.filter(ad_creator=creator)
-        if not ads.exists():
+        ads = AdCard.objects.filter(ad_creator=creator)
+        # The counts double as the check for a seller without ads, so no separate exists() query is needed
+        status_counts = get_status_counts(ads)
+        if not status_counts["total"]:
             return Response({"message": "User has not created any ads", "status": "failed"},
                             status=status.HTTP_404_NOT_FOUND)
+        ad_status = request.query_params.get("status")
+        if ad_status is not None:
+            if ad_status not in dict(STATUS_CHOICES):
+                raise CustomValidation({"message": "Invalid status", "status": "failed"},
+                                       status_code=status.HTTP_400_BAD_REQUEST)
+            ads = ads.filter(status=ad_status)
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(ads, request)
+        favourite_ad_ids = get_favourite_ad_ids(creator)
         all_user_ads = [
             {
+                "id": ad.ad_id,
                 "created": ad.created,
                 "name": ad.name,
                 "price": ad.price,
-                "image": [image.ad_image for image in ad.images.all()],
+                "image": ad.images,
+                "images_srcset": ad.images_srcset,
                 "is_approved": ad.is_approved,
+                "is_favourited": str(ad.ad_id) in favourite_ad_ids,
+                "favourite_count": ad.favourite_count,
+                "view_count": ad.view_count,
                 "status": ad.status
-            }.copy()
-            for ad in ads
+            }
+            for ad in page
         ]
 
-        return Response({"message": "All user ads fetched successfully", "data": all_user_ads, "status": "success"},
+        return Response({"message": "All user ads fetched successfully", "data": all_user_ads,
+                         "status_counts": status_counts, "next_cursor": paginator.next_cursor, "status": "success"},
                         status=status.HTTP_200_OK)
 
 
@@ -369,7 +528,8 @@ class DeleteUserAdView(GenericAPIView):
         except Ad.DoesNotExist:
             return Response({"message": "Ad with this id does not exist", "status": "failed"},
                             status=status.HTTP_404_NOT_FOUND)
-        ad.delete()
+        # Only marks the ad deleted; its images, favourites and files are purged later by reap_deleted_ads
+        soft_delete_ad(ad)
         return Response({"message": "Ad removed successfully", "status": "success"}, status=status.HTTP_204_NO_CONTENT)
 
 
@@ -434,17 +594,126 @@ class FavouriteAdListView(GenericAPIView):
     )
     def get(self, request):
         customer = self.request.user
-        favourite_ads = FavouriteAd.objects.select_related('ad').filter(customer=customer)
-        if not favourite_ads.exists():
+        favourite_ad_ids = list(FavouriteAd.objects.filter(customer=customer).values_list('ad_id', flat=True))
+        if not favourite_ad_ids:
             return Response({"message": "Customer has no favourite ads", "status": "failed"},
                             status=status.HTTP_404_NOT_FOUND)
+        ad_cards = AdCard.objects.in_bulk(favourite_ad_ids)
         serialized_data = [
             {
-                "name": a.ad.name,
-                "price": a.ad.price,
-                "images": [image.ad_image for image in a.ad.images.all()]
-            }.copy()
-            for a in favourite_ads
+                "name": ad_cards[ad_id].name,
+                "price": ad_cards[ad_id].price,
+                "images": ad_cards[ad_id].images,
+                "images_srcset": ad_cards[ad_id].images_srcset,
+                "is_favourited": True,
+            }
+            for ad_id in favourite_ad_ids
+            if ad_id in ad_cards
         ]
         return Response({"message": "All favorite products fetched", "data": serialized_data, "status": "success"},
                         status=status.HTTP_200_OK)
+
+
+class ModerateAdsView(GenericAPIView):
+    permission_classes = [IsAdminUser]
+    serializer_class = AdModerationSerializer
+
+    @extend_schema(
+            summary="Approve or deny ads in bulk",
+            description=
+            """
+            This endpoint allows staff to approve or deny many ads at once, either the ads listed in `ad_ids` or
+            the pending ads matching `filters` (category, location, featured, min_price, max_price).
+            Approving publishes pending and denied ads; denying takes ads down. Every call is recorded in the
+            moderation log.
+            """,
+            request=AdModerationSerializer,
+            responses={
+                status.HTTP_200_OK: OpenApiResponse(
+                        description="Ads moderated successfully",
+                        response=ModerationLogSerializer,
+                ),
+                status.HTTP_400_BAD_REQUEST: OpenApiResponse(
+                        description="Invalid action, ad ids or filters",
+                ),
+            }
+    )
+    def post(self, request):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if "ad_ids" in serializer.validated_data:
+            ads = Ad.objects.filter(pk__in=serializer.validated_data["ad_ids"])
+        else:
+            ad_filter = AdFilter(data=serializer.validated_data["filters"],
+                                 queryset=Ad.objects.filter(status=STATUS_PENDING))
+            if not ad_filter.is_valid():
+                raise CustomValidation({"message": ad_filter.errors, "status": "failed"},
+                                       status_code=status.HTTP_400_BAD_REQUEST)
+            ads = ad_filter.qs
+        moderation_log = moderate_ads(ads, serializer.validated_data["action"], moderator=request.user,
+                                      note=serializer.validated_data["note"])
+        return Response({"message": "Ads moderated successfully", "data": ModerationLogSerializer(moderation_log).data,
+                         "status": "success"}, status=status.HTTP_200_OK)
+
+
+class RetrieveSimilarAdsView(GenericAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+            summary="Similar ads",
+            description=
+            """
+            Get the live ads most similar to a specific ad by name, description and category, most similar first.
+            The recommendations are precomputed offline, so ads posted since the last run may have none yet.
+            """,
+            responses={
+                status.HTTP_200_OK: OpenApiResponse(
+                        description="Similar ads fetched successfully",
+                        response=AdCardSerializer(many=True),
+                ),
+            }
+    )
+    def get(self, request, *args, **kwargs):
+        try:
+            similar_ads = list(SimilarAd.objects.filter(
+                    ad_id=self.kwargs.get('ad_id'), similar__is_approved=True, similar__status=STATUS_ACTIVE
+            ).select_related("similar")[:settings.ADS_SIMILAR_ADS_COUNT])
+        except ValidationError:
+            similar_ads = []
+        ads = AdCardSerializer([similar_ad.similar for similar_ad in similar_ads], many=True).data
+        data = mark_favourites(ads, get_favourite_ad_ids(request.user))
+        return Response({"message": "Similar ads fetched successfully", "data": data, "status": "success"},
+                        status=status.HTTP_200_OK)
+
+
+class ExportAdsView(GenericAPIView):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [UserRateThrottle]
+
+    @extend_schema(
+            summary="Export live ads",
+            description=
+            """
+            Stream every approved, active ad for partner feeds, newest first, as NDJSON (one JSON object per line)
+            or CSV. The response is written while the ads are read, so it starts right away whatever the catalogue
+            size.
+            """,
+            parameters=[
+                OpenApiParameter(name="output", description="Export format, ndjson (default) or csv",
+                                 required=False, type=str, enum=list(EXPORT_FORMATS)),
+            ],
+            responses={
+                status.HTTP_200_OK: OpenApiResponse(description="Ads export streamed"),
+                status.HTTP_400_BAD_REQUEST: OpenApiResponse(description="Unknown export format"),
+            }
+    )
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            raise CustomValidation({"message": "Invalid output format", "status": "failed"},
+                                   status_code=status.HTTP_400_BAD_REQUEST)
+        content_type, render = EXPORT_FORMATS[output]
+        response = StreamingHttpResponse(render(iterate_live_ads()), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="ads.{output}"'
+        return response
+
@@ -0,0 +1,36 @@
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace):
+    return f"{namespace}:version"
+
+
+def _seed_version():
+    # Seeded from the clock so a version that was evicted from the cache comes back higher than before.
+    return time.time_ns() // 1000
+
+
+def get_cache_version(namespace):
+    """Return the current version of a cache namespace, creating it on first use."""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _seed_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_cache_version(namespace):
+    """Move a cache namespace to a new version, which makes every key built from the old version unreachable."""
+    key = _version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, _seed_version(), timeout=None)
+        return cache.get(key)
+
+
+def versioned_cache_key(namespace, *parts):
+    return ":".join(str(part) for part in (namespace, get_cache_version(namespace), *parts))
@@ -0,0 +1,11 @@
+UPLOAD_PROCESSING = "processing"
+UPLOAD_UPLOADING = "uploading"
+UPLOAD_READY = "ready"
+UPLOAD_FAILED = "failed"
+
+UPLOAD_STATUS_CHOICES = (
+    (UPLOAD_PROCESSING, "Processing"),
+    (UPLOAD_UPLOADING, "Uploading"),
+    (UPLOAD_READY, "Ready"),
+    (UPLOAD_FAILED, "Failed"),
+)
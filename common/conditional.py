@@ -0,0 +1,62 @@
+import hashlib
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def quote_etag(tag):
+    return f'"{tag}"'
+
+
+def build_etag(*parts):
+    """A strong ETag hashed from everything the representation of a resource depends on."""
+    return quote_etag(hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest())
+
+
+def get_last_modified(*timestamps):
+    """The latest of the `updated` timestamps of a resource and its related rows, ignoring missing ones."""
+    return max((timestamp for timestamp in timestamps if timestamp is not None), default=None)
+
+
+def _strip_weakness(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_matches(request, etag):
+    """
+    Whether the If-None-Match header of a request names `etag`, so the client's copy is still current.
+
+    If-None-Match uses the weak comparison of RFC 9110, so a W/ prefix added by a client or a compressing proxy is
+    ignored on both sides.
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    client_etags = {_strip_weakness(client_etag) for client_etag in parse_etags(header)}
+    return "*" in client_etags or _strip_weakness(etag) in client_etags
+
+
+def is_not_modified(request, etag, last_modified=None):
+    """
+    Whether the client's cached copy of a resource is current.
+
+    If-None-Match wins over If-Modified-Since when a client sends both, as RFC 9110 requires.
+    """
+    if request.headers.get("If-None-Match"):
+        return etag_matches(request, etag)
+    modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    if last_modified is None or modified_since is None:
+        return False
+    return int(last_modified.timestamp()) <= modified_since
+
+
+def get_validator_headers(etag, last_modified=None):
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified.timestamp())
+    return headers
+
+
+def not_modified_response(etag, last_modified=None):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers=get_validator_headers(etag, last_modified))
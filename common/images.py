@@ -0,0 +1,107 @@
+import logging
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+PIL_FORMATS = {
+    "webp": "WEBP",
+    "jpeg": "JPEG",
+}
+
+
+def _encode(image, file_format):
+    if file_format == "jpeg" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = BytesIO()
+    # No exif is passed to save, so camera metadata such as GPS position is stripped from every variant.
+    image.save(buffer, PIL_FORMATS[file_format], quality=settings.IMAGE_VARIANT_QUALITY[file_format],
+               optimize=True)
+    return buffer.getvalue()
+
+
+def build_image_variants(field_file):
+    """
+    Render the resized variants of an uploaded image and store them next to the original.
+
+    Returns a dict mapping each variant in IMAGE_VARIANT_SIZES to the storage names of its encodings, plus the
+    name of the source image so stale variants can be told apart. Images Pillow cannot read get no variants.
+    """
+    variants = {"source": field_file.name}
+    try:
+        with field_file.open("rb") as source:
+            original = ImageOps.exif_transpose(Image.open(source))
+            original.load()
+    except (UnidentifiedImageError, OSError):
+        logger.warning("Could not build variants for %s", field_file.name)
+        return variants
+
+    if original.mode not in ("RGB", "RGBA"):
+        original = original.convert("RGBA" if "transparency" in original.info else "RGB")
+    stem = os.path.splitext(field_file.name)[0]
+    for variant, size in settings.IMAGE_VARIANT_SIZES.items():
+        resized = original.copy()
+        # thumbnail() only ever shrinks, so small uploads are recompressed at their own size
+        resized.thumbnail((size, size), Image.LANCZOS)
+        variants[variant] = {"width": resized.width, "height": resized.height}
+        for file_format in PIL_FORMATS:
+            content = ContentFile(_encode(resized, file_format))
+            variants[variant][file_format] = field_file.storage.save(f"{stem}_{variant}.{file_format}", content)
+    return variants
+
+
+def get_srcset(field_file, variants):
+    """Map the original image and each of its variants to their URLs, e.g. {"thumbnail": {"webp": url, ...}}."""
+    if not field_file:
+        return None
+    srcset = {"original": field_file.url}
+    for variant in settings.IMAGE_VARIANT_SIZES:
+        if variant in variants:
+            srcset[variant] = {
+                "width": variants[variant]["width"],
+                "height": variants[variant]["height"],
+            }
+            for file_format in PIL_FORMATS:
+                srcset[variant][file_format] = field_file.storage.url(variants[variant][file_format])
+    return srcset
+
+
+def get_variant_names(variants):
+    """The storage names of every encoding of every variant in `variants`."""
+    return [
+        files[file_format]
+        for variant, files in variants.items() if variant != "source"
+        for file_format in PIL_FORMATS if file_format in files
+    ]
+
+
+def variants_are_stale(field_file, variants):
+    return bool(field_file) and variants.get("source") != field_file.name
+
+
+def refresh_image_variants(instance, field_name="image"):
+    """
+    Build the variants of a model's image if they are missing or were built for a previous upload.
+
+    The variant files of the previous upload are deleted once the new variants are recorded.
+    """
+    field_file = getattr(instance, field_name)
+    if not variants_are_stale(field_file, instance.variants):
+        return instance.variants
+    previous_names = get_variant_names(instance.variants)
+    instance.variants = build_image_variants(field_file)
+    # update() rather than save() so post_save is not sent a second time
+    type(instance).objects.filter(pk=instance.pk).update(variants=instance.variants)
+    current_names = set(get_variant_names(instance.variants))
+    for name in previous_names:
+        if name in current_names:
+            continue
+        try:
+            field_file.storage.delete(name)
+        except Exception:
+            logger.exception("Could not delete the stale variant %s", name)
+    return instance.variants
@@ -0,0 +1,27 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from common.images import variants_are_stale
+
+
+class Command(BaseCommand):
+    help = ('Builds the resized variants of stored images that have none yet, or whose variants were built for a '
+            'previous upload, e.g. images uploaded before variants existed.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        image_models = [
+            model for model in apps.get_models()
+            if {'image', 'variants'} <= {field.name for field in model._meta.get_fields()}
+        ]
+        for model in image_models:
+            built = 0
+            images = model.objects.exclude(image='').exclude(image__isnull=True).order_by()
+            for instance in images.iterator(chunk_size=options['chunk_size']):
+                if variants_are_stale(instance.image, instance.variants):
+                    # Saving runs the post_save receivers, which build the variants and refresh the ad cards
+                    instance.save(update_fields=['updated'])
+                    built += 1
+            self.stdout.write(f'Built variants for {built} {model._meta.verbose_name_plural}.')
@@ -0,0 +1,23 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from common.choices import UPLOAD_FAILED, UPLOAD_PROCESSING, UPLOAD_UPLOADING
+from common.uploads import process_staged_upload
+
+
+class Command(BaseCommand):
+    help = ('Uploads files left in the staging directory, e.g. after the server restarted before the workers ran, '
+            'and retries failed uploads. Run it on a host that sees UPLOAD_STAGING_ROOT.')
+
+    def handle(self, *args, **options):
+        staged_models = [
+            model for model in apps.get_models()
+            if any(field.name == 'staged_file' for field in model._meta.get_fields())
+        ]
+        for model in staged_models:
+            pks = list(model.objects.filter(
+                    upload_status__in=[UPLOAD_PROCESSING, UPLOAD_UPLOADING, UPLOAD_FAILED]
+            ).exclude(staged_file='').values_list('pk', flat=True))
+            for pk in pks:
+                process_staged_upload(model._meta.label, pk)
+            self.stdout.write(f'Processed {len(pks)} staged {model._meta.verbose_name_plural}.')
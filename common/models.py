@@ -14,3 +14,33 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True
         ordering = ("-created",)
+
+
+class PartialIndex(models.Index):
+    """
+    An index over the rows matching `where`, on the databases that support partial indexes.
+
+    Elsewhere, MySQL included, Django would silently drop the condition and index `fields` over the whole table, so
+    a plain composite index over `prefix_fields`, the columns compared with constants in `where`, followed by
+    `fields` is created instead. Queries filtering on the condition can seek on it either way.
+    """
+
+    def __init__(self, *, fields, name, where, prefix_fields=()):
+        super().__init__(fields=fields, name=name)
+        self.where = where
+        self.prefix_fields = list(prefix_fields)
+
+    def get_index(self, connection):
+        if connection.features.supports_partial_indexes:
+            return models.Index(fields=self.fields, name=self.name, condition=self.where)
+        return models.Index(fields=[*self.prefix_fields, *self.fields], name=self.name)
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        return self.get_index(schema_editor.connection).create_sql(model, schema_editor, using=using, **kwargs)
+
+    def deconstruct(self):
+        path, args, kwargs = super().deconstruct()
+        kwargs["where"] = self.where
+        if self.prefix_fields:
+            kwargs["prefix_fields"] = self.prefix_fields
+        return path, args, kwargs
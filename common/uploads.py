@@ -0,0 +1,132 @@
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from uuid import uuid4
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+from common.choices import UPLOAD_FAILED, UPLOAD_PROCESSING, UPLOAD_READY, UPLOAD_UPLOADING
+
+logger = logging.getLogger(__name__)
+
+_worker_pool = None
+
+
+def get_worker_pool():
+    global _worker_pool
+    if _worker_pool is None:
+        _worker_pool = ThreadPoolExecutor(max_workers=settings.UPLOAD_WORKERS, thread_name_prefix="upload-worker")
+    return _worker_pool
+
+
+def stage_upload(uploaded_file):
+    """
+    Copy an uploaded file to the staging directory and return the staged path.
+
+    Whichever process uploads the file later opens this path, so UPLOAD_STAGING_ROOT must be shared by every host
+    running the web workers or the process_staged_uploads command.
+    """
+    directory = os.path.join(settings.UPLOAD_STAGING_ROOT, uuid4().hex)
+    os.makedirs(directory)
+    path = os.path.join(directory, get_valid_filename(os.path.basename(uploaded_file.name)))
+    with open(path, "wb") as staged:
+        for chunk in uploaded_file.chunks():
+            staged.write(chunk)
+    return path
+
+
+def remove_staged_file(path):
+    shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def claim_staged_upload(model, pk):
+    """
+    Take a staged record for upload with a single conditional UPDATE, so no two processes push the same file.
+
+    Records that are waiting or whose upload failed can be claimed, as can records whose claim is older than
+    UPLOAD_CLAIM_TIMEOUT because the process that took them died mid-upload.
+    """
+    now = timezone.now()
+    claimable = Q(upload_status__in=[UPLOAD_PROCESSING, UPLOAD_FAILED]) | Q(
+            upload_status=UPLOAD_UPLOADING, updated__lt=now - timedelta(seconds=settings.UPLOAD_CLAIM_TIMEOUT)
+    )
+    return model.objects.filter(claimable, pk=pk).exclude(staged_file="").update(
+            upload_status=UPLOAD_UPLOADING, updated=now
+    ) == 1
+
+
+def process_staged_upload(model_label, pk):
+    """
+    Push the staged file of a record to its storage backend and mark the record ready.
+
+    The record is saved normally so its post_save receivers run once the file is in place. A failed upload keeps
+    its staged file, so the process_staged_uploads command can retry it.
+    """
+    model = apps.get_model(model_label)
+    if not claim_staged_upload(model, pk):
+        return
+    instance = model.objects.get(pk=pk)
+    path = instance.staged_file
+    if not os.path.exists(path):
+        logger.error("Staged file %s of %s %s is missing", path, model_label, pk)
+        model.objects.filter(pk=pk).update(upload_status=UPLOAD_FAILED, staged_file="")
+        return
+    try:
+        with open(path, "rb") as staged:
+            instance.image.save(os.path.basename(path), File(staged), save=False)
+        instance.upload_status = UPLOAD_READY
+        instance.staged_file = ""
+        instance.save()
+    except Exception:
+        logger.exception("Could not upload %s for %s %s", path, model_label, pk)
+        model.objects.filter(pk=pk).update(upload_status=UPLOAD_FAILED)
+        return
+    remove_staged_file(path)
+
+
+def _process_in_worker(model_label, pk):
+    close_old_connections()
+    try:
+        process_staged_upload(model_label, pk)
+    finally:
+        connection.close()
+
+
+def enqueue_staged_uploads(instances):
+    """
+    Hand staged records over to the upload workers once the current transaction commits.
+
+    With ASYNC_UPLOADS turned off the files are uploaded right away, in the calling thread.
+    """
+    keys = [(instance._meta.label, instance.pk) for instance in instances]
+    if not settings.ASYNC_UPLOADS:
+        for model_label, pk in keys:
+            process_staged_upload(model_label, pk)
+        return
+
+    def submit():
+        for model_label, pk in keys:
+            get_worker_pool().submit(_process_in_worker, model_label, pk)
+
+    transaction.on_commit(submit)
+
+
+def get_upload_status(instances):
+    """The upload state of a group of records: failed if any failed, processing if any is still staged."""
+    # A claimed record is still being uploaded, which clients see as processing
+    statuses = {
+        UPLOAD_PROCESSING if instance.upload_status == UPLOAD_UPLOADING else instance.upload_status
+        for instance in instances
+    }
+    for upload_status in (UPLOAD_FAILED, UPLOAD_PROCESSING):
+        if upload_status in statuses:
+            return upload_status
+    return UPLOAD_READY
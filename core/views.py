@@ -11,6 +11,9 @@ from rest_framework_simplejwt.serializers import TokenBlacklistSerializer, Token
     TokenRefreshSerializer
 from rest_framework_simplejwt.views import TokenBlacklistView, TokenObtainPairView, TokenRefreshView
 
+from common.conditional import (
+    build_etag, get_last_modified, get_validator_headers, is_not_modified, not_modified_response,
+)
 from core.emails import Util
 from core.models import Profile, User
 from core.serializers import ChangePasswordSerializer, LoginSerializer, ProfileSerializer, RegisterSerializer, \
@@ -161,19 +164,28 @@ class RetrieveUpdateProfileView(GenericAPIView):
             - `message`: A success message indicating that the profile has been retrieved.
             - `data`: The user's profile information.
             - `status`: The status of the request.
+
+            The response carries ETag and Last-Modified headers; send them back in `If-None-Match` or
+            `If-Modified-Since` to get an empty 304 response while the profile is unchanged.
             """
     )
     def get(self, request):
         customer_account = self.request.user
         try:
-            customer_profile = Profile.objects.get(user=customer_account)
+            customer_profile = Profile.objects.select_related("user").get(user=customer_account)
         except Profile.DoesNotExist:
             return Response({"message": "Profile for this customer account does not exist", "status": "failed"},
                             status=status.HTTP_404_NOT_FOUND)
+        user = customer_profile.user
+        last_modified = get_last_modified(customer_profile.created, customer_profile.updated, user.updated)
+        etag = build_etag(customer_profile.id, last_modified.isoformat(), user.full_name, user.email,
+                          user.phone_number)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
         serializer = self.get_serializer(customer_profile)
         data = serializer.data
         return Response({"message": "Profile retrieved successfully", "data": data, "status": "success"},
-                        status=status.HTTP_200_OK)
+                        status=status.HTTP_200_OK, headers=get_validator_headers(etag, last_modified))
 
     @extend_schema(
             summary="Update profile",
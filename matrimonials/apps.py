@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MatrimonialsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "matrimonials"
+
+    def ready(self):
+        from matrimonials import signals
@@ -0,0 +1,21 @@
+# Generated by Django 4.1.7 on 2026-10-17 01:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("matrimonials", "0006_rename__image_matrimonialprofileimage_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="matrimonialprofileimage",
+            name="variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Storage names of the resized copies.",
+            ),
+        ),
+    ]
@@ -1,7 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 from django_countries.fields import CountryField
 
+from common.choices import UPLOAD_READY, UPLOAD_STATUS_CHOICES
+from common.images import get_srcset
 from common.models import BaseModel
 from core.choices import GENDER_CHOICES
 from matrimonials.choices import CONNECTION_CHOICES, CONNECTION_PENDING, EDUCATION_CHOICES, RELIGION_CHOICES
@@ -44,13 +47,21 @@ class MatrimonialProfileImage(BaseModel):
     matrimonial_profile = models.ForeignKey(MatrimonialProfile, on_delete=models.CASCADE, related_name="images",
                                             null=True)
     image = models.ImageField(upload_to="matrimonial_images/", null=True)
+    variants = models.JSONField(default=dict, blank=True, help_text=_("Storage names of the resized copies."))
+    upload_status = models.CharField(max_length=10, choices=UPLOAD_STATUS_CHOICES, default=UPLOAD_READY)
+    staged_file = models.CharField(max_length=255, blank=True,
+                                   help_text=_("Local path of the file while it waits to be uploaded."))
 
     @property
     def matrimonial_image(self):
-        if self.image is not None:
+        if self.image:
             return self.image.url
         return None
 
+    @property
+    def matrimonial_image_srcset(self):
+        return get_srcset(self.image, self.variants)
+
     def __str__(self):
         return str(self.matrimonial_profile.full_name)
 
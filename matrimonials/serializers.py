@@ -5,7 +5,9 @@ from django.db.models import Q
 from django_countries.serializer_fields import CountryField
 from rest_framework import serializers
 
+from common.choices import UPLOAD_PROCESSING
 from common.exceptions import CustomValidation
+from common.uploads import enqueue_staged_uploads, get_upload_status, stage_upload
 from core.choices import GENDER_CHOICES
 from matrimonials.choices import CONNECTION_CHOICES, EDUCATION_CHOICES, RELIGION_CHOICES
 from matrimonials.models import ConnectionRequest, Conversation, MatrimonialProfile, MatrimonialProfileImage
@@ -51,11 +53,14 @@ class CreateMatrimonialProfileSerializer(serializers.Serializer):
         images = validated_data.pop('images')
         profile = MatrimonialProfile.objects.create(user=user, **validated_data)
 
+        # The files are only staged locally here; upload workers push them to storage after the commit
         matrimonial_images = [
-            MatrimonialProfileImage(matrimonial_profile=profile, image=image)
+            MatrimonialProfileImage(matrimonial_profile=profile, upload_status=UPLOAD_PROCESSING,
+                                    staged_file=stage_upload(image))
             for image in images
         ]
         MatrimonialProfileImage.objects.bulk_create(matrimonial_images)
+        enqueue_staged_uploads(matrimonial_images)
 
         return profile
 
@@ -63,17 +68,34 @@ class CreateMatrimonialProfileSerializer(serializers.Serializer):
 class MatrimonialProfileSerializer(serializers.Serializer):
     full_name = serializers.CharField(source="user.full_name", read_only=True)
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
+    upload_status = serializers.SerializerMethodField()
     short_bio = serializers.CharField()
     religion = serializers.CharField()
     education = serializers.CharField()
     profession = serializers.CharField()
     country = CountryField()
 
+    @staticmethod
+    def _get_first_image(obj: MatrimonialProfile):
+        # Images still staged for upload have no file yet
+        return next((image for image in obj.images.all() if image.image), None)
+
     def get_image(self, obj: MatrimonialProfile):
-        first_image = obj.images.first()
+        first_image = self._get_first_image(obj)
         if first_image:
             return first_image.matrimonial_image
-        return first_image
+        return None
+
+    def get_image_srcset(self, obj: MatrimonialProfile):
+        first_image = self._get_first_image(obj)
+        if first_image:
+            return first_image.matrimonial_image_srcset
+        return None
+
+    @staticmethod
+    def get_upload_status(obj: MatrimonialProfile):
+        return get_upload_status(obj.images.all())
 
 
 class ConnectionRequestSerializer(serializers.Serializer):
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from common.images import refresh_image_variants
+from matrimonials.models import MatrimonialProfileImage
+
+
+@receiver(post_save, sender=MatrimonialProfileImage)
+def handle_matrimonial_image_variants(sender, instance, **kwargs):
+    refresh_image_variants(instance)
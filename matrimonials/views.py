@@ -1,4 +1,4 @@
-from django.db.models import Q
+from django.db.models import Count, Max, Q
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import status
@@ -6,6 +6,9 @@ from rest_framework.generics import GenericAPIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from common.conditional import (
+    build_etag, get_last_modified, get_validator_headers, is_not_modified, not_modified_response,
+)
 from matrimonials.filters import MatrimonialFilter
 from matrimonials.models import BookmarkedProfile, ConnectionRequest, Conversation, MatrimonialProfile, Message
 from matrimonials.serializers import ConnectionRequestSerializer, ConversationListSerializer, \
@@ -30,7 +33,7 @@ class RetrieveAllMatrimonialProfilesView(GenericAPIView):
             }
     )
     def get(self, request):
-        all_matrimonial_profiles = MatrimonialProfile.objects.all().exclude(user=self.request.user)
+        all_matrimonial_profiles = MatrimonialProfile.objects.prefetch_related('images').exclude(user=self.request.user)
         data = [
             {
                 "id": profile.id,
@@ -41,7 +44,8 @@ class RetrieveAllMatrimonialProfilesView(GenericAPIView):
                 "profession": profile.profession,
                 "age": profile.age,
                 "height": profile.height,
-                "images": [image.matrimonial_image for image in profile.images.all()]
+                "images": [image.matrimonial_image for image in profile.images.all() if image.image],
+                "images_srcset": [image.matrimonial_image_srcset for image in profile.images.all() if image.image]
             }.copy()
             for profile in all_matrimonial_profiles
         ]
@@ -124,6 +128,8 @@ class RetrieveOtherUsersMatrimonialProfileView(GenericAPIView):
             description=
             """
             This endpoint allows an authenticated user to retrieve another user's matrimonial profile.
+            The response carries ETag and Last-Modified headers; send them back in `If-None-Match` or
+            `If-Modified-Since` to get an empty 304 response while the profile is unchanged.
             """,
             responses={
                 status.HTTP_200_OK: OpenApiResponse(
@@ -135,7 +141,10 @@ class RetrieveOtherUsersMatrimonialProfileView(GenericAPIView):
                 ),
                 status.HTTP_400_BAD_REQUEST: OpenApiResponse(
                         description="Matrimonial Profile ID is required."
-                )
+                ),
+                status.HTTP_304_NOT_MODIFIED: OpenApiResponse(
+                        description="Matrimonial profile has not changed.",
+                ),
             }
     )
     def get(self, request, *args, **kwargs):
@@ -145,13 +154,20 @@ class RetrieveOtherUsersMatrimonialProfileView(GenericAPIView):
                             status=status.HTTP_400_BAD_REQUEST)
         else:
             try:
-                matrimonial_profile = MatrimonialProfile.objects.get(id=matrimonial_profile_id)
+                matrimonial_profile = MatrimonialProfile.objects.select_related("user").get(id=matrimonial_profile_id)
             except MatrimonialProfile.DoesNotExist:
                 return Response({"message": "Matrimonial profile does not exist", "status": "failed"},
                                 status=status.HTTP_404_NOT_FOUND)
+            image_stats = matrimonial_profile.images.aggregate(last_updated=Max("updated"), count=Count("id"))
+            last_modified = get_last_modified(matrimonial_profile.created, matrimonial_profile.updated,
+                                              matrimonial_profile.user.updated, image_stats["last_updated"])
+            etag = build_etag(matrimonial_profile.id, last_modified.isoformat(), image_stats["count"])
+            if is_not_modified(request, etag, last_modified):
+                return not_modified_response(etag, last_modified)
             serialized_profile = MatrimonialProfileSerializer(matrimonial_profile).data
             return Response({"message": "Matrimonial profile retrieved successfully", "data": serialized_profile,
-                             "status": "success"}, status=status.HTTP_200_OK)
+                             "status": "success"}, status=status.HTTP_200_OK,
+                            headers=get_validator_headers(etag, last_modified))
 
 
 class BookmarkUsersMatrimonialProfile(GenericAPIView):
@@ -220,7 +236,8 @@ class BookmarkMatrimonialProfileListView(GenericAPIView):
     )
     def get(self, request):
         user = self.request.user
-        bookmarked_profiles = BookmarkedProfile.objects.select_related('user', 'profile').filter(user=user)
+        bookmarked_profiles = BookmarkedProfile.objects.select_related('user', 'profile').prefetch_related(
+                'profile__images').filter(user=user)
         if not bookmarked_profiles.exists():
             return Response({"message": "Customer has no profile bookmarked", "status": "failed"},
                             status=status.HTTP_404_NOT_FOUND)
@@ -233,7 +250,8 @@ class BookmarkMatrimonialProfileListView(GenericAPIView):
                 "city": bp.profile.city,
                 "education": bp.profile.education,
                 "profession": bp.profile.profession,
-                "images": [image.matrimonial_image for image in bp.profile.images.all()]
+                "images": [image.matrimonial_image for image in bp.profile.images.all() if image.image],
+                "images_srcset": [image.matrimonial_image_srcset for image in bp.profile.images.all() if image.image]
             }.copy()
             for bp in bookmarked_profiles
         ]
@@ -246,7 +264,7 @@ class FilterMatrimonialProfilesView(GenericAPIView):
     serializer_class = MatrimonialProfileSerializer
     filterset_class = MatrimonialFilter
     filter_backends = [DjangoFilterBackend]
-    queryset = MatrimonialProfile.objects.all()
+    queryset = MatrimonialProfile.objects.prefetch_related('images')
 
     @extend_schema(
             summary="Filter Matrimonial Profile List",
@@ -288,7 +306,8 @@ class FilterMatrimonialProfilesView(GenericAPIView):
                 "city": bp.city,
                 "education": bp.education,
                 "profession": bp.profession,
-                "images": [image.matrimonial_image for image in bp.images.all()]
+                "images": [image.matrimonial_image for image in bp.images.all() if image.image],
+                "images_srcset": [image.matrimonial_image_srcset for image in bp.images.all() if image.image]
             }.copy()
             for bp in queryset
         ]